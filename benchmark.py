@@ -0,0 +1,425 @@
+import abc
+import argparse
+import io
+import json
+import multiprocessing
+import platform
+import sys
+import time
+
+import numpy
+
+import board_seeder
+import pattern_io
+
+
+# board edge lengths, every board is square
+sizes = [ 256, 1024, 4096, 16384 ]
+
+soups = {
+    'soup_10': 0.1,
+    'soup_30': 0.3,
+    'soup_50': 0.5,
+    }
+
+methuselahs = {
+    'r_pentomino': 'x = 3, y = 3\nb2o$2o$bo!',
+    'acorn': 'x = 7, y = 3\nbo5b$3bo3b$2o2b3o!',
+    'diehard': 'x = 8, y = 3\n6bob$2o6b$bo3b3o!',
+    }
+
+glider = 'x = 3, y = 3\nbo$2bo$3o!'
+
+# one glider every 'glider_spacing' cells in each direction
+glider_spacing = 32
+
+patterns = sorted( soups ) + [ 'gliders' ] + sorted( methuselahs )
+
+
+def read_rle( text ):
+    return pattern_io.read_rle( io.StringIO( text ) )
+
+
+def create_board( pattern, size, seed = 0 ):
+    if pattern in soups:
+        return board_seeder.seed_board( (size, size), soups[ pattern ], seed )
+
+    board = numpy.zeros( (size, size), dtype = numpy.uint8 )
+    if pattern == 'gliders':
+        cells = read_rle( glider )
+        for y in range( 0, size, glider_spacing ):
+            for x in range( 0, size, glider_spacing ):
+                board[ y:y + 3, x:x + 3 ] = cells
+        return board
+
+    cells = read_rle( methuselahs[ pattern ] )
+    height, width = cells.shape
+    top, left = ( size - height ) // 2, ( size - width ) // 2
+    board[ top:top + height, left:left + width ] = cells
+    return board
+
+
+def is_soup( pattern ):
+    return pattern in soups
+
+
+class SkipCase( Exception ):
+    # raised by Engine.create when this machine can't run the case
+    pass
+
+
+class Engine( abc.ABC ):
+    # how to create, step and wait for an engine
+    # 'max_size' skips boards that would take too long
+    # or 'max_soup_size' for the dense patterns
+
+    max_size = max( sizes )
+    max_soup_size = max( sizes )
+
+    @abc.abstractmethod
+    def create( self, board ):
+        # returns an engine holding 'board'
+        pass
+
+    def step( self, engine, generations ):
+        engine.step( generations )
+
+    def finish( self, engine ):
+        pass
+
+    def close( self, engine ):
+        pass
+
+    def skip( self, pattern, size ):
+        # returns why a case is skipped, or None
+        if size > self.max_size:
+            return "boards larger than %d" % self.max_size
+        if is_soup( pattern ) and size > self.max_soup_size:
+            return "soups larger than %d" % self.max_soup_size
+        return None
+
+    def info( self ):
+        return {}
+
+
+class NumpyEngine( Engine ):
+
+    def create( self, board ):
+        import numpy_engine
+        return numpy_engine.NumpyEngine( board )
+
+
+class BitPackedEngine( Engine ):
+
+    def create( self, board ):
+        import bitpacked_engine
+        return bitpacked_engine.BitPackedEngine( board )
+
+
+class SparseEngine( Engine ):
+
+    def create( self, board ):
+        import sparse_engine
+        return sparse_engine.SparseEngine( board )
+
+
+class TiledEngine( Engine ):
+
+    def create( self, board ):
+        import tiled_engine
+        return tiled_engine.TiledEngine( board )
+
+    def close( self, engine ):
+        engine.close()
+
+
+class RuleEngine( Engine ):
+
+    max_size = 4096
+
+    def create( self, board ):
+        import rule_engine
+        return rule_engine.RuleEngine( board )
+
+
+class PagedEngine( Engine ):
+
+    max_soup_size = 1024
+
+    def create( self, board ):
+        import paged_engine
+        return paged_engine.PagedEngine( board )
+
+
+class HashlifeEngine( Engine ):
+
+    max_soup_size = 256
+
+    def create( self, board ):
+        import hashlife_engine
+        return hashlife_engine.HashlifeEngine( board )
+
+    def step( self, engine, generations ):
+        # step() renders the board each time, jump() doesn't
+        engine.jump( generations )
+
+
+class ShaderEngine( Engine ):
+    # GOL_Renderable's FBO ping-pong in a headless context
+    # use LIBGL_ALWAYS_SOFTWARE=1 for Mesa's software rasteriser
+
+    packed = False
+
+    def create( self, board ):
+        import headless
+        headless.configure()
+        self.window = headless.create_context()
+
+        if self.packed:
+            import packed_gol_renderable
+            try:
+                gol = packed_gol_renderable.PackedGOL_Renderable( board.shape[ ::-1 ], density = 0.0 )
+            except packed_gol_renderable.UnsupportedError as error:
+                self.window.close()
+                raise SkipCase( str( error ) )
+        else:
+            from gol_renderable import GOL_Renderable
+            gol = GOL_Renderable( board.shape[ ::-1 ], density = 0.0 )
+        gol.write_region( board, 0, 0 )
+        return gol
+
+    def finish( self, engine ):
+        from pyglet.gl import glFinish
+        glFinish()
+
+    def close( self, engine ):
+        self.window.close()
+
+    def info( self ):
+        from pyglet.gl import gl_info
+        return {
+            'renderer': gl_info.get_renderer(),
+            'version': gl_info.get_version(),
+            }
+
+
+class PackedShaderEngine( ShaderEngine ):
+
+    packed = True
+
+
+engines = {
+    'numpy': NumpyEngine,
+    'bitpacked': BitPackedEngine,
+    'sparse': SparseEngine,
+    'tiled': TiledEngine,
+    'rule': RuleEngine,
+    'paged': PagedEngine,
+    'hashlife': HashlifeEngine,
+    'gpu': ShaderEngine,
+    'gpu_packed': PackedShaderEngine,
+    }
+
+
+def peak_rss():
+    # the most memory this process has used so far, in bytes
+    import resource
+    peak = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_case( name, pattern, size, min_time = 1.0, max_generations = 1 << 20, seed = 0 ):
+    # time one engine on one board
+    # this is run in a fresh process so peak memory is our own
+    spec = engines[ name ]()
+    baseline_rss = peak_rss()
+
+    board = create_board( pattern, size, seed )
+
+    start = time.time()
+    engine = spec.create( board )
+    spec.finish( engine )
+    startup = time.time() - start
+    del board
+
+    # double the batch until we've run for long enough
+    generations = 0
+    elapsed = 0.0
+    batch = 1
+    while elapsed < min_time and generations < max_generations:
+        start = time.time()
+        spec.step( engine, batch )
+        spec.finish( engine )
+        elapsed += time.time() - start
+        generations += batch
+        batch = min( batch * 2, max_generations - generations ) or 1
+
+    result = {
+        'engine': name,
+        'pattern': pattern,
+        'size': size,
+        'cells': size * size,
+        'startup_seconds': startup,
+        'generations': generations,
+        'seconds': elapsed,
+        'generations_per_second': generations / elapsed,
+        'cells_per_second': generations * size * size / elapsed,
+        'peak_memory_bytes': peak_rss() - baseline_rss,
+        }
+    result.update( spec.info() )
+    spec.close( engine )
+    return result
+
+
+def case_process( queue, args ):
+    try:
+        queue.put( run_case( *args ) )
+    except SkipCase as error:
+        queue.put( { 'skipped': str( error ) } )
+    except Exception as error:
+        queue.put( { 'error': '%s: %s' % (type( error ).__name__, error) } )
+
+
+def run_isolated( name, pattern, size, min_time, timeout, seed = 0 ):
+    # run a case in its own process
+    # this isn't a pool as the tiled engine starts its own workers
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target = case_process,
+        args = (queue, (name, pattern, size, min_time, 1 << 20, seed))
+        )
+    process.start()
+    try:
+        result = queue.get( timeout = timeout )
+    except Exception:
+        result = { 'error': 'timed out after %ds' % timeout }
+    process.join( 1.0 )
+    if process.is_alive():
+        process.terminate()
+        process.join()
+
+    if 'error' in result or 'skipped' in result:
+        result.update( engine = name, pattern = pattern, size = size )
+    return result
+
+
+def run( names, pattern_names, board_sizes, min_time = 1.0, timeout = 600, progress = None ):
+    results = []
+    for size in board_sizes:
+        for pattern in pattern_names:
+            for name in names:
+                reason = engines[ name ]().skip( pattern, size )
+                if reason:
+                    result = { 'engine': name, 'pattern': pattern, 'size': size, 'skipped': reason }
+                else:
+                    result = run_isolated( name, pattern, size, min_time, timeout )
+                results.append( result )
+                if progress:
+                    progress( result )
+    return results
+
+
+def result_key( result ):
+    return (result[ 'engine' ], result[ 'pattern' ], result[ 'size' ])
+
+
+def compare( results, baseline, tolerance = 0.1 ):
+    # flag cases that got slower or bigger than the baseline
+    # by more than 'tolerance'
+    previous = dict(
+        (result_key( result ), result)
+        for result in baseline[ 'results' ]
+        if 'generations_per_second' in result
+        )
+
+    regressions = []
+    for result in results:
+        old = previous.get( result_key( result ) )
+        if not old or 'generations_per_second' not in result:
+            continue
+
+        checks = [
+            ('generations_per_second', result[ 'generations_per_second' ] < old[ 'generations_per_second' ] * ( 1.0 - tolerance )),
+            ('startup_seconds', result[ 'startup_seconds' ] > old[ 'startup_seconds' ] * ( 1.0 + tolerance )),
+            ('peak_memory_bytes', result[ 'peak_memory_bytes' ] > old[ 'peak_memory_bytes' ] * ( 1.0 + tolerance )),
+            ]
+        for metric, regressed in checks:
+            if regressed:
+                regressions.append( {
+                    'engine': result[ 'engine' ],
+                    'pattern': result[ 'pattern' ],
+                    'size': result[ 'size' ],
+                    'metric': metric,
+                    'baseline': old[ metric ],
+                    'current': result[ metric ],
+                    } )
+    return regressions
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'time': time.strftime( '%Y-%m-%dT%H:%M:%SZ', time.gmtime() ),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser( description = "Benchmark the Game of Life engines" )
+    parser.add_argument( '--engines', nargs = '+', default = sorted( engines ), choices = sorted( engines ) )
+    parser.add_argument( '--patterns', nargs = '+', default = patterns, choices = patterns )
+    parser.add_argument( '--sizes', nargs = '+', type = int, default = sizes )
+    parser.add_argument( '--min-time', type = float, default = 1.0, help = "seconds to step each case for" )
+    parser.add_argument( '--timeout', type = float, default = 600.0, help = "seconds before a case is abandoned" )
+    parser.add_argument( '--output', help = "write the JSON results here rather than stdout" )
+    parser.add_argument( '--baseline', help = "earlier JSON results to compare against" )
+    parser.add_argument( '--tolerance', type = float, default = 0.1, help = "fractional change flagged as a regression" )
+    args = parser.parse_args()
+
+    def progress( result ):
+        if 'generations_per_second' in result:
+            sys.stderr.write(
+                "%(engine)s %(pattern)s %(size)d: %(generations_per_second).1f gens/s, "
+                "%(cells_per_second).3g cells/s\n" % result
+                )
+        else:
+            sys.stderr.write(
+                "%s %s %d: %s\n" % (
+                    result[ 'engine' ],
+                    result[ 'pattern' ],
+                    result[ 'size' ],
+                    result.get( 'skipped' ) or result.get( 'error' )
+                    )
+                )
+
+    results = run( args.engines, args.patterns, args.sizes, args.min_time, args.timeout, progress )
+    report = {
+        'environment': environment(),
+        'results': results,
+        }
+
+    if args.baseline:
+        with open( args.baseline ) as stream:
+            report[ 'regressions' ] = compare( results, json.load( stream ), args.tolerance )
+        for regression in report[ 'regressions' ]:
+            sys.stderr.write(
+                "REGRESSION %(engine)s %(pattern)s %(size)d %(metric)s: "
+                "%(baseline).4g -> %(current).4g\n" % regression
+                )
+
+    text = json.dumps( report, indent = 2, sort_keys = True )
+    if args.output:
+        with open( args.output, 'w' ) as stream:
+            stream.write( text )
+    else:
+        print( text )
+
+    # a non-zero exit fails CI runs
+    return 1 if report.get( 'regressions' ) else 0
+
+
+if __name__ == "__main__":
+    sys.exit( main() )
@@ -0,0 +1,154 @@
+import numpy
+
+import boundaries
+import numpy_engine
+
+
+# number of cells stored in each word
+word_size = 64
+
+
+def pack_board( board ):
+    height, width = board.shape
+    if width % word_size:
+        raise ValueError( "Board width must be a multiple of %d" % word_size )
+
+    # pack 8 cells per byte, lowest x in the lowest bit
+    # then view each 8 bytes as a little endian word
+    packed = numpy.packbits(
+        numpy.asarray( board, dtype = numpy.uint8 ) != 0,
+        axis = 1,
+        bitorder = 'little'
+        )
+    return packed.view( '<u8' ).astype( numpy.uint64 )
+
+
+def unpack_board( words ):
+    packed = words.astype( '<u8' ).view( numpy.uint8 )
+    return numpy.unpackbits( packed, axis = 1, bitorder = 'little' )
+
+
+def shift_west( words, out, boundary = boundaries.torus ):
+    # move each cell's western neighbour into its bit
+    # bit 63 of the previous word carries into bit 0
+    numpy.left_shift( words, 1, out = out )
+    out[ :, 1: ] |= words[ :, :-1 ] >> numpy.uint64( 63 )
+    if boundary != boundaries.dead:
+        out[ :, 0 ] |= words[ :, -1 ] >> numpy.uint64( 63 )
+
+
+def shift_east( words, out, boundary = boundaries.torus ):
+    # move each cell's eastern neighbour into its bit
+    numpy.right_shift( words, 1, out = out )
+    out[ :, :-1 ] |= words[ :, 1: ] << numpy.uint64( 63 )
+    if boundary != boundaries.dead:
+        out[ :, -1 ] |= words[ :, 0 ] << numpy.uint64( 63 )
+
+
+def reverse_row( words ):
+    # mirror a row of words, so x becomes width - 1 - x
+    return pack_board( unpack_board( words[ numpy.newaxis ] )[ :, ::-1 ] )[ 0 ]
+
+
+def shift_rows( words, offset, boundary = boundaries.torus ):
+    # rows[ y ] = words[ y - offset ], for an offset of 1 or -1
+    # only the one row that wraps needs fixing up
+    rows = numpy.roll( words, offset, axis = 0 )
+    wrapped = 0 if offset > 0 else -1
+    if boundary == boundaries.dead:
+        rows[ wrapped ] = 0
+    elif boundary == boundaries.klein:
+        rows[ wrapped ] = reverse_row( rows[ wrapped ] )
+    return rows
+
+
+class BitPackedEngine( object ):
+
+    def __init__( self, board, boundary = boundaries.torus ):
+        super( BitPackedEngine, self ).__init__()
+
+        self.generation = 0
+        self.boundary = boundaries.check( boundary )
+        self.width = board.shape[ 1 ]
+        self.words = pack_board( board )
+
+    @classmethod
+    def from_words( cls, words, width, generation = 0, boundary = boundaries.torus ):
+        # start from already packed words
+        # such as a memory-mapped checkpoint
+        if width % word_size:
+            raise ValueError( "Board width must be a multiple of %d" % word_size )
+        engine = cls.__new__( cls )
+        engine.generation = generation
+        engine.boundary = boundaries.check( boundary )
+        engine.width = width
+        engine.words = words
+        return engine
+
+    @classmethod
+    def from_rgba( cls, data, dimensions, format_size = 4 ):
+        board = numpy_engine.board_from_rgba( data, dimensions, format_size )
+        return cls( board )
+
+    def to_rgba( self, format_size = 4 ):
+        return numpy_engine.board_to_rgba( self.board, format_size )
+
+    def step( self, generations = 1 ):
+        words = self.words
+        west = numpy.empty_like( words )
+        east = numpy.empty_like( words )
+
+        for generation in range( generations ):
+            shift_west( words, west, self.boundary )
+            shift_east( words, east, self.boundary )
+
+            # horizontal sums for every row as 2 bit numbers
+            # west + east for the row itself
+            mid0 = west ^ east
+            mid1 = west & east
+
+            # west + centre + east for the rows above and below
+            row0 = mid0 ^ words
+            row1 = mid1 | ( mid0 & words )
+
+            # bit 0 of the count, adding the rows above and below
+            above0 = shift_rows( row0, 1, self.boundary )
+            below0 = shift_rows( row0, -1, self.boundary )
+            sum0 = above0 ^ below0 ^ mid0
+            carry0 = ( above0 & below0 ) | ( mid0 & ( above0 ^ below0 ) )
+
+            # bit 1 of the count, including the carry from bit 0
+            above1 = shift_rows( row1, 1, self.boundary )
+            below1 = shift_rows( row1, -1, self.boundary )
+            partial = above1 ^ below1 ^ mid1
+            carry1 = ( above1 & below1 ) | ( mid1 & ( above1 ^ below1 ) )
+            sum1 = partial ^ carry0
+            carry2 = partial & carry0
+
+            # bit 2 of the count
+            # a count of 8 wraps to 0, which dies either way
+            sum2 = carry1 ^ carry2
+
+            # B3 / S23 is a count of 2 or 3 where
+            # either bit 0 is set or the cell is alive
+            words = sum1 & ~sum2 & ( sum0 | words )
+            self.generation += 1
+
+        self.words = words
+        return self.words
+
+    @property
+    def board( self ):
+        return unpack_board( self.words )[ :, :self.width ]
+
+    @property
+    def nbytes( self ):
+        return self.words.nbytes
+
+    @property
+    def dimensions( self ):
+        return (self.width, self.height)
+
+    @property
+    def height( self ):
+        return self.words.shape[ 0 ]
@@ -0,0 +1,201 @@
+import numpy
+
+import boundaries
+
+
+def rectangles( mask ):
+    # cover the set cells of a mask with rectangles
+    # ( left, bottom, right, top ), right and top exclusive
+    # rows are grouped into bands with the same mask, each run
+    # in a band is a rectangle, and rectangles with the same
+    # columns in touching bands are joined
+    height = mask.shape[ 0 ]
+    if not height:
+        return []
+    changes = numpy.nonzero( ( mask[ 1: ] != mask[ :-1 ] ).any( axis = 1 ) )[ 0 ] + 1
+    starts = [ 0 ] + list( changes )
+    ends = list( changes ) + [ height ]
+
+    result = []
+    # ( left, right ) -> index of the rectangle ending at this band
+    previous = {}
+    for bottom, top in zip( starts, ends ):
+        row = numpy.concatenate( ( [ False ], mask[ bottom ], [ False ] ) )
+        edges = numpy.nonzero( row[ 1: ] != row[ :-1 ] )[ 0 ]
+
+        current = {}
+        for left, right in zip( edges[ ::2 ], edges[ 1::2 ] ):
+            key = (int( left ), int( right ))
+            if key in previous:
+                index = previous[ key ]
+                result[ index ] = result[ index ][ :3 ] + (int( top ),)
+            else:
+                index = len( result )
+                result.append( (key[ 0 ], int( bottom ), key[ 1 ], int( top )) )
+            current[ key ] = index
+        previous = current
+    return result
+
+
+def wrapped_spans( start, length, size ):
+    # split the span start to start + length where it
+    # crosses a multiple of 'size'
+    # yields ( offset into the span, times wrapped, position, length )
+    offset = 0
+    while offset < length:
+        wraps, position = divmod( start + offset, size )
+        run = min( length - offset, size - position )
+        yield offset, wraps, position, run
+        offset += run
+
+
+def touches( a, b ):
+    # do two ( left, bottom, right, top ) boxes overlap or share an edge
+    return a[ 0 ] <= b[ 2 ] and b[ 0 ] <= a[ 2 ] and a[ 1 ] <= b[ 3 ] and b[ 1 ] <= a[ 3 ]
+
+
+def union( a, b ):
+    return (min( a[ 0 ], b[ 0 ] ), min( a[ 1 ], b[ 1 ] ), max( a[ 2 ], b[ 2 ] ), max( a[ 3 ], b[ 3 ] ))
+
+
+class BoardEditor( object ):
+    # draws, erases and stamps cells on a GOL_Renderable
+    # edits are queued during a frame and flushed together
+    # touching edits are painted into one array per cluster and only
+    # the cells that were edited are uploaded, as a few rectangles
+    # so a stroke or a large stamp costs a handful of glTexSubImage2D
+
+    def __init__( self, gol ):
+        super( BoardEditor, self ).__init__()
+
+        self.gol = gol
+
+        # the side of the square brush in cells
+        self.brush_size = 1
+
+        # the pattern placed by stamp()
+        self.pattern = None
+
+        # queued edits as ( box, cells ) in the order they were made
+        self.edits = []
+
+        # the rectangles uploaded by the last flush
+        self.uploaded = 0
+
+    def set_cells( self, cells, x, y ):
+        # queue a block of cells at x, y
+        # past the edges it's clipped on a dead board, and split
+        # into pieces that wrap around a torus or Klein bottle
+        width, height = self.gol.dimensions
+        if self.gol.boundary == boundaries.dead:
+            self.clip_cells( cells, x, y )
+            return
+
+        # a block larger than the board would overlap itself
+        cells = cells[ :height, :width ]
+        columns = cells.shape[ 1 ]
+        for row, wraps, bottom, rows in wrapped_spans( y, cells.shape[ 0 ], height ):
+            band = cells[ row:row + rows ]
+            left = x
+            if self.gol.boundary == boundaries.klein and wraps % 2:
+                # each wrap through the top or bottom mirrors x
+                band = band[ :, ::-1 ]
+                left = width - x - columns
+            for column, unused, start, run in wrapped_spans( left, columns, width ):
+                self.edits.append( (
+                    (start, bottom, start + run, bottom + rows),
+                    band[ :, column:column + run ]
+                    ) )
+
+    def clip_cells( self, cells, x, y ):
+        # queue the part of a block of cells that's on the board
+        width, height = self.gol.dimensions
+        left, bottom = max( x, 0 ), max( y, 0 )
+        right = min( x + cells.shape[ 1 ], width )
+        top = min( y + cells.shape[ 0 ], height )
+        if left >= right or bottom >= top:
+            return
+        self.edits.append( (
+            (left, bottom, right, top),
+            cells[ bottom - y:top - y, left - x:right - x ]
+            ) )
+
+    def paint( self, x, y, alive = True ):
+        # a brush sized square centred on the cell
+        # the brush follows the board's boundary, see set_cells
+        width, height = self.gol.dimensions
+        offset = self.brush_size // 2
+        cells = numpy.empty( (self.brush_size, self.brush_size), dtype = numpy.uint8 )
+        cells.fill( 1 if alive else 0 )
+        self.set_cells( cells, x % width - offset, y % height - offset )
+
+    def line( self, start, end, alive = True ):
+        # paint every cell between two cells
+        # so fast strokes don't leave gaps
+        steps = max( abs( end[ 0 ] - start[ 0 ] ), abs( end[ 1 ] - start[ 1 ] ) )
+
+        # brush widths apart, and always both ends
+        points = max( steps // max( self.brush_size // 2, 1 ), 1 )
+        for index in range( points + 1 ):
+            t = index / float( points )
+            self.paint(
+                int( round( start[ 0 ] + ( end[ 0 ] - start[ 0 ] ) * t ) ),
+                int( round( start[ 1 ] + ( end[ 1 ] - start[ 1 ] ) * t ) ),
+                alive
+                )
+
+    def stamp( self, x, y, pattern = None ):
+        # place a pattern centred on the cell, dead cells included
+        pattern = self.pattern if pattern is None else pattern
+        if pattern is None:
+            return
+        width, height = self.gol.dimensions
+        self.set_cells(
+            numpy.asarray( pattern, dtype = numpy.uint8 ),
+            x % width - pattern.shape[ 1 ] // 2,
+            y % height - pattern.shape[ 0 ] // 2
+            )
+
+    def clusters( self ):
+        # group the edits whose boxes touch
+        # returns [ ( box, [ edit index, ... ] ), ... ]
+        clusters = []
+        for index, (box, cells) in enumerate( self.edits ):
+            members = [ index ]
+            merged = True
+            while merged:
+                merged = False
+                for cluster in clusters:
+                    if touches( cluster[ 0 ], box ):
+                        clusters.remove( cluster )
+                        box = union( box, cluster[ 0 ] )
+                        members.extend( cluster[ 1 ] )
+                        merged = True
+                        break
+            clusters.append( (box, members) )
+        return clusters
+
+    def flush( self ):
+        # upload the queued edits into the current generation
+        # returns the number of rectangles uploaded
+        self.uploaded = 0
+        if not self.edits:
+            return 0
+
+        for box, members in self.clusters():
+            left, bottom, right, top = box
+            cells = numpy.zeros( (top - bottom, right - left), dtype = numpy.uint8 )
+            mask = numpy.zeros( cells.shape, dtype = bool )
+
+            # later edits overwrite earlier ones
+            for index in sorted( members ):
+                (x0, y0, x1, y1), edit = self.edits[ index ]
+                cells[ y0 - bottom:y1 - bottom, x0 - left:x1 - left ] = edit
+                mask[ y0 - bottom:y1 - bottom, x0 - left:x1 - left ] = True
+
+            covered = rectangles( mask )
+            self.gol.write_rectangles( cells, covered, left, bottom )
+            self.uploaded += len( covered )
+
+        self.edits = []
+        return self.uploaded
@@ -0,0 +1,78 @@
+import numpy
+
+
+# random values are drawn as 16 bit integers
+# which gives us a density resolution of 1 / 65536
+density_range = 1 << 16
+
+# rows generated at a time, to bound temporary memory
+chunk_cells = 1 << 22
+
+
+def threshold( density ):
+    if not 0.0 <= density <= 1.0:
+        raise ValueError( "Density must be between 0.0 and 1.0" )
+    return int( round( density * density_range ) )
+
+
+def chunks( height, width ):
+    rows = max( 1, chunk_cells // width )
+    for top in range( 0, height, rows ):
+        yield top, min( top + rows, height )
+
+
+def fill_cells( cells, density, generator, value = 1 ):
+    # fill a 2d, possibly strided, integer view with live cells
+    # working through it a few rows at a time
+    limit = threshold( density )
+    height, width = cells.shape
+    for top, bottom in chunks( height, width ):
+        random = generator.integers(
+            0, density_range,
+            size = (bottom - top, width),
+            dtype = numpy.uint16
+            )
+        numpy.less( random, limit, out = cells[ top:bottom ], casting = 'unsafe' )
+        if value != 1:
+            cells[ top:bottom ] *= value
+
+
+def seed_board( dimensions, density = 0.5, seed = None, out = None, value = 1 ):
+    # create a board of 0 / 1 cells, suitable for the CPU engines
+    # or 0 / 255 for single channel textures
+    # the same seed always produces the same board
+    width, height = dimensions
+    if out is None:
+        out = numpy.empty( (height, width), dtype = numpy.uint8 )
+    elif not isinstance( out, numpy.ndarray ):
+        # wrap a buffer, such as a ctypes GLubyte array
+        out = numpy.frombuffer( out, dtype = numpy.uint8 ).reshape( height, width )
+
+    generator = numpy.random.default_rng( seed )
+    fill_cells( out, density, generator, value )
+    return out
+
+
+def seed_rgba( dimensions, out, density = 0.5, seed = None, format_size = 4 ):
+    # fill a texture buffer in place, without copying it
+    # 'out' can be anything supporting the writable buffer protocol
+    # such as a ctypes GLubyte array
+    # live cells have R set to 255, GB are 0 and A is 255
+    # we use the same random values as seed_board so the
+    # textures and CPU boards match for a given seed
+    width, height = dimensions
+    generator = numpy.random.default_rng( seed )
+
+    if format_size == 4:
+        # write whole RGBA texels as little endian words
+        # 0xFF0000FF for live cells, 0xFF000000 for dead cells
+        texels = numpy.frombuffer( out, dtype = '<u4' ).reshape( height, width )
+        fill_cells( texels, density, generator, value = 0xFF )
+        texels |= 0xFF000000
+        return out
+
+    rgba = numpy.frombuffer( out, dtype = numpy.uint8 )
+    rgba = rgba.reshape( height, width, format_size )
+    rgba[ :, :, 1: ] = 0
+    fill_cells( rgba[ :, :, 0 ], density, generator, value = 255 )
+    return out
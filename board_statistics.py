@@ -0,0 +1,264 @@
+import csv
+
+from pyglet.gl import *
+
+from pygly.shader import Shader
+
+import fbo_texture
+import quad_buffer
+import shader_program
+from fbo_texture import FBO_Texture
+from quad_buffer import QuadBuffer
+from shader_program import ShaderProgram
+
+
+vertex_shader = """
+// the passes draw a quad already in clip space, so this is identity
+uniform mat4 transform;
+
+void main()
+{
+    gl_Position    = transform * gl_Vertex;
+    gl_FrontColor  = gl_Color;
+    gl_TexCoord[0] = gl_MultiTexCoord0;
+}
+"""
+
+# each pass halves the source, combining 2x2 blocks
+# texels past the edge of odd sized levels count as zero
+reduce_shader = """
+#version 120
+
+// inputs
+uniform sampler2D source;
+uniform sampler2D previous;
+uniform vec2 source_size;
+
+float alive( sampler2D board, vec2 coord )
+{
+    return step( 0.999, texture2D( board, coord ).r );
+}
+
+vec4 value( vec2 texel )
+{
+    vec2 coord = texel / source_size;
+    vec2 edge = vec2( 1.0 ) - step( source_size, texel );
+    float inside = edge.x * edge.y;
+    %s
+}
+
+void main()
+{
+    vec2 base = floor( gl_FragCoord.xy ) * 2.0 + 0.5;
+
+    vec4 a = value( base );
+    vec4 b = value( base + vec2( 1.0, 0.0 ) );
+    vec4 c = value( base + vec2( 0.0, 1.0 ) );
+    vec4 d = value( base + vec2( 1.0, 1.0 ) );
+
+    gl_FragColor = %s;
+}
+"""
+
+# population, births and deaths
+count_board = """
+    float now = alive( source, coord );
+    float before = alive( previous, coord );
+    return inside * vec4( now, now * ( 1.0 - before ), before * ( 1.0 - now ), 0.0 );
+"""
+
+# the bounding box, as maxima so every pass is a max
+# ( right, top, width - left, height - bottom )
+bounds_board = """
+    vec2 cell = floor( texel );
+    return inside * alive( source, coord ) * vec4( cell + 1.0, source_size - cell );
+"""
+
+level_value = """
+    return inside * texture2D( source, coord );
+"""
+
+sum_values = 'a + b + c + d'
+max_values = 'max( max( a, b ), max( c, d ) )'
+
+
+def is_supported():
+    # counts need float textures we can render to
+    return (
+        ( gl_info.have_version( 3, 0 ) or gl_info.have_extension( 'GL_ARB_texture_float' ) ) and
+        fbo_texture.is_renderable( GL_RGBA32F )
+        )
+
+
+class Reduction( object ):
+    # a chain of halving passes from the board down to one texel
+
+    def __init__( self, dimensions, board_value, combine ):
+        super( Reduction, self ).__init__()
+
+        self.board_shader = ShaderProgram( Shader(
+            vert = vertex_shader,
+            frag = reduce_shader % (board_value, combine)
+            ) )
+        self.level_shader = ShaderProgram( Shader(
+            vert = vertex_shader,
+            frag = reduce_shader % (level_value, combine)
+            ) )
+
+        # a fullscreen quad, uploaded once
+        self.quad = QuadBuffer()
+
+        # log2( N ) levels, each half the size of the last
+        self.levels = []
+        width, height = dimensions
+        while width > 1 or height > 1:
+            width, height = ( width + 1 ) // 2, ( height + 1 ) // 2
+            self.levels.append( FBO_Texture( (width, height), internal_format = GL_RGBA32F ) )
+
+    def render( self, board, previous, dimensions ):
+        shader = self.board_shader
+        source_size = dimensions
+        self.quad.bind()
+        for level in self.levels:
+            level.bind()
+            glViewport( 0, 0, level.width, level.height )
+
+            shader.bind()
+            shader.uniform_matrixf( 'transform', quad_buffer.identity )
+            shader.uniformi( 'source', 0 )
+            shader.uniformi( 'previous', 1 )
+            shader.uniformf( 'source_size', float( source_size[ 0 ] ), float( source_size[ 1 ] ) )
+
+            glActiveTexture( GL_TEXTURE1 )
+            glBindTexture( previous.target, previous.id )
+            shader_program.nearest( previous )
+
+            glActiveTexture( GL_TEXTURE0 )
+            glBindTexture( board.target, board.id )
+            shader_program.nearest( board )
+
+            self.quad.draw()
+
+            shader.unbind()
+            level.unbind()
+
+            # the next pass only reads the level we just wrote
+            board = previous = level.texture
+            shader = self.level_shader
+            source_size = level.dimensions
+
+        self.quad.unbind()
+        glActiveTexture( GL_TEXTURE1 )
+        glBindTexture( GL_TEXTURE_2D, 0 )
+        glActiveTexture( GL_TEXTURE0 )
+        glBindTexture( GL_TEXTURE_2D, 0 )
+
+    def delete( self ):
+        for level in self.levels:
+            level.delete()
+        self.levels = []
+        self.quad.delete()
+
+    def read( self ):
+        # read back our single texel
+        data = (GLfloat * 4)()
+        self.levels[ -1 ].bind()
+        glReadPixels( 0, 0, 1, 1, GL_RGBA, GL_FLOAT, data )
+        self.levels[ -1 ].unbind()
+        return list( data )
+
+
+class BoardStatistics( object ):
+    # population, births, deaths and the bounding box
+    # reduced on the GPU so only two texels are read back
+    # counts are exact up to 2^24 cells, the float mantissa
+
+    fields = [
+        'generation',
+        'population',
+        'births',
+        'deaths',
+        'left',
+        'bottom',
+        'right',
+        'top',
+        ]
+
+    def __init__( self, dimensions, log_filename = None, max_history = 100000 ):
+        super( BoardStatistics, self ).__init__()
+
+        self.dimensions = dimensions
+        self.counts = Reduction( dimensions, count_board, sum_values )
+        self.bounds = Reduction( dimensions, bounds_board, max_values )
+
+        # the latest result and a time series of them
+        self.latest = None
+        self.history = []
+        self.max_history = max_history
+
+        # optionally stream every result to a CSV file
+        self.log_file = None
+        self.log = None
+        if log_filename:
+            self.log_file = open( log_filename, 'w' )
+            self.log = csv.DictWriter( self.log_file, self.fields )
+            self.log.writeheader()
+
+    def close( self ):
+        # free the reduction textures and close the log
+        self.counts.delete()
+        self.bounds.delete()
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+            self.log = None
+
+    def reset( self ):
+        # the board was edited, so the births and deaths
+        # of the last step no longer describe it
+        self.latest = None
+
+    def update( self, generation, board, previous ):
+        # 'board' and 'previous' are the textures of
+        # this generation and the one before it
+        glPushAttrib( GL_VIEWPORT_BIT | GL_SCISSOR_BIT | GL_ENABLE_BIT )
+        glDisable( GL_SCISSOR_TEST )
+        glDisable( GL_DEPTH_TEST )
+        glDisable( GL_BLEND )
+
+        self.counts.render( board, previous, self.dimensions )
+        self.bounds.render( board, previous, self.dimensions )
+
+        glPopAttrib()
+
+        population, births, deaths, unused = [ int( round( value ) ) for value in self.counts.read() ]
+        right, top, left, bottom = [ int( round( value ) ) for value in self.bounds.read() ]
+
+        result = {
+            'generation': generation,
+            'population': population,
+            'births': births,
+            'deaths': deaths,
+            'left': self.dimensions[ 0 ] - left,
+            'bottom': self.dimensions[ 1 ] - bottom,
+            'right': right,
+            'top': top,
+            }
+        if not population:
+            result.update( left = None, bottom = None, right = None, top = None )
+
+        self.latest = result
+        self.history.append( result )
+        if len( self.history ) > self.max_history:
+            del self.history[ :len( self.history ) - self.max_history ]
+        if self.log:
+            self.log.writerow( result )
+        return result
+
+    @property
+    def bounding_box( self ):
+        # ( left, bottom, right, top ) of the live cells
+        # right and top are exclusive
+        if not self.latest or self.latest[ 'left' ] is None:
+            return None
+        return tuple( self.latest[ key ] for key in ( 'left', 'bottom', 'right', 'top' ) )
@@ -0,0 +1,405 @@
+import math
+
+from pyglet.gl import *
+import pyglet
+
+from pygly.shader import Shader
+
+from fbo_texture import FBO_Texture
+import quad_buffer
+from quad_buffer import QuadBuffer
+import shader_program
+from shader_program import ShaderProgram
+
+
+vertex_shader = """
+// every quad here is already in clip space, so this is identity
+uniform mat4 transform;
+
+void main()
+{
+    gl_Position    = transform * gl_Vertex;
+    gl_FrontColor  = gl_Color;
+    gl_TexCoord[0] = gl_MultiTexCoord0;
+}
+"""
+
+# reduces a 2x2 block of the level below into one texel
+# red holds the maximum, green the average density
+reduce_shader = """
+#version 120
+
+// inputs
+uniform sampler2D source;
+uniform vec2 source_size;
+
+vec2 density( vec2 texel )
+{
+    // stay inside odd sized levels
+    vec2 coord = min( texel, source_size - 0.5 ) / source_size;
+    return %s;
+}
+
+void main()
+{
+    vec2 base = floor( gl_FragCoord.xy ) * 2.0 + 0.5;
+
+    vec2 a = density( base );
+    vec2 b = density( base + vec2( 1.0, 0.0 ) );
+    vec2 c = density( base + vec2( 0.0, 1.0 ) );
+    vec2 d = density( base + vec2( 1.0, 1.0 ) );
+
+    float maximum = max( max( a.r, b.r ), max( c.r, d.r ) );
+    float average = ( a.g + b.g + c.g + d.g ) * 0.25;
+    gl_FragColor = vec4( maximum, average, 0.0, 1.0 );
+}
+"""
+
+# the board only stores cells, live cells are 1.0
+board_density = 'vec2( step( 0.999, texture2D( source, coord ).r ) )'
+level_density = 'texture2D( source, coord ).rg'
+
+density_fragment_shader = """
+#version 120
+
+// inputs
+uniform sampler2D tex0;
+uniform vec4 live_colour;
+uniform vec4 dead_colour;
+uniform float use_maximum;
+
+void main()
+{
+    vec2 density = texture2D( tex0, gl_TexCoord[0].xy ).rg;
+
+    // the square root keeps sparse areas visible
+    float value = mix( sqrt( density.g ), density.r, use_maximum );
+    gl_FragColor = mix( dead_colour, live_colour, value );
+}
+"""
+
+
+def level_dimensions( dimensions, level ):
+    scale = 1 << level
+    return (
+        max( ( dimensions[ 0 ] + scale - 1 ) // scale, 1 ),
+        max( ( dimensions[ 1 ] + scale - 1 ) // scale, 1 )
+        )
+
+
+class DensityPyramid( object ):
+    # level k holds the density of 2^k x 2^k blocks of cells
+    # level 0 is the board itself
+
+    def __init__( self, dimensions ):
+        super( DensityPyramid, self ).__init__()
+
+        self.dimensions = dimensions
+        self.board_shader = ShaderProgram( Shader(
+            vert = vertex_shader,
+            frag = reduce_shader % board_density
+            ) )
+        self.level_shader = ShaderProgram( Shader(
+            vert = vertex_shader,
+            frag = reduce_shader % level_density
+            ) )
+
+        # a fullscreen quad, uploaded once
+        self.quad = QuadBuffer()
+
+        # created as they are first needed
+        self.levels = [ None ]
+        self.max_level = int( math.ceil( math.log( max( dimensions ), 2 ) ) )
+
+    def level( self, level ):
+        while len( self.levels ) <= level:
+            self.levels.append(
+                FBO_Texture(
+                    level_dimensions( self.dimensions, len( self.levels ) ),
+                    internal_format = GL_RGBA8
+                    )
+                )
+        return self.levels[ level ]
+
+    def delete( self ):
+        # level 0 is the board, which isn't ours
+        for level in self.levels[ 1: ]:
+            level.delete()
+        self.levels = [ None ]
+        self.quad.delete()
+
+    def visible_texels( self, region, level ):
+        # the texels of a level covering a region of cells
+        # None if the region wraps or covers the whole level
+        scale = float( 1 << level )
+        width, height = level_dimensions( self.dimensions, level )
+        left = int( math.floor( region[ 0 ] / scale ) )
+        bottom = int( math.floor( region[ 1 ] / scale ) )
+        right = int( math.ceil( region[ 2 ] / scale ) )
+        top = int( math.ceil( region[ 3 ] / scale ) )
+        if left < 0 or bottom < 0 or right > width or top > height:
+            return None
+        return (left, bottom, right - left, top - bottom)
+
+    def update( self, board_texture, level, region ):
+        # reduce the board up to 'level'
+        # only the texels under 'region' are computed
+        glPushAttrib( GL_VIEWPORT_BIT | GL_SCISSOR_BIT | GL_ENABLE_BIT )
+        glDisable( GL_DEPTH_TEST )
+        glDisable( GL_BLEND )
+
+        glActiveTexture( GL_TEXTURE0 )
+        self.quad.bind()
+
+        source = board_texture
+        shader = self.board_shader
+        source_size = self.dimensions
+        for index in range( 1, level + 1 ):
+            target = self.level( index )
+            target.bind()
+            glViewport( 0, 0, target.width, target.height )
+
+            texels = self.visible_texels( region, index )
+            if texels:
+                glEnable( GL_SCISSOR_TEST )
+                glScissor( *texels )
+            else:
+                glDisable( GL_SCISSOR_TEST )
+
+            shader.bind()
+            shader.uniform_matrixf( 'transform', quad_buffer.identity )
+            shader.uniformi( 'source', 0 )
+            shader.uniformf( 'source_size', float( source_size[ 0 ] ), float( source_size[ 1 ] ) )
+
+            glBindTexture( source.target, source.id )
+            shader_program.nearest( source )
+
+            self.quad.draw()
+
+            glBindTexture( source.target, 0 )
+            shader.unbind()
+            target.unbind()
+
+            source = target.texture
+            shader = self.level_shader
+            source_size = target.dimensions
+
+        self.quad.unbind()
+        glPopAttrib()
+
+
+class BoardViewer( object ):
+    # pans and zooms around a board
+    # only the visible region of the board is sampled
+    # zoomed out views show the density pyramid
+
+    # screen pixels per second when panning with the keys
+    pan_speed = 600.0
+
+    # zoom factor per second when zooming with the keys
+    zoom_speed = 4.0
+
+    min_zoom = 1.0 / 65536.0
+    max_zoom = 64.0
+
+    pan_keys = {
+        pyglet.window.key.LEFT: (-1.0, 0.0),
+        pyglet.window.key.RIGHT: (1.0, 0.0),
+        pyglet.window.key.DOWN: (0.0, -1.0),
+        pyglet.window.key.UP: (0.0, 1.0),
+        }
+
+    zoom_keys = {
+        pyglet.window.key.EQUAL: 1.0,
+        pyglet.window.key.PLUS: 1.0,
+        pyglet.window.key.MINUS: -1.0,
+        }
+
+    def __init__( self, dimensions, pyramid = True ):
+        super( BoardViewer, self ).__init__()
+
+        # the board size in cells
+        self.dimensions = dimensions
+
+        # the cell at the centre of the screen
+        # and the screen pixels per cell
+        # we fit the board to the viewport once we know its size
+        self.centre = [ dimensions[ 0 ] / 2.0, dimensions[ 1 ] / 2.0 ]
+        self.zoom = 1.0
+        self.fitted = False
+
+        # show the maximum rather than the average density
+        self.use_maximum = False
+
+        # the pyramid needs one byte per cell
+        self.pyramid = DensityPyramid( dimensions ) if pyramid else None
+        self.density_shader = ShaderProgram( Shader(
+            vert = vertex_shader,
+            frag = density_fragment_shader
+            ) )
+        self.built = None
+
+        # one quad over the viewport, its texcoords
+        # follow the visible region as we pan and zoom
+        self.quad = QuadBuffer( usage = GL_DYNAMIC_DRAW )
+
+        # updated each time we render
+        self.viewport_size = (1, 1)
+
+        # keys currently held down
+        self.held = set()
+
+    def reset( self ):
+        # fit the board to the screen
+        self.centre = [ self.dimensions[ 0 ] / 2.0, self.dimensions[ 1 ] / 2.0 ]
+        self.zoom = min(
+            self.viewport_size[ 0 ] / float( self.dimensions[ 0 ] ),
+            self.viewport_size[ 1 ] / float( self.dimensions[ 1 ] )
+            )
+        self.zoom = min( max( self.zoom, self.min_zoom ), self.max_zoom )
+
+    def delete( self ):
+        if self.pyramid:
+            self.pyramid.delete()
+        self.quad.delete()
+        self.built = None
+
+    def board_changed( self ):
+        # the cells were written without a step, so the
+        # generation no longer identifies the pyramid's contents
+        self.built = None
+
+    def pan( self, dx, dy ):
+        # move the board by screen pixels
+        self.centre[ 0 ] -= dx / self.zoom
+        self.centre[ 1 ] -= dy / self.zoom
+
+        # the board wraps, so keep the centre on it
+        self.centre[ 0 ] %= self.dimensions[ 0 ]
+        self.centre[ 1 ] %= self.dimensions[ 1 ]
+
+    def zoom_at( self, factor, x = None, y = None ):
+        # zoom about a point in viewport pixels
+        # keeping the cell under it still
+        half_width = self.viewport_size[ 0 ] / 2.0
+        half_height = self.viewport_size[ 1 ] / 2.0
+        if x is None:
+            x, y = half_width, half_height
+
+        zoom = min( max( self.zoom * factor, self.min_zoom ), self.max_zoom )
+        offset = ( x - half_width, y - half_height )
+        self.centre[ 0 ] += offset[ 0 ] / self.zoom - offset[ 0 ] / zoom
+        self.centre[ 1 ] += offset[ 1 ] / self.zoom - offset[ 1 ] / zoom
+        self.zoom = zoom
+
+    def on_key_event( self, event, key ):
+        if event == 'down':
+            self.held.add( key )
+            if key == pyglet.window.key.M:
+                self.use_maximum = not self.use_maximum
+            elif key == pyglet.window.key.HOME:
+                self.reset()
+        elif event == 'up':
+            self.held.discard( key )
+
+    def update( self, dt ):
+        # apply any held keys
+        for key in self.held:
+            if key in self.pan_keys:
+                dx, dy = self.pan_keys[ key ]
+                self.pan( -dx * self.pan_speed * dt, -dy * self.pan_speed * dt )
+            if key in self.zoom_keys:
+                self.zoom_at( self.zoom_speed ** ( self.zoom_keys[ key ] * dt ) )
+
+    def cell_at( self, x, y ):
+        # the cell under a point in viewport pixels
+        # this isn't wrapped onto the board, so lines drawn
+        # across an edge stay continuous
+        return (
+            int( math.floor( self.centre[ 0 ] + ( x - self.viewport_size[ 0 ] / 2.0 ) / self.zoom ) ),
+            int( math.floor( self.centre[ 1 ] + ( y - self.viewport_size[ 1 ] / 2.0 ) / self.zoom ) )
+            )
+
+    @property
+    def region( self ):
+        # the cells covered by the viewport
+        # this may extend past the board, which wraps
+        half_width = self.viewport_size[ 0 ] / ( 2.0 * self.zoom )
+        half_height = self.viewport_size[ 1 ] / ( 2.0 * self.zoom )
+        return (
+            self.centre[ 0 ] - half_width,
+            self.centre[ 1 ] - half_height,
+            self.centre[ 0 ] + half_width,
+            self.centre[ 1 ] + half_height
+            )
+
+    @property
+    def level( self ):
+        # the coarsest level with no more than a texel per pixel
+        if not self.pyramid or self.zoom >= 1.0:
+            return 0
+        level = int( math.ceil( math.log( 1.0 / self.zoom, 2 ) - 1e-6 ) )
+        return min( level, self.pyramid.max_level )
+
+    def render( self, gol ):
+        # draw the visible region of a GOL_Renderable
+        # over the current viewport
+        viewport = (GLint * 4)()
+        glGetIntegerv( GL_VIEWPORT, viewport )
+        self.viewport_size = (max( viewport[ 2 ], 1 ), max( viewport[ 3 ], 1 ))
+        if not self.fitted:
+            self.reset()
+            self.fitted = True
+
+        region = self.region
+        level = self.level
+
+        if level > 0:
+            # only rebuild when the board or the view changed
+            state = (gol.generation, level, region)
+            if self.built != state:
+                self.pyramid.update( gol.texture.texture, level, region )
+                self.built = state
+
+            texture = self.pyramid.level( level ).texture
+            shader = self.density_shader
+            shader.bind()
+            shader.uniform_matrixf( 'transform', quad_buffer.identity )
+            shader.uniformf( 'use_maximum', 1.0 if self.use_maximum else 0.0 )
+
+            # levels are padded up to whole texels
+            scale = 1 << level
+            width, height = level_dimensions( self.dimensions, level )
+            size = (float( width * scale ), float( height * scale ))
+        else:
+            texture = gol.texture.texture
+            shader = gol.display_shader
+            shader.bind()
+            shader.uniform_matrixf( 'transform', quad_buffer.identity )
+            size = (float( self.dimensions[ 0 ] ), float( self.dimensions[ 1 ] ))
+
+        shader.uniformi( 'tex0', 0 )
+        shader.uniformf( 'live_colour', *gol.live_colour )
+        shader.uniformf( 'dead_colour', *gol.dead_colour )
+
+        glPushAttrib( GL_ENABLE_BIT )
+        glDisable( GL_DEPTH_TEST )
+
+        glActiveTexture( GL_TEXTURE0 )
+        glBindTexture( texture.target, texture.id )
+
+        # sample past the edges the way the simulation does
+        # so dead boards keep their border
+        shader_program.nearest( texture, gol.texture.wrap_mode )
+
+        # one quad over the viewport, textured with the visible region
+        self.quad.set_texcoords( *[
+            value / size[ index % 2 ]
+            for index, value in enumerate( region )
+            ] )
+        self.quad.render()
+
+        glBindTexture( texture.target, 0 )
+        glPopAttrib()
+
+        shader.unbind()
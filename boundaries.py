@@ -0,0 +1,96 @@
+import numpy
+
+
+# what lies past the edges of a fixed size board
+#   torus: both pairs of edges wrap around
+#   dead: everything past the edge is a dead cell
+#   klein: left and right wrap around, crossing the top or
+#       bottom edge also mirrors x, so x becomes width - 1 - x
+torus = 'torus'
+dead = 'dead'
+klein = 'klein'
+
+modes = ( torus, dead, klein )
+
+
+def check( mode ):
+    if mode not in modes:
+        raise ValueError(
+            "Unknown boundary %s, expected one of %s" % (mode, ', '.join( modes ))
+            )
+    return mode
+
+
+def add_rows( src, out, offset, mode = torus ):
+    # add the rows 'offset' away to each row
+    # out[ y ] += src[ y - offset ], with the rows that fall
+    # off the board handled by the boundary
+    # the wrapped rows are added as slices, the board is never padded
+    if offset > 0:
+        out[ offset: ] += src[ :-offset ]
+        wrapped = out[ :offset ], src[ -offset: ]
+    else:
+        out[ :offset ] += src[ -offset: ]
+        wrapped = out[ offset: ], src[ :-offset ]
+
+    if mode == torus:
+        wrapped[ 0 ][ ... ] += wrapped[ 1 ]
+    elif mode == klein:
+        wrapped[ 0 ][ ... ] += wrapped[ 1 ][ :, ::-1 ]
+
+
+def add_columns( src, out, offset, mode = torus ):
+    # add the columns 'offset' away to each column
+    # the Klein bottle wraps left and right like the torus
+    if offset > 0:
+        out[ :, offset: ] += src[ :, :-offset ]
+        wrapped = out[ :, :offset ], src[ :, -offset: ]
+    else:
+        out[ :, :offset ] += src[ :, -offset: ]
+        wrapped = out[ :, offset: ], src[ :, :-offset ]
+
+    if mode != dead:
+        wrapped[ 0 ][ ... ] += wrapped[ 1 ]
+
+
+def halo_row( board, y, mode = torus ):
+    # the row y as seen from inside the board
+    # where y may be -1 or the board's height
+    height = board.shape[ 0 ]
+    if 0 <= y < height:
+        return board[ y ]
+    if mode == torus:
+        return board[ y % height ]
+    if mode == klein:
+        return board[ y % height, ::-1 ]
+    return numpy.zeros_like( board[ 0 ] )
+
+
+# the GLSL helper mapping a texture coordinate past the edge of
+# the board back onto it, combined with the sampler's wrap mode
+# these are arithmetic only, so no fetch ever branches
+glsl_wrap = {
+    torus: """
+vec2 wrap( vec2 coord )
+{
+    // GL_REPEAT wraps both axes
+    return coord;
+}
+""",
+    dead: """
+vec2 wrap( vec2 coord )
+{
+    // GL_CLAMP_TO_BORDER returns dead cells past the edge
+    return coord;
+}
+""",
+    klein: """
+vec2 wrap( vec2 coord )
+{
+    // mirror x for every odd number of vertical wraps
+    // then let GL_REPEAT wrap both axes
+    float flip = mod( floor( coord.y ), 2.0 );
+    return vec2( mix( coord.x, 1.0 - coord.x, flip ), coord.y );
+}
+""",
+    }
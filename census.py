@@ -0,0 +1,264 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+
+import numpy
+
+import board_seeder
+import boundaries
+import rules
+from cycle_detector import CycleDetector
+
+
+fields = [
+    'width',
+    'height',
+    'rule',
+    'boundary',
+    'density',
+    'seed',
+    'engine',
+    'generations',
+    'population',
+    'stabilised',
+    'period',
+    'seconds',
+    'error',
+    ]
+
+
+def tile_size( dimensions, largest = 64 ):
+    # the biggest power of 2 tile that divides the board
+    size = largest
+    while dimensions[ 0 ] % size or dimensions[ 1 ] % size:
+        size //= 2
+    return size
+
+
+def live_cells( board ):
+    # only fully live cells count, as in BoardStatistics
+    # a Generations rule's dying cells are left out
+    return int( numpy.count_nonzero( board == 1 ) )
+
+
+def create_cpu_engine( board, rule, boundary ):
+    # the bit-packed engine is our fastest, but only runs B3/S23
+    import bitpacked_engine
+    import rule_engine
+    if rules.parse_rule( rule ).name == 'B3/S23' and board.shape[ 1 ] % bitpacked_engine.word_size == 0:
+        return bitpacked_engine.BitPackedEngine( board, boundary )
+    return rule_engine.RuleEngine( board, rule, boundary )
+
+
+# each GPU worker keeps its own context for its lifetime
+context = None
+
+
+def init_worker( engine ):
+    global context
+    if engine == 'gpu':
+        import headless
+        headless.configure()
+        context = headless.create_context()
+
+
+def run_cpu( task ):
+    dimensions = (task[ 'width' ], task[ 'height' ])
+    board = board_seeder.seed_board( dimensions, task[ 'density' ], task[ 'seed' ] )
+    engine = create_cpu_engine( board, task[ 'rule' ], task[ 'boundary' ] )
+
+    # hash every generation, so the period is exact
+    detector = CycleDetector( dimensions, tile_size( dimensions ), task[ 'max_history' ] )
+    detector.run( engine, task[ 'max_generations' ] )
+    return engine.generation, live_cells( engine.board ), detector
+
+
+def create_gol( task ):
+    from gol_renderable import GOL_Renderable
+    return GOL_Renderable(
+        (task[ 'width' ], task[ 'height' ]),
+        density = task[ 'density' ],
+        seed = task[ 'seed' ],
+        rule = task[ 'rule' ],
+        boundary = task[ 'boundary' ]
+        )
+
+
+def refine_cycle( task, start, period ):
+    # replay the soup a generation at a time from the last
+    # check before the cycle, which gives its exact start and period
+    # 'start' and 'period' are from checking every 'check_every'
+    dimensions = (task[ 'width' ], task[ 'height' ])
+    first = max( start - task[ 'check_every' ], 0 )
+    generations = task[ 'check_every' ] + period
+
+    detector = CycleDetector( dimensions, tile_size( dimensions ), generations + 1 )
+    gol = create_gol( task )
+    try:
+        if first:
+            gol.step( first )
+        detector.update( gol.generation, gol.read_board() )
+        for generation in range( generations ):
+            gol.step()
+            if detector.update( gol.generation, gol.read_board() ) is not None:
+                break
+    finally:
+        gol.delete()
+    return detector
+
+
+def run_gpu( task ):
+    dimensions = (task[ 'width' ], task[ 'height' ])
+
+    # read the board back every 'check_every' generations
+    # a repeat found this way is a multiple of the true period
+    # and is refined afterwards
+    detector = CycleDetector( dimensions, tile_size( dimensions ), task[ 'max_history' ] )
+    gol = create_gol( task )
+    try:
+        board = gol.read_board()
+        detector.update( gol.generation, board )
+        while gol.generation < task[ 'max_generations' ]:
+            gol.step( min( task[ 'check_every' ], task[ 'max_generations' ] - gol.generation ) )
+            board = gol.read_board()
+            if detector.update( gol.generation, board ) is not None:
+                break
+        generation, population = gol.generation, live_cells( board )
+    finally:
+        # each worker runs many tasks, so free the board's
+        # textures now rather than leaving them to the collector
+        gol.delete()
+
+    if detector.period is not None and task[ 'check_every' ] > 1:
+        detector = refine_cycle( task, detector.cycle_start, detector.period )
+    return generation, population, detector
+
+
+def run_task( task ):
+    # run one soup to stabilisation or max_generations
+    result = dict( ( key, task.get( key ) ) for key in fields )
+    start = time.time()
+    try:
+        runner = run_gpu if task[ 'engine' ] == 'gpu' else run_cpu
+        generations, population, detector = runner( task )
+        result.update(
+            generations = generations,
+            population = population,
+            stabilised = detector.cycle_start,
+            period = detector.period
+            )
+    except Exception as error:
+        result[ 'error' ] = '%s: %s' % (type( error ).__name__, error)
+    result[ 'seconds' ] = time.time() - start
+    return result
+
+
+def create_tasks( sizes, densities, rule_names, seeds, boundary, engine, max_generations, check_every, max_history ):
+    # every combination of the parameters
+    for size, density, rule, seed in itertools.product( sizes, densities, rule_names, seeds ):
+        yield {
+            'width': size[ 0 ],
+            'height': size[ 1 ],
+            'density': density,
+            'rule': rule,
+            'seed': seed,
+            'boundary': boundary,
+            'engine': engine,
+            'max_generations': max_generations,
+            'check_every': check_every,
+            'max_history': max_history,
+            }
+
+
+class ResultWriter( object ):
+    # write results as JSON lines or CSV, flushing each one
+    # so a long census can be watched and survives a crash
+
+    def __init__( self, stream, format ):
+        super( ResultWriter, self ).__init__()
+
+        self.stream = stream
+        self.writer = None
+        if format == 'csv':
+            self.writer = csv.DictWriter( stream, fields )
+            self.writer.writeheader()
+
+    def write( self, result ):
+        if self.writer:
+            self.writer.writerow( result )
+        else:
+            self.stream.write( json.dumps( result, sort_keys = True ) + '\n' )
+        self.stream.flush()
+
+
+def run( tasks, workers = None, engine = 'cpu', callback = None ):
+    # results are yielded in the order they finish
+    pool = multiprocessing.Pool( workers, initializer = init_worker, initargs = (engine,) )
+    try:
+        for result in pool.imap_unordered( run_task, tasks ):
+            if callback:
+                callback( result )
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def parse_size( text ):
+    # '256' or '256x128'
+    values = [ int( value ) for value in text.lower().split( 'x' ) ]
+    return (values[ 0 ], values[ -1 ])
+
+
+def main( argv = None ):
+    parser = argparse.ArgumentParser( description = "Run a census of random soups across a process pool" )
+    parser.add_argument( '--sizes', nargs = '+', type = parse_size, default = [ (256, 256) ], help = "eg. 256 or 512x256" )
+    parser.add_argument( '--densities', nargs = '+', type = float, default = [ 0.5 ] )
+    parser.add_argument( '--rules', nargs = '+', default = [ 'B3/S23' ] )
+    parser.add_argument( '--seeds', type = int, default = 100, help = "soups per combination" )
+    parser.add_argument( '--first-seed', type = int, default = 0 )
+    parser.add_argument( '--boundary', default = boundaries.torus, choices = boundaries.modes )
+    parser.add_argument( '--engine', default = 'cpu', choices = [ 'cpu', 'gpu' ] )
+    parser.add_argument( '--workers', type = int, help = "defaults to one per core" )
+    parser.add_argument( '--max-generations', type = int, default = 10000 )
+    parser.add_argument( '--check-every', type = int, default = 30, help = "generations between GPU readbacks" )
+    parser.add_argument( '--max-history', type = int, default = 1024, help = "board hashes kept for cycle detection" )
+    parser.add_argument( '--output', help = "a .jsonl or .csv file, defaults to JSON lines on stdout" )
+    args = parser.parse_args( argv )
+
+    for rule in args.rules:
+        rules.parse_rule( rule )
+
+    tasks = create_tasks(
+        args.sizes,
+        args.densities,
+        args.rules,
+        range( args.first_seed, args.first_seed + args.seeds ),
+        args.boundary,
+        args.engine,
+        args.max_generations,
+        args.check_every,
+        args.max_history
+        )
+
+    stream = open( args.output, 'w' ) if args.output else sys.stdout
+    format = 'csv' if args.output and args.output.endswith( '.csv' ) else 'jsonl'
+    writer = ResultWriter( stream, format )
+
+    start = time.time()
+    count = 0
+    for result in run( tasks, args.workers, args.engine, writer.write ):
+        count += 1
+    sys.stderr.write( "%d runs in %.1fs\n" % (count, time.time() - start) )
+
+    if args.output:
+        stream.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit( main() )
@@ -0,0 +1,228 @@
+import os
+
+import numpy
+
+import bitpacked_engine
+import rule_engine
+import rules
+
+
+magic = b'PYGOLCKP'
+version = 1
+
+# the body starts on a page boundary so it can be mapped directly
+header_size = 4096
+
+header_dtype = numpy.dtype( [
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('header_size', '<u4'),
+    ('width', '<u8'),
+    ('height', '<u8'),
+    ('generation', '<u8'),
+    ('row_words', '<u8'),
+    ('rule', 'S64'),
+    ] )
+
+# rows packed or unpacked at a time
+band_size = 1024
+
+
+def row_words( width, states = 2 ):
+    # rows are padded to a whole number of 64 bit words
+    # two state rules pack a cell per bit, Generations rules
+    # need a byte per cell for their dying states
+    cells = bitpacked_engine.word_size if states == 2 else 8
+    return ( width + cells - 1 ) // cells
+
+
+def rule_states( rule ):
+    # files written before the rule was stored have none
+    return rules.parse_rule( rule ).states if rule else 2
+
+
+def pack_rows( rows, words ):
+    # pack a band of 0 / 1 rows into little endian words
+    padded = numpy.zeros(
+        (rows.shape[ 0 ], words.shape[ 1 ] * bitpacked_engine.word_size),
+        dtype = numpy.uint8
+        )
+    padded[ :, :rows.shape[ 1 ] ] = rows
+    words[ ... ] = bitpacked_engine.pack_board( padded )
+
+
+class Checkpoint( object ):
+
+    def __init__( self, filename, mode = 'r' ):
+        super( Checkpoint, self ).__init__()
+
+        self.filename = filename
+
+        header = numpy.fromfile( filename, dtype = header_dtype, count = 1 )
+        if not len( header ) or header[ 'magic' ][ 0 ] != magic:
+            raise ValueError( "Not a checkpoint file: %s" % filename )
+        if header[ 'version' ][ 0 ] != version:
+            raise ValueError( "Unsupported checkpoint version: %d" % header[ 'version' ][ 0 ] )
+
+        header = header[ 0 ]
+        self.width = int( header[ 'width' ] )
+        self.height = int( header[ 'height' ] )
+        self.generation = int( header[ 'generation' ] )
+        self.rule = header[ 'rule' ].decode( 'ascii' )
+        self.states = rule_states( self.rule )
+
+        # map the body, pages are only read as they are touched
+        self.words = numpy.memmap(
+            filename,
+            dtype = '<u8',
+            mode = mode,
+            offset = int( header[ 'header_size' ] ),
+            shape = (self.height, int( header[ 'row_words' ] ))
+            )
+
+    @property
+    def packed( self ):
+        return self.states == 2
+
+    def cells( self, top, bottom ):
+        # a byte per cell view of a band of rows
+        return self.words[ top:bottom ].view( numpy.uint8 )[ :, :self.width ]
+
+    @classmethod
+    def create( cls, filename, dimensions, generation = 0, rule = 'B3/S23' ):
+        width, height = dimensions
+
+        header = numpy.zeros( 1, dtype = header_dtype )
+        header[ 'magic' ] = magic
+        header[ 'version' ] = version
+        header[ 'header_size' ] = header_size
+        header[ 'width' ] = width
+        header[ 'height' ] = height
+        header[ 'generation' ] = generation
+        header[ 'row_words' ] = row_words( width, rule_states( rule ) )
+        header[ 'rule' ] = rule.encode( 'ascii' )
+
+        # write the header and size the file
+        # the body is sparse until it is written
+        with open( filename, 'wb' ) as stream:
+            stream.write( header.tobytes() )
+            stream.truncate( header_size + height * int( header[ 'row_words' ][ 0 ] ) * 8 )
+
+        return cls( filename, mode = 'r+' )
+
+    def read_rows( self, top, bottom ):
+        # unpack a band of rows into cell states
+        if not self.packed:
+            return numpy.array( self.cells( top, bottom ) )
+        return bitpacked_engine.unpack_board( self.words[ top:bottom ] )[ :, :self.width ]
+
+    def write_band( self, rows, top ):
+        if self.packed:
+            pack_rows( rows, self.words[ top:top + len( rows ) ] )
+        else:
+            self.cells( top, top + len( rows ) )[ ... ] = rows
+
+    def iter_bands( self ):
+        for top in range( 0, self.height, band_size ):
+            bottom = min( top + band_size, self.height )
+            yield top, self.read_rows( top, bottom )
+
+    def write_rows( self, rows ):
+        # write an iterable of rows, a band at a time
+        band = numpy.empty( (band_size, self.width), dtype = numpy.uint8 )
+        count = 0
+        top = 0
+        for row in rows:
+            band[ count ] = row
+            count += 1
+            if count == band_size:
+                self.write_band( band, top )
+                top += count
+                count = 0
+        if count:
+            self.write_band( band[ :count ], top )
+
+    def flush( self ):
+        self.words.flush()
+
+    @property
+    def board( self ):
+        # load the entire board into memory
+        return self.read_rows( 0, self.height )
+
+    @property
+    def dimensions( self ):
+        return (self.width, self.height)
+
+
+def save_checkpoint( filename, engine, rule = 'B3/S23' ):
+    # write to a temporary file first so a crash
+    # never leaves us with a half written checkpoint
+    temporary = filename + '.tmp'
+    checkpoint = Checkpoint.create( temporary, engine.dimensions, engine.generation, rule )
+
+    if hasattr( engine, 'words' ) and checkpoint.packed:
+        # bit-packed engines already use our layout
+        checkpoint.words[ ... ] = engine.words
+    elif hasattr( engine, 'read_rows' ):
+        # stream the board, eg. from a GPU texture
+        checkpoint.write_rows( engine.read_rows() )
+    else:
+        checkpoint.write_rows( engine.board )
+
+    checkpoint.flush()
+    del checkpoint
+    os.rename( temporary, filename )
+
+
+def load_checkpoint( filename ):
+    return Checkpoint( filename )
+
+
+def resume( filename ):
+    # continue a run on the CPU with the checkpoint's rule
+    # B3/S23 on whole words steps straight from the mapped words
+    checkpoint = Checkpoint( filename )
+    rule = checkpoint.rule or 'B3/S23'
+    if rules.parse_rule( rule ).name == 'B3/S23' and checkpoint.width % bitpacked_engine.word_size == 0:
+        return bitpacked_engine.BitPackedEngine.from_words(
+            checkpoint.words,
+            checkpoint.width,
+            checkpoint.generation
+            )
+
+    engine = rule_engine.RuleEngine( checkpoint.board, rule )
+    engine.generation = checkpoint.generation
+    return engine
+
+
+class PeriodicCheckpoint( object ):
+
+    def __init__( self, filename, every, rule = 'B3/S23' ):
+        super( PeriodicCheckpoint, self ).__init__()
+
+        self.filename = filename
+        self.every = every
+        self.rule = rule
+        self.last_generation = None
+
+    def update( self, engine ):
+        # save if we've moved 'every' generations since the last save
+        if self.last_generation is None:
+            self.last_generation = engine.generation
+        if engine.generation - self.last_generation >= self.every:
+            self.save( engine )
+
+    def save( self, engine ):
+        save_checkpoint( self.filename, engine, self.rule )
+        self.last_generation = engine.generation
+
+    def run( self, engine, generations ):
+        # step an engine, saving every 'every' generations
+        if self.last_generation is None:
+            self.last_generation = engine.generation
+        while generations > 0:
+            count = min( generations, self.every )
+            engine.step( count )
+            generations -= count
+            self.update( engine )
@@ -18,6 +18,8 @@ from pygly.input.mouse import Mouse
 
 import pyrr
 
+from profiling import profiler, ProfilerDisplay
+
 # over-ride the default pyglet idle loop
 import pygly.monkey_patch
 pygly.monkey_patch.patch_idle_loop()
@@ -94,6 +96,9 @@ class BaseApplication( object ):
         # create an fps display
         self.fps_display = pyglet.clock.ClockDisplay()
 
+        # per stage timings, shown once profiling is enabled
+        self.profiler_display = ProfilerDisplay( profiler, self.window )
+
     def setup_scene_root( self ):
         # create a list of renderables
         self.renderables = []
@@ -124,18 +129,25 @@ class BaseApplication( object ):
         pyglet.app.run()
     
     def step( self, dt ):
-        # update our mouse
-        self.update_mouse( dt )
-
-        # update the scene here
-        self.update_scene( dt )
-
-        # manually dispatch the on_draw event
-        # as we patched it out of the idle loop
-        self.window.dispatch_event( 'on_draw' )
-        
-        # display the frame buffer
-        self.window.flip()
+        # collect GPU timings from earlier frames
+        profiler.frame()
+
+        with profiler.section( 'step' ):
+            # update our mouse
+            self.update_mouse( dt )
+
+            # update the scene here
+            with profiler.section( 'update_scene' ):
+                self.update_scene( dt )
+
+            # manually dispatch the on_draw event
+            # as we patched it out of the idle loop
+            self.window.dispatch_event( 'on_draw' )
+            
+            # display the frame buffer
+            # this is where we wait for vsync
+            with profiler.section( 'flip' ):
+                self.window.flip()
 
     def update_mouse( self, dt ):
         # USE MOUSE VALUES HERE
@@ -154,7 +166,8 @@ class BaseApplication( object ):
 
     def on_draw( self ):
         # render the scene
-        self.render()
+        with profiler.section( 'render' ):
+            self.render()
 
         # render the fps
         self.fps_display.draw()
@@ -225,3 +238,6 @@ class BaseApplication( object ):
         # render the fps
         self.fps_display.draw()
 
+        if profiler.enabled:
+            self.profiler_display.draw()
+
@@ -0,0 +1,171 @@
+import collections
+
+import numpy
+
+
+def mix( values ):
+    # the splitmix64 finaliser
+    # spreads every input bit over the whole word
+    values = values ^ ( values >> numpy.uint64( 30 ) )
+    values = values * numpy.uint64( 0xbf58476d1ce4e5b9 )
+    values = values ^ ( values >> numpy.uint64( 27 ) )
+    values = values * numpy.uint64( 0x94d049bb133111eb )
+    return values ^ ( values >> numpy.uint64( 31 ) )
+
+
+class TileHasher( object ):
+    # a Zobrist style hash of the board, kept per tile
+    # a tile's hash is the XOR of a random key for each of its
+    # cells that isn't dead, mixed with a random key for the tile
+    # each state has its own keys, so a dying cell doesn't
+    # hash the same as a live one
+    # the board's hash is the XOR of its tiles, so only the
+    # tiles that changed need hashing again
+
+    def __init__( self, dimensions, tile_size = 64, seed = 0 ):
+        super( TileHasher, self ).__init__()
+
+        width, height = dimensions
+        if width % tile_size or height % tile_size:
+            raise ValueError(
+                "Board dimensions must be a multiple of %d" % tile_size
+                )
+
+        self.tile_size = tile_size
+        self.tiles = (height // tile_size, width // tile_size)
+
+        # the cell keys are shared between tiles
+        # the tile keys tell the tiles apart
+        random = numpy.random.RandomState( seed )
+        self.cell_keys = self.random_keys( random, (tile_size, tile_size) )
+        self.tile_keys = self.random_keys( random, self.tiles )
+
+        # state -> the cell keys for that state
+        self.state_keys = {}
+
+        self.tile_hashes = numpy.zeros( self.tiles, dtype = numpy.uint64 )
+        self.previous = None
+        self.hash = numpy.uint64( 0 )
+
+    def random_keys( self, random, shape ):
+        # 64 bit keys from two 32 bit halves
+        high = random.randint( 0, 1 << 32, size = shape ).astype( numpy.uint64 )
+        low = random.randint( 0, 1 << 32, size = shape ).astype( numpy.uint64 )
+        return ( high << numpy.uint64( 32 ) ) | low
+
+    def keys( self, state ):
+        # the cell keys for a state, made on first use
+        # as Generations rules may have up to 256 states
+        keys = self.state_keys.get( state )
+        if keys is None:
+            keys = mix( self.cell_keys ^ numpy.uint64( state ) )
+            self.state_keys[ state ] = keys
+        return keys
+
+    def tile_view( self, board ):
+        # index the board by [ tile y, y, tile x, x ]
+        tiles_y, tiles_x = self.tiles
+        size = self.tile_size
+        return board.reshape( tiles_y, size, tiles_x, size )
+
+    def update( self, board, changed = None ):
+        # rehash the tiles that changed since the last update
+        # 'changed' is an optional mask of tiles for engines that
+        # already track them, otherwise we compare with the last board
+        view = self.tile_view( numpy.asarray( board ) )
+        if self.previous is None:
+            self.previous = numpy.zeros_like( board, dtype = numpy.uint8 )
+            changed = numpy.ones( self.tiles, dtype = bool )
+        elif changed is None:
+            changed = ( view != self.tile_view( self.previous ) ).any( axis = ( 1, 3 ) )
+
+        ty, tx = numpy.nonzero( changed )
+        if len( ty ):
+            cells = view[ ty, :, tx, : ]
+            digests = numpy.zeros( len( ty ), dtype = numpy.uint64 )
+            # only the states on the board cost a pass
+            # so a two state board is still hashed in one
+            present = numpy.bincount( cells.ravel() )
+            for state in numpy.nonzero( present[ 1: ] )[ 0 ] + 1:
+                digests ^= numpy.bitwise_xor.reduce(
+                    numpy.where( cells == state, self.keys( int( state ) ), numpy.uint64( 0 ) ),
+                    axis = ( 1, 2 )
+                    )
+            hashes = mix( digests ^ self.tile_keys[ ty, tx ] )
+
+            # swap the old tile hashes out of the board hash
+            self.hash ^= numpy.bitwise_xor.reduce( self.tile_hashes[ ty, tx ] ^ hashes )
+            self.tile_hashes[ ty, tx ] = hashes
+
+            # only the changed tiles need remembering
+            self.tile_view( self.previous )[ ty, :, tx, : ] = cells
+
+        return int( self.hash )
+
+
+class CycleDetector( object ):
+    # spots a board repeating an earlier state
+    # calls cycle_found once when a repeat is first found
+    # this needs no GL or pyglet, see gol_renderable for
+    # the version that dispatches 'on_cycle'
+
+    def __init__( self, dimensions, tile_size = 64, max_history = 1024, seed = 0 ):
+        super( CycleDetector, self ).__init__()
+
+        self.hasher = TileHasher( dimensions, tile_size, seed )
+        self.max_history = max_history
+
+        # board hash -> the generation we saw it at
+        # the oldest entries are dropped first
+        self.history = collections.OrderedDict()
+
+        # set once the board repeats
+        # the period is a multiple of the true period if
+        # we don't see every generation
+        self.period = None
+        self.cycle_start = None
+
+    def reset( self ):
+        # forget the history, eg. after editing the board
+        self.history.clear()
+        self.period = None
+        self.cycle_start = None
+
+    def update( self, generation, board, changed = None ):
+        # hash a generation of the board
+        # returns the period, or None if it hasn't repeated
+        board_hash = self.hasher.update( board, changed )
+
+        first = self.history.get( board_hash )
+        if first is not None and first < generation:
+            if self.period is None:
+                self.period = generation - first
+                self.cycle_start = first
+                self.cycle_found( generation, self.period )
+            return self.period
+
+        # a new state, so we've left any cycle
+        self.period = None
+        self.cycle_start = None
+
+        self.history[ board_hash ] = generation
+        while len( self.history ) > self.max_history:
+            self.history.popitem( last = False )
+        return None
+
+    def cycle_found( self, generation, period ):
+        pass
+
+    def on_readback( self, generation, board ):
+        # hash boards from a PBOReadback
+        self.update( generation, board )
+
+    def run( self, engine, generations ):
+        # step an engine a generation at a time
+        # until it repeats or we run out of generations
+        self.update( engine.generation, engine.board )
+        for generation in range( generations ):
+            engine.step()
+            if self.update( engine.generation, engine.board ) is not None:
+                break
+        return self.period
@@ -3,12 +3,64 @@ import ctypes
 from pyglet.gl import *
 
 
+def is_renderable( internal_format ):
+    # check if a texture format can be attached to an FBO
+    # by building a 1x1 one
+    texture = GLuint()
+    glGenTextures( 1, ctypes.byref( texture ) )
+    glBindTexture( GL_TEXTURE_2D, texture )
+    glTexImage2D(
+        GL_TEXTURE_2D, 0, internal_format, 1, 1, 0,
+        GL_RGBA, GL_UNSIGNED_BYTE, None
+        )
+    glBindTexture( GL_TEXTURE_2D, 0 )
+
+    fbo = GLuint()
+    glGenFramebuffers( 1, ctypes.byref( fbo ) )
+    glBindFramebuffer( GL_FRAMEBUFFER, fbo )
+    glFramebufferTexture2D(
+        GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, texture, 0
+        )
+    status = glCheckFramebufferStatus( GL_FRAMEBUFFER )
+    glBindFramebuffer( GL_FRAMEBUFFER, 0 )
+
+    glDeleteFramebuffers( 1, ctypes.byref( fbo ) )
+    glDeleteTextures( 1, ctypes.byref( texture ) )
+
+    # clear any error from an unsupported format
+    glGetError()
+    return status == GL_FRAMEBUFFER_COMPLETE
+
+
+def single_channel_format():
+    # return the most compact renderable format with a red channel
+    # GL_R8 needs GL 3.0 or ARB_texture_rg
+    # luminance is our fallback on GL 2.1
+    # if neither can be rendered to we stay with GL_RGBA
+    candidates = [ GL_LUMINANCE8 ]
+    if gl_info.have_version( 3, 0 ) or gl_info.have_extension( 'GL_ARB_texture_rg' ):
+        candidates.insert( 0, GL_R8 )
+
+    for internal_format in candidates:
+        if is_renderable( internal_format ):
+            return internal_format
+    return GL_RGBA
+
+
+# the client side format used to upload one byte per cell
+pixel_formats = {
+    GL_R8: GL_RED,
+    GL_LUMINANCE8: GL_LUMINANCE,
+    }
+
+
 class FBO_Texture( object ):    
     
-    def __init__( self, dimensions, texture = None ):
+    def __init__( self, dimensions, texture = None, internal_format = GL_RGBA ):
         super( FBO_Texture, self ).__init__()
 
         self.dimensions = dimensions
+        self.internal_format = internal_format
         
         # create an FBO texture
         self.fbo = GLuint()
@@ -21,7 +73,7 @@ class FBO_Texture( object ):
                 GL_TEXTURE_2D,
                 self.width,
                 self.height,
-                GL_RGBA
+                internal_format
                 )
         
         # bind the texture to the FBO as our output
@@ -37,6 +89,10 @@ class FBO_Texture( object ):
             0
             )
         
+        # the draw buffer is part of the FBO's state
+        # so it only needs setting once
+        glDrawBuffer( GL_COLOR_ATTACHMENT0 )
+
         # check the FBO created successfully
         status = glCheckFramebufferStatus( GL_FRAMEBUFFER )
         assert status == GL_FRAMEBUFFER_COMPLETE
@@ -46,11 +102,19 @@ class FBO_Texture( object ):
         self.unbind()
         
     def __del__( self ):
-        glDeleteFramebuffers( 1, ctypes.byref( self.fbo ) )
+        if self.fbo is not None:
+            glDeleteFramebuffers( 1, ctypes.byref( self.fbo ) )
+
+    def delete( self ):
+        # free the FBO and its texture now
+        # rather than when we're garbage collected
+        if self.fbo is not None:
+            glDeleteFramebuffers( 1, ctypes.byref( self.fbo ) )
+            self.fbo = None
+            self.texture.delete()
     
     def bind( self ):
         glBindFramebuffer( GL_FRAMEBUFFER, self.fbo )
-        glDrawBuffer( GL_COLOR_ATTACHMENT0 )
     
     def unbind( self ):
         glBindFramebuffer( GL_FRAMEBUFFER, 0 )
@@ -0,0 +1,46 @@
+class GenerationScheduler( object ):
+
+    def __init__(
+        self,
+        generations_per_frame = 1,
+        generations_per_second = None,
+        max_generations_per_frame = 1024
+        ):
+        super( GenerationScheduler, self ).__init__()
+
+        # if generations_per_second is set we run at a fixed
+        # rate and catch up with the accumulated time
+        # otherwise we run a fixed number each frame
+        self.generations_per_frame = generations_per_frame
+        self.generations_per_second = generations_per_second
+        self.max_generations_per_frame = max_generations_per_frame
+
+        # stops the simulation without losing the settings
+        self.paused = False
+
+        self.dt = 0.0
+
+    def update( self, dt ):
+        # add the delta to the accumulated time
+        self.dt += dt
+
+    def next_frame( self ):
+        # return the number of generations to run this frame
+        if self.paused:
+            self.dt = 0.0
+            return 0
+
+        if not self.generations_per_second:
+            self.dt = 0.0
+            return self.generations_per_frame
+
+        generations = int( self.dt * self.generations_per_second )
+        self.dt -= generations / float( self.generations_per_second )
+
+        # don't let a slow frame snowball into ever longer frames
+        # drop any time we couldn't catch up on
+        if generations > self.max_generations_per_frame:
+            generations = self.max_generations_per_frame
+            self.dt = 0.0
+
+        return generations
@@ -1,141 +1,249 @@
 import ctypes
 
 from pyglet.gl import *
+import pyglet
 import numpy
 
 from pygly.render_node import RenderNode
 from pygly.shader import Shader
 
+import boundaries
+import board_seeder
+import board_statistics
+import checkpoint
+import pattern_io
+import fbo_texture
+import rules
+from rule_table import RuleTable
+from pbo_readback import PBOReadback
+from cycle_detector import CycleDetector
+from board_viewer import BoardViewer
+from board_editor import BoardEditor
+from quad_buffer import QuadBuffer
+import quad_buffer
+from shader_program import ShaderProgram
+import shader_program
+from profiling import profiler
 from shader_generated_texture import ShaderGeneratedTexture
+from generation_scheduler import GenerationScheduler
+
+
+def band_starts( height, band_size, top_down = False ):
+    # the first row of each band of rows
+    # from the bottom of the board, or from the top
+    starts = range( 0, height, band_size )
+    return reversed( starts ) if top_down else starts
+
+
+# the sampler wrap mode for each boundary
+# the Klein bottle's mirroring is done in the shader
+wrap_modes = {
+    boundaries.torus: GL_REPEAT,
+    boundaries.dead: GL_CLAMP_TO_BORDER,
+    boundaries.klein: GL_REPEAT,
+    }
+
+
+class CycleEvents( CycleDetector, pyglet.event.EventDispatcher ):
+    # a CycleDetector that dispatches 'on_cycle'
+
+    def cycle_found( self, generation, period ):
+        self.dispatch_event( 'on_cycle', generation, period )
+
+CycleEvents.register_event_type( 'on_cycle' )
 
 
 class GOL_Renderable( RenderNode ):
+    # compiled simulation programs and lookup tables
+    # keyed by rule name and boundary, so switching back is free
+    programs = {}
+
     vertex_shader = """
+// projection * modelview, or identity for the simulation
+uniform mat4 transform;
+
 void main()
 {
-    gl_Position    = gl_ModelViewProjectionMatrix * gl_Vertex;
+    gl_Position    = transform * gl_Vertex;
     gl_FrontColor  = gl_Color;
     gl_TexCoord[0] = gl_MultiTexCoord0;
 }
 """
     
-    fragment_shader = """
+    display_fragment_shader = """
 #version 120
 
 // inputs
 uniform sampler2D tex0;
-uniform vec2 dimensions;
+uniform vec4 live_colour;
+uniform vec4 dead_colour;
 
 void main()
 {
-    // retrieve the texture coordinate
-    vec2 tc = gl_TexCoord[0].xy;
-    
-    // convert from 0.0 -> 1.0 to texel
-    vec2 texel_frac = tc * dimensions;
-    
-    // ignore the fractional part
-    // convert back to texture coord
-    float x = floor( texel_frac.x ) / dimensions.x;
-    float y = floor( texel_frac.y ) / dimensions.y;
-    
-    vec2 texel = vec2( x, y );
-    float cell_width = 1.0 / dimensions.x;
-    float cell_height = 1.0 / dimensions.y;
-
-    // get the current texel
-    float current = texture2D(tex0, vec2( x, y ) ).r;
-    
-    //gl_FragColor = vec4( texture2D(tex0, vec2( x, y ) ).rgb, 1.0 );
-    //return;
-
-    // count the neightbouring pixels with a value greater than zero
-    float neighbours = 0.0;
-    neighbours += texture2D(tex0, texel + vec2( 0.0,       -cell_height ) ).r;
-    neighbours += texture2D(tex0, texel + vec2( cell_width,-cell_height ) ).r;
-    neighbours += texture2D(tex0, texel + vec2( cell_width, 0.0 ) ).r;
-    neighbours += texture2D(tex0, texel + vec2( cell_width, cell_height ) ).r;
-    neighbours += texture2D(tex0, texel + vec2( 0.0,        cell_height ) ).r;
-    neighbours += texture2D(tex0, texel + vec2(-cell_width, cell_height ) ).r;
-    neighbours += texture2D(tex0, texel + vec2(-cell_width, 0.0 ) ).r;
-    neighbours += texture2D(tex0, texel + vec2(-cell_width, -cell_height ) ).r;
-    
-    // apply the rules    
-    
-    // 1. Any live cell with fewer than two live neighbours dies, as if caused by under-population.
-    if ( neighbours < 2.0 )
-    {
-        gl_FragColor = vec4( 0.0, 0.0, 0.0, 1.0 );
-        return;
-    }
-    
-    // 2. Any live cell with two or three live neighbours lives on to the next generation.
-    if ( neighbours >= 2.0 && neighbours <= 3.0 && current == 1.0 )
-    {
-        gl_FragColor = vec4( 1.0, 0.0, 0.0, 1.0 );
-        return;
-    }
-    
-    // 3. Any live cell with more than three live neighbours dies, as if by overcrowding.
-    if ( neighbours > 3.0 )
-    {
-        gl_FragColor = vec4( 0.0, 0.0, 0.0, 1.0 );
-        return;
-    }
-    
-    // 4. Any dead cell with exactly three live neighbours becomes a live cell, as if by reproduction.
-    if ( neighbours == 3.0 && current == 0.0 )
-    {
-        gl_FragColor = vec4( 1.0, 0.0, 0.0, 1.0 );
-        return;
-    }
-    
-    gl_FragColor = vec4( 0.0, 0.0, 0.0, 1.0 );
+    // cells are stored in the red channel
+    float cell = texture2D( tex0, gl_TexCoord[0].xy ).r;
+    gl_FragColor = mix( dead_colour, live_colour, cell );
 }
 """
 
-    def __init__( self, dimensions ):
+    def __init__(
+        self,
+        dimensions,
+        scheduler = None,
+        density = 0.5,
+        seed = None,
+        internal_format = None,
+        rule = 'B3/S23',
+        boundary = boundaries.torus
+        ):
         super( GOL_Renderable, self ).__init__( "GOL_Renderable" )
         
-        self.dt = 0.0
-        self.shader = Shader(
-            vert = GOL_Renderable.vertex_shader,
-            frag = GOL_Renderable.fragment_shader
+        # decides how many generations to run each frame
+        self.scheduler = scheduler
+        if self.scheduler == None:
+            self.scheduler = GenerationScheduler()
+        self.generation = 0
+
+        # optional checkpoint.PeriodicCheckpoint
+        self.checkpoint = None
+
+        # optional asynchronous readback, see enable_readback
+        # reads are requested at most every 'readback_every' generations
+        self.readback = None
+        self.readback_every = 1
+        self.readback_generation = None
+
+        # optional board hashing, see enable_cycle_detection
+        self.cycle_detector = None
+
+        # optional GPU statistics, see enable_statistics
+        self.statistics = None
+        self.statistics_every = 1
+
+        # optional pan / zoom view, see enable_viewer
+        self.viewer = None
+
+        # optional live editing, see enable_editor
+        self.editor = None
+
+        # the simulation program for our rule and boundary
+        self.rule = rules.parse_rule( rule )
+        self.boundary = boundaries.check( boundary )
+        self.shader, self.rule_table = self.create_program( self.rule )
+
+        # maps the cell channel to colours for display
+        self.display_shader = ShaderProgram( Shader(
+            vert = self.vertex_shader,
+            frag = self.display_fragment_shader
+            ) )
+        self.live_colour = (1.0, 0.0, 0.0, 1.0)
+        self.dead_colour = (0.0, 0.0, 0.0, 1.0)
+
+        # the board's quad in the scene
+        self.display_quad = QuadBuffer( -5.0, -5.0, 5.0, 5.0 )
+
+        self.texture = self.create_texture(
+            dimensions,
+            density,
+            seed,
+            internal_format
             )
-        
-        # create an FBO texture
-        # convert our image to a texture
-        self.texture = ShaderGeneratedTexture(
+        self.set_boundary( self.boundary )
+
+    def create_program( self, rule ):
+        key = (rule.name, self.boundary)
+        if key not in GOL_Renderable.programs:
+            GOL_Renderable.programs[ key ] = (
+                ShaderProgram( Shader(
+                    vert = self.vertex_shader,
+                    frag = rules.fragment_shader( rule, self.boundary )
+                    ) ),
+                RuleTable( rule )
+                )
+        return GOL_Renderable.programs[ key ]
+
+    def set_rule( self, rule ):
+        # swap the simulation program between frames
+        # the board carries on as it is
+        self.rule = rules.parse_rule( rule )
+        self.shader, self.rule_table = self.create_program( self.rule )
+        self.texture.shader = self.shader
+        if self.checkpoint:
+            self.checkpoint.rule = self.rule.name
+
+        # earlier states no longer lead to the same future
+        if self.cycle_detector:
+            self.cycle_detector.reset()
+
+    def set_boundary( self, boundary ):
+        # choose what lies past the edge of the board
+        # this is the sampler's wrap mode plus the kernel's wrap()
+        self.boundary = boundaries.check( boundary )
+        self.set_rule( self.rule )
+        self.texture.wrap_mode = wrap_modes[ self.boundary ]
+
+        # dead edges read back the border colour
+        border = (GLfloat * 4)( 0.0, 0.0, 0.0, 0.0 )
+        for fbo in ( self.texture.fbo1, self.texture.fbo2 ):
+            glBindTexture( fbo.texture.target, fbo.texture.id )
+            glTexParameterfv( fbo.texture.target, GL_TEXTURE_BORDER_COLOR, border )
+            glBindTexture( fbo.texture.target, 0 )
+
+    def create_texture( self, dimensions, density, seed, internal_format ):
+        # the shader only uses the red channel
+        # so use a single channel texture if we can
+        if internal_format == None:
+            internal_format = fbo_texture.single_channel_format()
+
+        if internal_format == GL_RGBA:
+            # create an FBO texture
+            # convert our image to a texture
+            return ShaderGeneratedTexture(
+                self.shader,
+                dimensions,
+                texture1 = self.create_initial_texture(
+                    dimensions,
+                    density,
+                    seed
+                    ).get_texture()
+                )
+
+        # create empty FBO textures and fill the first in place
+        texture = ShaderGeneratedTexture(
             self.shader,
             dimensions,
-            texture1 = self.create_initial_texture( dimensions ).get_texture()
+            internal_format = internal_format
+            )
+        self.upload_initial_data( texture, dimensions, density, seed )
+        return texture
+
+    def upload_initial_data( self, texture, dimensions, density = 0.5, seed = None ):
+        # one GLubyte per cell
+        tex_data = (GLubyte * (dimensions[ 0 ] * dimensions[ 1 ]))()
+        board_seeder.seed_board( dimensions, density, seed, tex_data, value = 255 )
+
+        glBindTexture( texture.texture.target, texture.texture.id )
+        glPixelStorei( GL_UNPACK_ALIGNMENT, 1 )
+        glTexSubImage2D(
+            texture.texture.target,
+            0,
+            0, 0,
+            dimensions[ 0 ], dimensions[ 1 ],
+            fbo_texture.pixel_formats[ texture.internal_format ],
+            GL_UNSIGNED_BYTE,
+            tex_data
             )
+        glBindTexture( texture.texture.target, 0 )
 
-    def create_initial_texture( self, dimensions ):
+    def create_initial_texture( self, dimensions, density = 0.5, seed = None ):
         # we need RGBA textures
         # which is 4 bytes
         format_size = 4
         
-        # populate our GoL board with some random data
-        #numpy.random.seed( 0 )
-        data = numpy.random.random_integers(
-            low = 0,
-            high = 1,
-            size = (dimensions[ 0 ] * dimensions[ 1 ], format_size)
-            )
-        
-        # convert any 1's to 255
-        data *= 255
-        
-        # set the GBA (from RGBA) to 0
-        data[ :, 1: ] = 0
-        data[ :, 3 ] = 255
-        
-        # we need to flatten the array
-        data.shape = -1
-        
-        # convert to GLubytes
-        tex_data = (GLubyte * data.size)( *data.astype('u1') )
+        # allocate our GLubytes up front
+        # and populate our GoL board with some random data in place
+        tex_data = (GLubyte * (dimensions[ 0 ] * dimensions[ 1 ] * format_size))()
+        board_seeder.seed_rgba( dimensions, tex_data, density, seed, format_size )
         
         # create an image
         return pyglet.image.ImageData(
@@ -143,60 +251,319 @@ void main()
                 dimensions[ 1 ],
                 "RGBA",
                 tex_data,
-                pitch = dimensions[ 1 ] * format_size
+                pitch = dimensions[ 0 ] * format_size
                 )
     
     def render_mesh( self ):
-        # check if we should iterate
-        #while self.dt >= 1.0:
-        if True:
-            # render our FBO
-            self.texture.bind()
-            
-            # use texture layer 0
-            self.texture.shader.uniformi('tex0', 0)
-            
-            # pass in the texture dimensions
+        # count this frame's GL calls from here
+        shader_program.counter.frame()
+
+        # apply this frame's edits before stepping
+        if self.editor:
+            with profiler.section( 'edit' ):
+                self.editor.flush()
+
+        # check how many generations we should iterate
+        generations = self.scheduler.next_frame()
+        if generations > 0:
+            self.step( generations )
+
+        # hand any finished reads to their handlers
+        if self.readback:
+            with profiler.section( 'readback' ):
+                self.readback.poll()
+        
+        with profiler.section( 'display', gpu = True ):
+            if self.viewer:
+                # only draw the visible region of the board
+                self.viewer.render( self )
+            else:
+                self.render_board()
+
+    def step( self, generations = 1 ):
+        # run 'generations' generations on the GPU
+        # without drawing anything
+        with profiler.section( 'simulate', gpu = True ):
+            self.run_generations( generations )
+        
+        self.generation += generations
+
+        if self.checkpoint:
+            self.checkpoint.update( self )
+
+        # reduce the board on the GPU
+        # fbo2 now holds the generation before this one
+        if self.statistics and self.statistics_due():
+            with profiler.section( 'statistics', gpu = True ):
+                self.statistics.update(
+                    self.generation,
+                    self.texture.fbo1.texture,
+                    self.texture.fbo2.texture
+                    )
+
+        # queue a read of the new generation
+        if self.readback and self.readback_due():
+            if self.readback.request( self.texture.fbo1, self.generation ):
+                self.readback_generation = self.generation
+
+    def run_generations( self, generations ):
+        # the shader pass, ping-ponging between the FBOs
+        self.texture.begin()
+        
+        # use texture layer 0
+        self.texture.shader.uniformi('tex0', 0)
+        
+        # pass in the texture dimensions
+        self.texture.shader.uniformf(
+            'dimensions',
+            float( self.texture.dimensions[ 0 ] ),
+            float( self.texture.dimensions[ 1 ] )
+            )
+        
+        # bind our rule's lookup table to texture layer 1
+        if self.rule_table:
+            self.rule_table.bind( 1 )
+            self.texture.shader.uniformi( 'rule_table', 1 )
             self.texture.shader.uniformf(
-                'dimensions',
-                float( self.texture.dimensions[ 0 ] ),
-                float( self.texture.dimensions[ 1 ] )
+                'table_size',
+                float( self.rule_table.dimensions[ 0 ] ),
+                float( self.rule_table.dimensions[ 1 ] )
                 )
-            
-            # render to texture
-            self.texture.render()
-
-            # reset our opengl state
-            self.texture.unbind()
-            
-            self.dt -= 1.0
         
+        # render to texture
+        # ping-ponging between the FBOs
+        self.texture.iterate( generations )
+
+        # reset our opengl state
+        self.texture.end()
+        if self.rule_table:
+            self.rule_table.unbind( 1 )
+
+    def render_board( self ):
+        # map the cell channel to our colours
+        self.display_shader.bind()
+        self.display_shader.uniformi( 'tex0', 0 )
+        self.display_shader.uniformf( 'live_colour', *self.live_colour )
+        self.display_shader.uniformf( 'dead_colour', *self.dead_colour )
+        self.display_shader.uniform_matrixf( 'transform', quad_buffer.current_transform() )
+
         # use the result of the FBO as a texture
         glBindTexture( self.texture.texture.target, self.texture.texture.id )
         
         # disable texture filtering
-        glTexParameteri( GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST )
-        glTexParameteri( GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST )
+        shader_program.nearest( self.texture.texture )
         
         # render a quad at 0,0,0
-        glBegin( GL_QUADS )
-        
-        x_size, y_size = 5, 5
-
-        glTexCoord2f( 0.0, 0.0 )        
-        glVertex3f(-x_size,-y_size, 0.0 )
-        
-        glTexCoord2f( 1.0, 0.0 )
-        glVertex3f( x_size,-y_size, 0.0 )
-        
-        glTexCoord2f( 1.0, 1.0 )
-        glVertex3f( x_size, y_size, 0.0 )
-        
-        glTexCoord2f( 0.0, 1.0 )
-        glVertex3f(-x_size, y_size, 0.0 )
-        
-        glEnd()
+        self.display_quad.render()
         
         # unbind our texture
         glBindTexture( self.texture.texture.target, 0 )
-        
+
+        self.display_shader.unbind()
+
+    def read_rows( self, band_size = 256, top_down = False ):
+        # read the current board back a band of rows at a time
+        # only fetching the red channel
+        # rows come bottom up as GL stores them, or top down
+        # as pattern files list them
+        width, height = self.texture.dimensions
+        data = (GLubyte * (width * band_size))()
+        band = numpy.frombuffer( data, dtype = numpy.uint8 ).reshape( band_size, width )
+
+        for bottom in band_starts( height, band_size, top_down ):
+            rows = min( band_size, height - bottom )
+
+            self.texture.fbo1.bind()
+            glPixelStorei( GL_PACK_ALIGNMENT, 1 )
+            glReadPixels( 0, bottom, width, rows, GL_RED, GL_UNSIGNED_BYTE, data )
+            self.texture.fbo1.unbind()
+
+            # texture bytes back to states, so Generations rules
+            # keep their dying cells
+            cells = rules.decode_board( band[ :rows ], self.rule.states )
+            for row in ( cells[ ::-1 ] if top_down else cells ):
+                yield row
+
+    def read_board( self ):
+        return numpy.array( list( self.read_rows() ), dtype = numpy.uint8 )
+
+    def write_region( self, board, x, y ):
+        # upload a block of cells into the current texture
+        # clipping it to the board
+        width, height = self.dimensions
+        left, bottom = max( x, 0 ), max( y, 0 )
+        right = min( x + board.shape[ 1 ], width )
+        top = min( y + board.shape[ 0 ], height )
+        if left >= right or bottom >= top:
+            return
+
+        region = board[ bottom - y:top - y, left - x:right - x ]
+        self.write_rectangles( region, [ (0, 0, right - left, top - bottom) ], left, bottom )
+
+    def board_changed( self ):
+        # the board was written rather than stepped, so the
+        # history of earlier generations no longer applies
+        if self.cycle_detector:
+            self.cycle_detector.reset()
+        if self.statistics:
+            self.statistics.reset()
+        if self.viewer:
+            self.viewer.board_changed()
+
+    def write_rectangles( self, board, rectangles, x, y ):
+        # upload rectangles of 'board', which sits at x, y
+        # each rectangle is ( left, bottom, right, top ) within 'board'
+        # the board is encoded once and each rectangle is read
+        # straight out of it with the unpack row length and skips
+        # 'board' must lie within the texture
+        if not rectangles:
+            return
+
+        self.board_changed()
+
+        data = rules.encode_board( board, self.rule.states )
+        if self.texture.internal_format in fbo_texture.pixel_formats:
+            # one byte per cell
+            pixel_format = fbo_texture.pixel_formats[ self.texture.internal_format ]
+        else:
+            # the state goes in red, with an opaque alpha
+            pixel_format = GL_RGBA
+            rgba = numpy.zeros( board.shape + (4,), dtype = numpy.uint8 )
+            rgba[ :, :, 0 ] = data
+            rgba[ :, :, 3 ] = 255
+            data = rgba
+        data = numpy.ascontiguousarray( data )
+
+        texture = self.texture.texture
+        glBindTexture( texture.target, texture.id )
+        glPixelStorei( GL_UNPACK_ALIGNMENT, 1 )
+        glPixelStorei( GL_UNPACK_ROW_LENGTH, board.shape[ 1 ] )
+        for left, bottom, right, top in rectangles:
+            glPixelStorei( GL_UNPACK_SKIP_PIXELS, left )
+            glPixelStorei( GL_UNPACK_SKIP_ROWS, bottom )
+            glTexSubImage2D(
+                texture.target,
+                0,
+                x + left, y + bottom,
+                right - left, top - bottom,
+                pixel_format,
+                GL_UNSIGNED_BYTE,
+                data.ctypes.data
+                )
+
+        # put the unpack state back for everyone else
+        glPixelStorei( GL_UNPACK_ROW_LENGTH, 0 )
+        glPixelStorei( GL_UNPACK_SKIP_PIXELS, 0 )
+        glPixelStorei( GL_UNPACK_SKIP_ROWS, 0 )
+        glBindTexture( texture.target, 0 )
+
+    def load_pattern( self, filename, x = 0, y = 0 ):
+        # decode the pattern into its own small board
+        # and only upload the area it covers
+        # pattern files list rows from the top, GL from the bottom
+        # so x, y place the pattern's top left from the board's top left
+        board = pattern_io.load_pattern( filename )
+        self.write_region( board[ ::-1 ], x, self.dimensions[ 1 ] - y - board.shape[ 0 ] )
+        return board
+
+    def save_pattern( self, filename, rule = None ):
+        rule = rule or self.rule.name
+        format = pattern_io.format_from_filename( filename )
+        with open( filename, 'w' ) as stream:
+            if format in pattern_io.row_writers:
+                # stream the rows straight from the texture
+                pattern_io.row_writers[ format ](
+                    stream,
+                    self.read_rows( top_down = True ),
+                    self.dimensions,
+                    rule
+                    )
+            else:
+                # Macrocell needs the whole board to build its quadtree
+                pattern_io.writers[ format ]( stream, self.read_board()[ ::-1 ], rule )
+
+    def readback_due( self ):
+        return (
+            self.readback_generation is None or
+            self.generation - self.readback_generation >= self.readback_every
+            )
+
+    def statistics_due( self ):
+        latest = self.statistics.latest
+        return (
+            latest is None or
+            self.generation - latest[ 'generation' ] >= self.statistics_every
+            )
+
+    def enable_viewer( self ):
+        # draw the board over the viewport with pan and zoom
+        # rather than as a quad in the scene
+        self.viewer = BoardViewer( self.dimensions )
+        return self.viewer
+
+    def enable_editor( self ):
+        # draw, erase and stamp cells between frames
+        # edits are uploaded at the start of the next render
+        self.editor = BoardEditor( self )
+        return self.editor
+
+    def enable_readback( self, buffers = 3 ):
+        # read the board back a few frames behind the GPU
+        # use readback.push_handlers( on_readback = ... ) to receive it
+        self.readback = PBOReadback( self.dimensions, buffers, self.rule.states )
+        return self.readback
+
+    def enable_cycle_detection( self, every = 16, tile_size = 64, max_history = 1024 ):
+        # hash the board as it arrives from the asynchronous readback
+        # rather than stalling on a full read each frame
+        # use cycle_detector.push_handlers( on_cycle = ... ) to act on it
+        if not self.readback:
+            self.enable_readback()
+        self.readback_every = every
+
+        self.cycle_detector = CycleEvents( self.dimensions, tile_size, max_history )
+        self.readback.push_handlers( on_readback = self.cycle_detector.on_readback )
+        return self.cycle_detector
+
+    def enable_statistics( self, every = 1, log_filename = None ):
+        # count the population, births, deaths and bounding box
+        # with reduction passes, reading back two texels
+        # births and deaths are for the last generation stepped
+        if not board_statistics.is_supported():
+            raise RuntimeError( "Statistics need renderable float textures" )
+        self.statistics_every = every
+        self.statistics = board_statistics.BoardStatistics( self.dimensions, log_filename )
+        return self.statistics
+
+    def delete( self ):
+        # free our FBOs, textures and buffers now, eg. before
+        # creating the next board in a long running process
+        # the shaders are shared between boards and kept
+        self.texture.delete()
+        self.display_quad.delete()
+        if self.readback:
+            self.readback.delete()
+        if self.statistics:
+            self.statistics.close()
+        if self.viewer:
+            self.viewer.delete()
+
+    def save_checkpoint( self, filename, rule = None ):
+        checkpoint.save_checkpoint( filename, self, rule or self.rule.name )
+
+    def load_checkpoint( self, filename ):
+        # upload the checkpoint a band at a time
+        # so the whole board is never unpacked in memory
+        saved = checkpoint.load_checkpoint( filename )
+        if saved.dimensions != tuple( self.dimensions ):
+            raise ValueError( "Checkpoint is %dx%d" % saved.dimensions )
+        if saved.rule and saved.rule != self.rule.name:
+            self.set_rule( saved.rule )
+
+        for top, rows in saved.iter_bands():
+            self.write_region( rows, 0, top )
+        self.generation = saved.generation
+
+    @property
+    def dimensions( self ):
+        return self.texture.dimensions
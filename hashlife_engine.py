@@ -0,0 +1,365 @@
+from collections import OrderedDict
+
+import numpy
+
+import numpy_engine
+
+
+class Node( object ):
+    # quadtree nodes are canonical, so each unique
+    # (nw, ne, sw, se) tuple exists exactly once
+    # and can be compared and hashed by identity
+    __slots__ = ( 'level', 'nw', 'ne', 'sw', 'se', 'population' )
+
+    def __init__( self, level, nw, ne, sw, se, population ):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+    @property
+    def size( self ):
+        return 1 << self.level
+
+
+def render_node( node, x, y, out ):
+    # write the live cells of a node into 'out'
+    # clipping to the board window
+    height, width = out.shape
+    size = node.size
+    if node.population == 0:
+        return
+    if x >= width or y >= height or x + size <= 0 or y + size <= 0:
+        return
+    if node.level == 0:
+        out[ y, x ] = 1
+        return
+
+    half = size // 2
+    render_node( node.nw, x, y, out )
+    render_node( node.ne, x + half, y, out )
+    render_node( node.sw, x, y + half, out )
+    render_node( node.se, x + half, y + half, out )
+
+
+def bounding_box( node, cache = None ):
+    # return the ( left, top, right, bottom ) of the live cells
+    # relative to the node, or None if the node is empty
+    # shared nodes are only visited once
+    if node.population == 0:
+        return None
+    if node.level == 0:
+        return (0, 0, 1, 1)
+    if cache is None:
+        cache = {}
+    if node in cache:
+        return cache[ node ]
+
+    half = node.size // 2
+    boxes = []
+    for child, x, y in (
+        (node.nw, 0, 0),
+        (node.ne, half, 0),
+        (node.sw, 0, half),
+        (node.se, half, half),
+        ):
+        box = bounding_box( child, cache )
+        if box is not None:
+            boxes.append( (box[ 0 ] + x, box[ 1 ] + y, box[ 2 ] + x, box[ 3 ] + y) )
+
+    box = (
+        min( box[ 0 ] for box in boxes ),
+        min( box[ 1 ] for box in boxes ),
+        max( box[ 2 ] for box in boxes ),
+        max( box[ 3 ] for box in boxes ),
+        )
+    cache[ node ] = box
+    return box
+
+
+class NodeTable( object ):
+
+    def __init__( self ):
+        super( NodeTable, self ).__init__()
+
+        # our two level 0 leaves
+        self.off = Node( 0, None, None, None, None, 0 )
+        self.on = Node( 0, None, None, None, None, 1 )
+
+        self.nodes = {}
+        self.empties = [ self.off ]
+        self.blocks = {}
+
+    def __len__( self ):
+        return len( self.nodes )
+
+    def join( self, nw, ne, sw, se ):
+        key = (nw, ne, sw, se)
+        node = self.nodes.get( key )
+        if node is None:
+            node = Node(
+                nw.level + 1,
+                nw, ne, sw, se,
+                nw.population + ne.population + sw.population + se.population
+                )
+            self.nodes[ key ] = node
+        return node
+
+    def empty( self, level ):
+        while len( self.empties ) <= level:
+            empty = self.empties[ -1 ]
+            self.empties.append( self.join( empty, empty, empty, empty ) )
+        return self.empties[ level ]
+
+    def centre( self, node ):
+        # return a node one level up with 'node' in the middle
+        empty = self.empty( node.level - 1 )
+        return self.join(
+            self.join( empty, empty, empty, node.nw ),
+            self.join( empty, empty, node.ne, empty ),
+            self.join( empty, node.sw, empty, empty ),
+            self.join( node.se, empty, empty, empty )
+            )
+
+    def inner( self, node ):
+        # return the central node one level down
+        return self.join( node.nw.se, node.ne.sw, node.sw.ne, node.se.nw )
+
+    def from_board( self, board ):
+        # pad the board to a power of 2 square
+        level = 3
+        while ( 1 << level ) < max( board.shape ):
+            level += 1
+        size = 1 << level
+        padded = numpy.zeros( (size, size), dtype = numpy.uint8 )
+        padded[ :board.shape[ 0 ], :board.shape[ 1 ] ] = board != 0
+
+        return self.from_cells( padded, level )
+
+    def from_cells( self, cells, level ):
+        if not cells.any():
+            return self.empty( level )
+
+        if level == 0:
+            return self.on
+
+        # identical 8x8 blocks are common, so skip straight to them
+        if level == 3:
+            key = cells.tobytes()
+            node = self.blocks.get( key )
+            if node is None:
+                node = self.from_quadrants( cells, level )
+                self.blocks[ key ] = node
+            return node
+
+        return self.from_quadrants( cells, level )
+
+    def from_quadrants( self, cells, level ):
+        half = 1 << ( level - 1 )
+        return self.join(
+            self.from_cells( cells[ :half, :half ], level - 1 ),
+            self.from_cells( cells[ :half, half: ], level - 1 ),
+            self.from_cells( cells[ half:, :half ], level - 1 ),
+            self.from_cells( cells[ half:, half: ], level - 1 )
+            )
+
+    def rebuild( self, roots ):
+        # drop every node not reachable from the roots
+        # this is our garbage collection
+        nodes = {}
+        pending = list( roots ) + self.empties[ 1: ]
+        while pending:
+            node = pending.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key in nodes:
+                continue
+            nodes[ key ] = node
+            pending.extend( key )
+        self.nodes = nodes
+        self.blocks = {}
+
+
+class HashlifeEngine( object ):
+
+    def __init__( self, board, max_cache = 1 << 20, max_nodes = 1 << 22 ):
+        super( HashlifeEngine, self ).__init__()
+
+        self.generation = 0
+        self.max_cache = max_cache
+        self.max_nodes = max_nodes
+
+        self.table = NodeTable()
+        self.results = OrderedDict()
+
+        # the board is a window onto an infinite plane
+        # we remember where it is so we can write back into it
+        self.height, self.width = board.shape
+        self.root = self.table.from_board( board )
+        self.x = 0
+        self.y = 0
+
+    @classmethod
+    def from_rgba( cls, data, dimensions, format_size = 4, **kwargs ):
+        board = numpy_engine.board_from_rgba( data, dimensions, format_size )
+        return cls( board, **kwargs )
+
+    def to_rgba( self, format_size = 4 ):
+        return numpy_engine.board_to_rgba( self.board, format_size )
+
+    def life_4x4( self, node ):
+        # step the central 2x2 cells of a 4x4 node once
+        cells = numpy.zeros( (4, 4), dtype = numpy.uint8 )
+        for y, row in enumerate( ( (node.nw, node.ne), (node.sw, node.se) ) ):
+            for x, quadrant in enumerate( row ):
+                cells[ y * 2, x * 2 ] = quadrant.nw.population
+                cells[ y * 2, x * 2 + 1 ] = quadrant.ne.population
+                cells[ y * 2 + 1, x * 2 ] = quadrant.sw.population
+                cells[ y * 2 + 1, x * 2 + 1 ] = quadrant.se.population
+
+        result = []
+        for y in ( 1, 2 ):
+            for x in ( 1, 2 ):
+                total = cells[ y - 1:y + 2, x - 1:x + 2 ].sum()
+                alive = total == 3 or ( total == 4 and cells[ y, x ] )
+                result.append( self.table.on if alive else self.table.off )
+        return self.table.join( *result )
+
+    def successor( self, node, j ):
+        # advance the centre of a level k node by 2^j generations
+        # returning a level k - 1 node, where j <= k - 2
+        if node.population == 0:
+            return node.nw
+
+        # a level k node can advance at most 2^(k - 2)
+        j = min( j, node.level - 2 )
+        key = (node, j)
+        result = self.results.pop( key, None )
+        if result is not None:
+            # re-insert to mark it as recently used
+            self.results[ key ] = result
+            return result
+
+        if node.level == 2:
+            result = self.life_4x4( node )
+        else:
+            result = self.successor_children( node, j )
+
+        self.results[ key ] = result
+        if len( self.results ) > self.max_cache:
+            self.results.popitem( last = False )
+        return result
+
+    def successor_children( self, node, j ):
+        join = self.table.join
+        nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+
+        # the 9 overlapping sub-squares, each advanced by up to 2^j
+        half = j < node.level - 2
+        c1 = self.successor( nw, j )
+        c2 = self.successor( join( nw.ne, ne.nw, nw.se, ne.sw ), j )
+        c3 = self.successor( ne, j )
+        c4 = self.successor( join( nw.sw, nw.se, sw.nw, sw.ne ), j )
+        c5 = self.successor( join( nw.se, ne.sw, sw.ne, se.nw ), j )
+        c6 = self.successor( join( ne.sw, ne.se, se.nw, se.ne ), j )
+        c7 = self.successor( sw, j )
+        c8 = self.successor( join( sw.ne, se.nw, sw.se, se.sw ), j )
+        c9 = self.successor( se, j )
+
+        if half:
+            # the sub-squares have already moved 2^j generations
+            # so just stitch their centres back together
+            return join(
+                join( c1.se, c2.sw, c4.ne, c5.nw ),
+                join( c2.se, c3.sw, c5.ne, c6.nw ),
+                join( c4.se, c5.sw, c7.ne, c8.nw ),
+                join( c5.se, c6.sw, c8.ne, c9.nw )
+                )
+
+        # advance a second time to cover the full 2^(k - 2)
+        return join(
+            self.successor( join( c1, c2, c4, c5 ), j ),
+            self.successor( join( c2, c3, c5, c6 ), j ),
+            self.successor( join( c4, c5, c7, c8 ), j ),
+            self.successor( join( c5, c6, c8, c9 ), j )
+            )
+
+    def is_padded( self, node ):
+        # true if all the live cells are in the central quarter
+        # so the pattern can't escape the successor's result
+        if node.level < 3:
+            return False
+        inner = self.table.inner( self.table.inner( node ) )
+        return inner.population == node.population
+
+    def expand( self ):
+        half = self.root.size // 2
+        self.root = self.table.centre( self.root )
+        self.x -= half
+        self.y -= half
+
+    def jump_power( self, j ):
+        # advance the board by exactly 2^j generations
+        while self.root.level < j + 3 or not self.is_padded( self.root ):
+            self.expand()
+
+        quarter = self.root.size // 4
+        self.root = self.successor( self.root, j )
+        self.x += quarter
+        self.y += quarter
+        self.generation += 1 << j
+
+        self.collect()
+
+    def jump( self, generations ):
+        # break the jump down into powers of 2
+        j = 0
+        while generations:
+            if generations & 1:
+                self.jump_power( j )
+            generations >>= 1
+            j += 1
+        return self.generation
+
+    def step( self, generations = 1 ):
+        self.jump( generations )
+        return self.board
+
+    def collect( self ):
+        # shrink the root back down while it is mostly empty
+        while self.root.level > 3 and self.is_padded( self.root ):
+            quarter = self.root.size // 4
+            self.root = self.table.inner( self.root )
+            self.x += quarter
+            self.y += quarter
+
+        # throw away the caches once the node table gets too big
+        if len( self.table ) > self.max_nodes:
+            self.results.clear()
+            self.table.rebuild( [ self.root ] )
+
+    @property
+    def board( self ):
+        board = numpy.zeros( (self.height, self.width), dtype = numpy.uint8 )
+        render_node( self.root, self.x, self.y, board )
+        return board
+
+    @property
+    def population( self ):
+        return self.root.population
+
+    @property
+    def dimensions( self ):
+        return (self.width, self.height)
+
+    @property
+    def stats( self ):
+        return {
+            'nodes': len( self.table ),
+            'results': len( self.results ),
+            'level': self.root.level,
+            'population': self.root.population,
+            }
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy
+import pyglet
+
+import boundaries
+import pattern_io
+import rules
+
+
+def use_egl():
+    # without a display we render through EGL
+    # Mesa can do this in software with LIBGL_ALWAYS_SOFTWARE=1
+    if os.environ.get( 'PYGOL_HEADLESS' ):
+        return os.environ[ 'PYGOL_HEADLESS' ] != '0'
+    return sys.platform.startswith( 'linux' ) and not os.environ.get( 'DISPLAY' )
+
+
+def configure( headless = None ):
+    # this must run before anything imports pyglet.gl
+    # as pyglet picks its GL platform on import
+    if headless is None:
+        headless = use_egl()
+    if headless:
+        pyglet.options[ 'headless' ] = True
+
+    # we never present a frame, so don't wait for one
+    pyglet.options[ 'vsync' ] = False
+    pyglet.options[ 'shadow_window' ] = False
+
+
+def create_context( width = 64, height = 64 ):
+    # an invisible window owning a GL context
+    # with EGL this is a pbuffer rather than a real window
+    # all our rendering goes to FBOs, so its size doesn't matter
+    config = pyglet.gl.Config( double_buffer = False, major_version = 2, minor_version = 1 )
+    try:
+        return pyglet.window.Window( width = width, height = height, visible = False, vsync = False, config = config )
+    except pyglet.window.NoSuchConfigException:
+        return pyglet.window.Window( width = width, height = height, visible = False, vsync = False )
+
+
+def check_packed( rule ):
+    # the packed kernel is bitwise B3/S23 and takes no other rule
+    rule = rules.parse_rule( rule )
+    if rule.name != 'B3/S23':
+        raise ValueError( "--packed only runs B3/S23, not %s" % rule.name )
+
+
+def run(
+    dimensions,
+    generations,
+    rule = 'B3/S23',
+    boundary = 'torus',
+    density = 0.5,
+    seed = None,
+    pattern = None,
+    batch = 64,
+    packed = False
+    ):
+    # step a board on the GPU as fast as we can
+    # returns the GOL_Renderable and a dictionary of results
+    from pyglet.gl import glFinish, gl_info
+    from gol_renderable import GOL_Renderable
+    import packed_gol_renderable
+
+    start = time.time()
+    if packed:
+        check_packed( rule )
+        # raises packed_gol_renderable.UnsupportedError without GL 3.0
+        gol = packed_gol_renderable.PackedGOL_Renderable(
+            dimensions,
+            density = 0.0 if pattern else density,
+            seed = seed,
+            boundary = boundary
+            )
+    else:
+        gol = GOL_Renderable(
+            dimensions,
+            density = 0.0 if pattern else density,
+            seed = seed,
+            rule = rule,
+            boundary = boundary
+            )
+    if pattern:
+        # centre the pattern on the empty board
+        # flipping its rows, as GL's rows run bottom up
+        board = pattern_io.load_pattern( pattern )[ ::-1 ]
+        gol.write_region(
+            board,
+            ( dimensions[ 0 ] - board.shape[ 1 ] ) // 2,
+            ( dimensions[ 1 ] - board.shape[ 0 ] ) // 2
+            )
+    glFinish()
+    startup = time.time() - start
+
+    # no frames, no vsync and no scheduler
+    # just back to back batches of generations
+    start = time.time()
+    remaining = generations
+    while remaining > 0:
+        count = min( batch, remaining )
+        gol.step( count )
+        remaining -= count
+    glFinish()
+    elapsed = time.time() - start
+
+    results = {
+        'width': dimensions[ 0 ],
+        'height': dimensions[ 1 ],
+        'rule': gol.rule.name,
+        'boundary': gol.boundary,
+        'generation': gol.generation,
+        'startup_seconds': startup,
+        'seconds': elapsed,
+        'generations_per_second': generations / elapsed if elapsed else None,
+        'cells_per_second': generations * dimensions[ 0 ] * dimensions[ 1 ] / elapsed if elapsed else None,
+        'renderer': gl_info.get_renderer(),
+        }
+    return gol, results
+
+
+def main( argv = None ):
+    parser = argparse.ArgumentParser( description = "Run the GPU simulation without a window" )
+    parser.add_argument( '--size', nargs = 2, type = int, default = [ 2048, 2048 ], metavar = ('WIDTH', 'HEIGHT') )
+    parser.add_argument( '--generations', type = int, default = 1000 )
+    parser.add_argument( '--rule', default = 'B3/S23' )
+    parser.add_argument( '--boundary', default = boundaries.torus, choices = boundaries.modes )
+    parser.add_argument( '--density', type = float, default = 0.5 )
+    parser.add_argument( '--seed', type = int )
+    parser.add_argument( '--pattern', help = "an RLE, plaintext or Macrocell file to start from" )
+    parser.add_argument( '--batch', type = int, default = 64, help = "generations per batch of draw calls" )
+    parser.add_argument( '--packed', action = 'store_true', help = "pack 32 cells per texel" )
+    parser.add_argument( '--population', action = 'store_true', help = "read the board back to count it" )
+    parser.add_argument( '--save', help = "save the final board as a pattern, or a checkpoint ending .ckpt" )
+    parser.add_argument( '--window', action = 'store_true', help = "use an invisible window rather than EGL" )
+    args = parser.parse_args( argv )
+
+    # catch a bad rule before we create a context
+    try:
+        rules.parse_rule( args.rule )
+        if args.packed:
+            check_packed( args.rule )
+    except ValueError as error:
+        parser.error( str( error ) )
+
+    configure( headless = False if args.window else None )
+    context = create_context()
+    from packed_gol_renderable import UnsupportedError
+
+    try:
+        gol, results = run(
+            tuple( args.size ),
+            args.generations,
+            args.rule,
+            args.boundary,
+            args.density,
+            args.seed,
+            args.pattern,
+            args.batch,
+            args.packed
+            )
+    except UnsupportedError as error:
+        # this GL can't run the board, which isn't a crash
+        sys.stderr.write( "%s\n" % error )
+        context.close()
+        return 2
+
+    if args.population:
+        # live cells only, as Generations rows hold their dying states
+        results[ 'population' ] = int( sum( numpy.count_nonzero( row == 1 ) for row in gol.read_rows() ) )
+
+    if args.save:
+        if args.save.endswith( '.ckpt' ):
+            gol.save_checkpoint( args.save )
+        else:
+            gol.save_pattern( args.save )
+        results[ 'saved' ] = args.save
+
+    print( json.dumps( results, indent = 2, sort_keys = True ) )
+    context.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit( main() )
@@ -1,6 +1,9 @@
+import io
 import math
 import time
 import random
+import os
+import sys
 from ctypes import *
 
 from pyglet.gl import *
@@ -13,27 +16,99 @@ from pygly.scene_node import SceneNode
 from pygly.camera_node import CameraNode
 from pygly.shader import Shader
 
+import boundaries
 from common import BaseApplication
 from gol_renderable import GOL_Renderable
+import packed_gol_renderable
+from packed_gol_renderable import PackedGOL_Renderable
+from checkpoint import PeriodicCheckpoint
+import board_statistics
+import shader_program
+import pattern_io
+from profiling import profiler
 
 
 class Application( BaseApplication ):
+    # rules to cycle through at runtime
+    rules = [
+        'B3/S23',
+        'B36/S23',
+        'B3678/S34678',
+        'B2/S/C3',
+        'R5,C0,M1,S34..58,B34..45,NM',
+        ]
+
+    # what the left mouse button does
+    tools = {
+        pyglet.window.key.V: 'pan',
+        pyglet.window.key.D: 'draw',
+        pyglet.window.key.X: 'erase',
+        pyglet.window.key.S: 'stamp',
+        }
+
+    # stamped until another pattern is given
+    glider = 'x = 3, y = 3\nbo$2bo$3o!'
     
-    def __init__( self ):
+    def __init__(
+        self,
+        checkpoint_filename = None,
+        checkpoint_every = 1000,
+        packed = False,
+        stamp_filename = None
+        ):
+        # we resume from and periodically save to the checkpoint
+        self.checkpoint_filename = checkpoint_filename
+        self.checkpoint_every = checkpoint_every
+
+        # pack 32 cells into each texel if the GPU can
+        self.packed = packed
+
+        # where F4 saves the profiler's trace
+        self.trace_filename = 'pygol_trace.json'
+
+        # the pattern placed by the stamp tool
+        self.stamp_filename = stamp_filename
+
         self.print_opengl_versions()
         
         super( Application, self ).__init__( "PyGLy - Conway's Game of Life" )
 
     def print_opengl_versions( self ):
         # get OpenGL version
-        print "OpenGL version", gl_info.get_version()        
+        print( "OpenGL version", gl_info.get_version() )
         
         # get GLSL version
-        plain = string_at(glGetString(GL_SHADING_LANGUAGE_VERSION)).split(' ')[0]
-        major, minor = map(int, plain.split('.'))
+        # the driver returns bytes, eg. b'4.60 NVIDIA'
+        plain = string_at( glGetString( GL_SHADING_LANGUAGE_VERSION ) ).decode( 'ascii', 'replace' ).split( ' ' )[ 0 ]
+        major, minor = [ int( value ) for value in plain.split( '.' )[ :2 ] ]
         version = major * 100 + minor
-        print "GLSL Version", version
+        print( "GLSL Version", version )
         
+    def setup_input( self ):
+        super( Application, self ).setup_input()
+
+        # drag the board with the mouse
+        # or edit it with the left button and a tool
+        self.dragging = False
+        self.editing = False
+        self.tool = 'pan'
+        self.mouse.digital.push_handlers(
+            on_digital_input = self.on_mouse_event
+            )
+
+        # the last cell a stroke reached and any stamp to place
+        self.last_cell = None
+        self.stamp_pending = False
+
+        # zoom with the scroll wheel
+        # and track the pointer for editing
+        self.mouse_position = (0, 0)
+        self.window.push_handlers(
+            on_mouse_scroll = self.on_mouse_scroll,
+            on_mouse_motion = self.on_mouse_motion,
+            on_mouse_drag = self.on_mouse_drag
+            )
+
     def setup_camera( self ):
         super( Application, self ).setup_camera()
 
@@ -76,37 +151,186 @@ class Application( BaseApplication ):
         glGetIntegerv( GL_MAX_VIEWPORT_DIMS, max_viewport_size )
         
         max_viewport_size = (max_viewport_size[ 0 ], max_viewport_size[ 1 ])
-        print "Max viewport size", max_viewport_size
+        print( "Max viewport size", max_viewport_size )
         
         # make the GOL board
         # ensure it is a power of 2 for ou texture
         board_size = (2048, 2048)
-        if board_size > max_viewport_size:
-            board_size = max_viewport_size
-        
-        self.gol = GOL_Renderable( board_size )
+        if self.packed and packed_gol_renderable.is_supported():
+            # the FBOs are 32 times narrower than the board
+            max_board_size = (
+                max_viewport_size[ 0 ] * packed_gol_renderable.cells_per_texel,
+                max_viewport_size[ 1 ]
+                )
+            board_size = (
+                min( board_size[ 0 ], max_board_size[ 0 ] ),
+                min( board_size[ 1 ], max_board_size[ 1 ] )
+                )
+            self.gol = PackedGOL_Renderable( board_size )
+        else:
+            if board_size > max_viewport_size:
+                board_size = max_viewport_size
+            self.gol = GOL_Renderable( board_size )
         # add our renderable to the scene
         self.gol_node.add_child( self.gol )
         # add to our list of renderables
         self.renderables.append( self.gol )
 
+        # pan and zoom around the board
+        self.viewer = self.gol.enable_viewer()
+
+        # draw, erase and stamp cells
+        self.editor = self.gol.enable_editor()
+        if self.stamp_filename:
+            pattern = pattern_io.load_pattern( self.stamp_filename )
+        else:
+            pattern = pattern_io.read_rle( io.StringIO( self.glider ) )
+
+        # pattern rows run top down, the board's bottom up
+        self.editor.pattern = pattern[ ::-1 ]
+
+        # pause once the board settles into still lifes and oscillators
+        self.gol.enable_cycle_detection().push_handlers(
+            on_cycle = self.on_cycle
+            )
+
+        # the packed board can't be reduced for statistics
+        if board_statistics.is_supported() and not isinstance( self.gol, PackedGOL_Renderable ):
+            self.gol.enable_statistics()
+
+        if self.checkpoint_filename:
+            if os.path.exists( self.checkpoint_filename ):
+                self.gol.load_checkpoint( self.checkpoint_filename )
+            self.gol.checkpoint = PeriodicCheckpoint(
+                self.checkpoint_filename,
+                self.checkpoint_every,
+                self.gol.rule.name
+                )
+
     def update_mouse( self, dt ):
-        # USE MOUSE VALUES HERE
-        pass
+        # pan the board while a button is held
+        if self.dragging:
+            self.viewer.pan( *self.mouse.relative_position[ :2 ] )
+
+        # queue this frame's edits
+        # they're uploaded together when the board is next rendered
+        cell = self.viewer.cell_at( *self.mouse_position )
+        if self.editing and self.tool in ( 'draw', 'erase' ):
+            self.editor.line( self.last_cell or cell, cell, self.tool == 'draw' )
+            self.last_cell = cell
+        if self.stamp_pending:
+            self.editor.stamp( *cell )
+            self.stamp_pending = False
 
         # reset the relative position of the mouse
         super( Application, self ).update_mouse( dt )
 
+    def on_mouse_event( self, digital, event, button ):
+        # the left button uses the current tool
+        # any other button always pans
+        if button == pyglet.window.mouse.LEFT and self.tool != 'pan':
+            self.editing = event == 'down'
+            self.last_cell = None
+            if event == 'down' and self.tool == 'stamp':
+                self.stamp_pending = True
+        else:
+            self.dragging = event == 'down'
+
+    def on_mouse_motion( self, x, y, dx, dy ):
+        self.mouse_position = (x, y)
+
+    def on_mouse_drag( self, x, y, dx, dy, buttons, modifiers ):
+        self.mouse_position = (x, y)
+
+    def on_mouse_scroll( self, x, y, scroll_x, scroll_y ):
+        self.viewer.zoom_at( 1.25 ** scroll_y, x, y )
+
     def on_key_event( self, digital, event, key ):
-        # HANDLE KEYBOARD INPUT HERE
-        pass
+        # arrows pan, +/- zoom, home fits the board
+        # and 'm' switches between maximum and average density
+        self.viewer.on_key_event( event, key )
+
+        # cycle through our rules with 'r'
+        # the board carries on under the new rule
+        if event == 'down' and key == pyglet.window.key.R:
+            index = self.rules.index( self.gol.rule.name ) if self.gol.rule.name in self.rules else -1
+            rule = self.rules[ ( index + 1 ) % len( self.rules ) ]
+            try:
+                self.gol.set_rule( rule )
+            except ValueError as error:
+                print( error )
+            else:
+                print( "Rule %s" % self.gol.rule.name )
+
+        # pause and resume with 'p'
+        if event == 'down' and key == pyglet.window.key.P:
+            self.gol.scheduler.paused = not self.gol.scheduler.paused
+            if self.gol.cycle_detector:
+                self.gol.cycle_detector.reset()
+
+        # choose the left button's tool with 'v', 'd', 'x' and 's'
+        # for pan, draw, erase and stamp
+        # '[' and ']' change the brush size
+        if event == 'down' and key in self.tools:
+            self.tool = self.tools[ key ]
+            self.editing = False
+        if event == 'down' and key == pyglet.window.key.BRACKETLEFT:
+            self.editor.brush_size = max( self.editor.brush_size - 1, 1 )
+        if event == 'down' and key == pyglet.window.key.BRACKETRIGHT:
+            self.editor.brush_size += 1
+
+        # show per stage timings with F3
+        # and save them as a trace with F4
+        if event == 'down' and key == pyglet.window.key.F3:
+            profiler.enable( not profiler.enabled )
+        if event == 'down' and key == pyglet.window.key.F4:
+            profiler.write_trace( self.trace_filename )
+            print( "Wrote %d events to %s" % (len( profiler.events ), self.trace_filename) )
+
+        # cycle through the boundaries with 'b'
+        if event == 'down' and key == pyglet.window.key.B:
+            index = boundaries.modes.index( self.gol.boundary )
+            self.gol.set_boundary( boundaries.modes[ ( index + 1 ) % len( boundaries.modes ) ] )
+            print( "Boundary %s" % self.gol.boundary )
+
+    def on_cycle( self, generation, period ):
+        print( "Repeating every %d generations from %d, paused" % (period, generation - period) )
+        self.gol.scheduler.paused = True
 
     def update_scene( self, dt ):
-        # rotate the GOL board
-        self.gol_node.transform.object.rotate_y( dt * 0.3 )
+        # apply any held pan / zoom keys
+        self.viewer.update( dt )
         
         # add the delta to the accumulated time
-        self.gol.dt += dt
+        self.gol.scheduler.update( dt )
+
+        self.update_help_label()
+
+    def update_help_label( self ):
+        text = "<b>Game of Life</b> %s, %s<br>Generation %d" % (
+            self.gol.rule.name,
+            self.gol.boundary,
+            self.gol.generation
+            )
+
+        text += "<br>Tool %s, brush %d" % (self.tool, self.editor.brush_size)
+
+        statistics = self.gol.statistics and self.gol.statistics.latest
+        if statistics:
+            text += "<br>Population %(population)d, births %(births)d, deaths %(deaths)d" % statistics
+            box = self.gol.statistics.bounding_box
+            if box:
+                text += "<br>Bounding box %d,%d to %d,%d" % box
+
+        text += "<br>GL calls %d, skipped %d" % (
+            shader_program.counter.last_calls,
+            shader_program.counter.last_skipped
+            )
+
+        # only relayout the label when it changes
+        text = '<font color="white">%s</font>' % text
+        if self.help_label.text != text:
+            self.help_label.text = text
 
     def render_3d( self ):
         # enable z buffer
@@ -140,9 +364,23 @@ class Application( BaseApplication ):
 
 
 def main():
+    # an optional checkpoint file to resume from and save to
+    checkpoint_filename = None
+    if len( sys.argv ) > 1:
+        checkpoint_filename = sys.argv[ 1 ]
+
+    # and an optional pattern for the stamp tool
+    stamp_filename = None
+    if len( sys.argv ) > 2:
+        stamp_filename = sys.argv[ 2 ]
+
     # create app
-    app = Application()
+    app = Application( checkpoint_filename, stamp_filename = stamp_filename )
     app.run()
+
+    # save our progress while we still have a GL context
+    if app.gol.checkpoint:
+        app.gol.checkpoint.save( app.gol )
     app.window.close()
 
 
@@ -0,0 +1,106 @@
+import numpy
+
+import boundaries
+
+
+def board_from_rgba( data, dimensions, format_size = 4 ):
+    # wrap the texture data without copying it
+    # this accepts anything supporting the buffer protocol
+    rgba = numpy.frombuffer( data, dtype = numpy.uint8 )
+    rgba = rgba.reshape( dimensions[ 1 ], dimensions[ 0 ], format_size )
+
+    # the shader only ever looks at the red channel
+    # any non-zero value is a live cell
+    return ( rgba[ :, :, 0 ] != 0 ).astype( numpy.uint8 )
+
+
+def board_to_rgba( board, format_size = 4 ):
+    # expand our board to the layout used by the textures
+    # R is 255 for live cells, GB are 0 and A is 255
+    height, width = board.shape
+    rgba = numpy.zeros( (height, width, format_size), dtype = numpy.uint8 )
+    numpy.multiply( board, 255, out = rgba[ :, :, 0 ], casting = 'unsafe' )
+    if format_size > 3:
+        rgba[ :, :, 3 ] = 255
+
+    # flatten the array
+    return rgba.reshape( -1 )
+
+
+def sum_rows( src, out, boundary = boundaries.torus ):
+    # sum each row with the rows above and below it
+    # by default the board is a torus, like the shader's GL_REPEAT lookups
+    out[ ... ] = src
+    boundaries.add_rows( src, out, 1, boundary )
+    boundaries.add_rows( src, out, -1, boundary )
+
+
+def sum_columns( src, out, boundary = boundaries.torus ):
+    # sum each column with the columns either side of it
+    out[ ... ] = src
+    boundaries.add_columns( src, out, 1, boundary )
+    boundaries.add_columns( src, out, -1, boundary )
+
+
+def apply_rules( board, totals, out ):
+    # totals include the cell itself
+    # so B3 / S23 becomes
+    # total == 3, or total == 4 and the cell is alive
+    numpy.equal( totals, 4, out = out )
+    out &= board
+    out |= ( totals == 3 )
+
+
+class NumpyEngine( object ):
+
+    def __init__( self, board, boundary = boundaries.torus ):
+        super( NumpyEngine, self ).__init__()
+
+        self.generation = 0
+        self.boundary = boundaries.check( boundary )
+
+        # we ping-pong between two boards like the FBOs do
+        self.front = numpy.array( board, dtype = numpy.uint8 )
+        self.back = numpy.empty_like( self.front )
+
+        # scratch buffers for neighbour counting
+        # kept around so we don't allocate each generation
+        self.rows = numpy.empty_like( self.front )
+        self.totals = numpy.empty_like( self.front )
+
+    def step( self, generations = 1 ):
+        for generation in range( generations ):
+            # count the 3x3 neighbourhood of each cell
+            sum_rows( self.front, self.rows, self.boundary )
+            sum_columns( self.rows, self.totals, self.boundary )
+
+            # write the next generation into our back buffer
+            apply_rules( self.front, self.totals, self.back )
+
+            # switch boards around
+            self.front, self.back = self.back, self.front
+            self.generation += 1
+
+        return self.front
+
+    @property
+    def board( self ):
+        return self.front
+
+    @property
+    def dimensions( self ):
+        return (self.width, self.height)
+
+    @property
+    def width( self ):
+        return self.front.shape[ 1 ]
+
+    @property
+    def height( self ):
+        return self.front.shape[ 0 ]
+
+
+def step( board, generations = 1, boundary = boundaries.torus ):
+    # step a copy of the board, leaving the original untouched
+    engine = NumpyEngine( board, boundary )
+    return engine.step( generations )
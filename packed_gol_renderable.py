@@ -0,0 +1,361 @@
+from pyglet.gl import *
+import numpy
+
+from pygly.shader import Shader
+
+from gol_renderable import GOL_Renderable, band_starts
+from pbo_readback import PBOReadback
+from shader_program import ShaderProgram
+from shader_generated_texture import ShaderGeneratedTexture
+from board_viewer import BoardViewer
+import board_seeder
+import boundaries
+import rules
+
+
+# each RGBA8 texel holds a row of 32 cells
+# cell 8c + i is bit i of channel c
+cells_per_texel = 32
+
+
+class UnsupportedError( RuntimeError ):
+    # this GL can't run packed boards
+    pass
+
+
+def is_supported():
+    # we need integer and bitwise operations from GLSL 1.30
+    return gl_info.have_version( 3, 0 )
+
+
+def pack_rows( rows ):
+    # pack 0 / 1 rows into RGBA texel bytes
+    return numpy.packbits( rows != 0, axis = 1, bitorder = 'little' )
+
+
+def unpack_rows( data ):
+    return numpy.unpackbits( data, axis = 1, bitorder = 'little' )
+
+
+class PackedReadback( PBOReadback ):
+    # reads the RGBA8 texels of a packed board
+    # and unpacks them to one byte per cell
+    pixel_format = GL_RGBA
+
+    def row_size( self, width ):
+        return width // cells_per_texel * 4
+
+    def decode( self, data ):
+        return unpack_rows( data )
+
+
+class PackedGOL_Renderable( GOL_Renderable ):
+    vertex_shader = """
+#version 130
+
+// projection * modelview, or identity for the simulation
+uniform mat4 transform;
+
+void main()
+{
+    gl_Position    = transform * gl_Vertex;
+    gl_FrontColor  = gl_Color;
+    gl_TexCoord[0] = gl_MultiTexCoord0;
+}
+"""
+
+    fragment_shader = """
+#version 130
+
+// inputs
+uniform sampler2D tex0;
+
+// boundary constants
+
+// mirror the bits of a word
+uint reverse( uint word )
+{
+    word = ( ( word >> 1u ) & 0x55555555u ) | ( ( word & 0x55555555u ) << 1u );
+    word = ( ( word >> 2u ) & 0x33333333u ) | ( ( word & 0x33333333u ) << 2u );
+    word = ( ( word >> 4u ) & 0x0F0F0F0Fu ) | ( ( word & 0x0F0F0F0Fu ) << 4u );
+    word = ( ( word >> 8u ) & 0x00FF00FFu ) | ( ( word & 0x00FF00FFu ) << 8u );
+    return ( word >> 16u ) | ( word << 16u );
+}
+
+// fetch a texel as a 32 bit word of cells
+// texels past the edge are mapped by the boundary
+// using arithmetic rather than branches
+uint fetch( ivec2 texel, ivec2 size )
+{
+    // on a Klein bottle crossing the top or bottom edge mirrors the row
+    uint flip = klein * uint( texel.y < 0 || texel.y >= size.y );
+    texel.x += int( flip ) * ( size.x - 1 - 2 * texel.x );
+
+    ivec2 wrapped = ( texel + size ) % size;
+    uvec4 bytes = uvec4( texelFetch( tex0, wrapped, 0 ) * 255.0 + 0.5 );
+    uint word = bytes.r | ( bytes.g << 8u ) | ( bytes.b << 16u ) | ( bytes.a << 24u );
+
+    // a mirrored texel also has its cells in reverse
+    word ^= ( word ^ reverse( word ) ) & ( 0u - flip );
+
+    // dead edges read nothing from past the board
+    uint inside = uint( all( equal( texel, wrapped ) ) );
+    return word * max( inside, 1u - dead_edges );
+}
+
+// move each cell's western neighbour into its bit
+uint west( ivec2 texel, ivec2 size, uint centre )
+{
+    return ( centre << 1u ) | ( fetch( texel + ivec2( -1, 0 ), size ) >> 31u );
+}
+
+// move each cell's eastern neighbour into its bit
+uint east( ivec2 texel, ivec2 size, uint centre )
+{
+    return ( centre >> 1u ) | ( fetch( texel + ivec2( 1, 0 ), size ) << 31u );
+}
+
+void main()
+{
+    ivec2 size = textureSize( tex0, 0 );
+    ivec2 texel = ivec2( gl_FragCoord.xy );
+
+    ivec2 below = texel + ivec2( 0, -1 );
+    ivec2 above = texel + ivec2( 0, 1 );
+
+    uint centre = fetch( texel, size );
+    uint centre_below = fetch( below, size );
+    uint centre_above = fetch( above, size );
+
+    // horizontal sums as 2 bit numbers
+    // west + east for our own row
+    uint w = west( texel, size, centre );
+    uint e = east( texel, size, centre );
+    uint mid0 = w ^ e;
+    uint mid1 = w & e;
+
+    // west + centre + east for the rows above and below
+    w = west( below, size, centre_below );
+    e = east( below, size, centre_below );
+    uint below0 = w ^ e ^ centre_below;
+    uint below1 = ( w & e ) | ( ( w ^ e ) & centre_below );
+
+    w = west( above, size, centre_above );
+    e = east( above, size, centre_above );
+    uint above0 = w ^ e ^ centre_above;
+    uint above1 = ( w & e ) | ( ( w ^ e ) & centre_above );
+
+    // add the three rows with full adders
+    uint sum0 = above0 ^ below0 ^ mid0;
+    uint carry0 = ( above0 & below0 ) | ( mid0 & ( above0 ^ below0 ) );
+
+    uint partial = above1 ^ below1 ^ mid1;
+    uint carry1 = ( above1 & below1 ) | ( mid1 & ( above1 ^ below1 ) );
+    uint sum1 = partial ^ carry0;
+    uint carry2 = partial & carry0;
+
+    // a count of 8 wraps to 0, which dies either way
+    uint sum2 = carry1 ^ carry2;
+
+    // B3 / S23 is a count of 2 or 3 where
+    // either bit 0 is set or the cell is alive
+    uint next = sum1 & ~sum2 & ( sum0 | centre );
+
+    gl_FragColor = vec4(
+        float( next & 255u ),
+        float( ( next >> 8u ) & 255u ),
+        float( ( next >> 16u ) & 255u ),
+        float( next >> 24u )
+        ) / 255.0;
+}
+"""
+
+    display_fragment_shader = """
+#version 130
+
+// inputs
+uniform sampler2D tex0;
+uniform vec4 live_colour;
+uniform vec4 dead_colour;
+
+void main()
+{
+    ivec2 size = textureSize( tex0, 0 );
+    ivec2 cells = ivec2( size.x * 32, size.y );
+
+    // find the cell under this fragment
+    // wrapping around the board
+    ivec2 cell = clamp(
+        ivec2( mod( floor( gl_TexCoord[0].xy * vec2( cells ) ), vec2( cells ) ) ),
+        ivec2( 0 ),
+        cells - 1
+        );
+
+    // and extract its bit from the texel
+    vec4 bytes = texelFetch( tex0, ivec2( cell.x / 32, cell.y ), 0 ) * 255.0 + 0.5;
+    int bit = cell.x % 32;
+    uint value = uint( bytes[ bit / 8 ] );
+    float alive = float( ( value >> uint( bit % 8 ) ) & 1u );
+
+    gl_FragColor = mix( dead_colour, live_colour, alive );
+}
+"""
+
+    def __init__(
+        self,
+        dimensions,
+        scheduler = None,
+        density = 0.5,
+        seed = None,
+        boundary = boundaries.torus
+        ):
+        if not is_supported():
+            raise UnsupportedError( "Packed boards need GL 3.0" )
+        if dimensions[ 0 ] % cells_per_texel:
+            raise ValueError(
+                "Board width must be a multiple of %d" % cells_per_texel
+                )
+        self.board_dimensions = tuple( dimensions )
+
+        # unpacked rows of the current generation, so edits
+        # only read back the rows they haven't touched yet
+        # row -> cells, valid while the generation is unchanged
+        self.mirror = {}
+        self.mirror_generation = None
+
+        super( PackedGOL_Renderable, self ).__init__(
+            dimensions,
+            scheduler,
+            density,
+            seed,
+            GL_RGBA8,
+            boundary = boundary
+            )
+
+    def create_program( self, rule ):
+        # the bitwise kernel only implements B3/S23
+        if rule != rules.parse_rule( 'B3/S23' ):
+            raise ValueError( "Packed boards only support B3/S23, not %s" % rule.name )
+        if not hasattr( self, 'packed_shaders' ):
+            self.packed_shaders = {}
+        if self.boundary not in self.packed_shaders:
+            self.packed_shaders[ self.boundary ] = ShaderProgram( Shader(
+                vert = self.vertex_shader,
+                frag = self.fragment_source( self.boundary )
+                ) )
+        return self.packed_shaders[ self.boundary ], None
+
+    def fragment_source( self, boundary ):
+        # the boundary is folded into constants
+        # which the compiler reduces away
+        constants = '\n'.join( [
+            'const uint dead_edges = %du;' % int( boundary == boundaries.dead ),
+            'const uint klein = %du;' % int( boundary == boundaries.klein ),
+            ] )
+        return self.fragment_shader.replace( '// boundary constants', constants )
+
+    def create_texture( self, dimensions, density, seed, internal_format ):
+        # our textures are 32 times narrower than the board
+        texels = (dimensions[ 0 ] // cells_per_texel, dimensions[ 1 ])
+        texture = ShaderGeneratedTexture(
+            self.shader,
+            texels,
+            internal_format = internal_format
+            )
+
+        board = board_seeder.seed_board( dimensions, density, seed )
+        self.upload_texels( texture, pack_rows( board ), 0, 0 )
+        return texture
+
+    def upload_texels( self, texture, data, x, y ):
+        data = numpy.ascontiguousarray( data )
+        glBindTexture( texture.texture.target, texture.texture.id )
+        glPixelStorei( GL_UNPACK_ALIGNMENT, 1 )
+        glTexSubImage2D(
+            texture.texture.target,
+            0,
+            x, y,
+            data.shape[ 1 ] // 4, data.shape[ 0 ],
+            GL_RGBA,
+            GL_UNSIGNED_BYTE,
+            data.ctypes.data
+            )
+        glBindTexture( texture.texture.target, 0 )
+
+    def read_texels( self, x, y, width, height ):
+        data = numpy.empty( (height, width * 4), dtype = numpy.uint8 )
+        self.texture.fbo1.bind()
+        glPixelStorei( GL_PACK_ALIGNMENT, 1 )
+        glReadPixels( x, y, width, height, GL_RGBA, GL_UNSIGNED_BYTE, data.ctypes.data )
+        self.texture.fbo1.unbind()
+        return data
+
+    def read_rows( self, band_size = 256, top_down = False ):
+        # read the board back a band of rows at a time
+        # 32 times less data than an unpacked board
+        width, height = self.texture.dimensions
+        for bottom in band_starts( height, band_size, top_down ):
+            rows = min( band_size, height - bottom )
+            band = unpack_rows( self.read_texels( 0, bottom, width, rows ) )
+            for row in ( band[ ::-1 ] if top_down else band ):
+                yield row
+
+    def mirrored_rows( self, bottom, top ):
+        # the cells of rows bottom to top, from the mirror
+        # reading any we don't have in one go
+        if self.mirror_generation != self.generation:
+            self.mirror = {}
+            self.mirror_generation = self.generation
+
+        missing = [ row for row in range( bottom, top ) if row not in self.mirror ]
+        if missing:
+            first, last = missing[ 0 ], missing[ -1 ] + 1
+            band = unpack_rows( self.read_texels( 0, first, self.texture.dimensions[ 0 ], last - first ) )
+            for row in missing:
+                self.mirror[ row ] = band[ row - first ]
+        return numpy.array( [ self.mirror[ row ] for row in range( bottom, top ) ] )
+
+    def write_rectangles( self, board, rectangles, x, y ):
+        # texels hold 32 cells, so change the cells in the
+        # mirrored rows and upload the texels they span at once
+        if not rectangles:
+            return
+
+        self.board_changed()
+        bottom = y + min( rectangle[ 1 ] for rectangle in rectangles )
+        top = y + max( rectangle[ 3 ] for rectangle in rectangles )
+        left = x + min( rectangle[ 0 ] for rectangle in rectangles )
+        right = x + max( rectangle[ 2 ] for rectangle in rectangles )
+
+        cells = self.mirrored_rows( bottom, top )
+        for x0, y0, x1, y1 in rectangles:
+            cells[ y + y0 - bottom:y + y1 - bottom, x + x0:x + x1 ] = board[ y0:y1, x0:x1 ] != 0
+        for row in range( bottom, top ):
+            self.mirror[ row ] = cells[ row - bottom ]
+
+        texel_left = left // cells_per_texel
+        texel_right = ( right + cells_per_texel - 1 ) // cells_per_texel
+        self.upload_texels(
+            self.texture,
+            pack_rows( cells[ :, texel_left * cells_per_texel:texel_right * cells_per_texel ] ),
+            texel_left,
+            bottom
+            )
+
+    def enable_viewer( self ):
+        # the density pyramid expects one byte per cell
+        # so zoomed out views sample the packed board directly
+        self.viewer = BoardViewer( self.dimensions, pyramid = False )
+        return self.viewer
+
+    def enable_statistics( self, every = 1, log_filename = None ):
+        raise ValueError( "GPU statistics expect one byte per cell" )
+
+    def enable_readback( self, buffers = 3 ):
+        # 32 times less to read than an unpacked board
+        self.readback = PackedReadback( self.dimensions, buffers )
+        return self.readback
+
+    @property
+    def dimensions( self ):
+        return self.board_dimensions
@@ -0,0 +1,230 @@
+import numpy
+
+import numpy_engine
+
+
+# the tile and its 8 neighbours
+neighbourhood = [
+    (dx, dy)
+    for dy in ( -1, 0, 1 )
+    for dx in ( -1, 0, 1 )
+    ]
+
+
+class PagedEngine( object ):
+    # an unbounded board made of fixed size tiles
+    # tiles are keyed by their coordinate, allocated when
+    # activity reaches them and freed when they empty
+    # unlike the other engines the board does not wrap
+
+    def __init__( self, board = None, tile_size = 64, x = 0, y = 0 ):
+        super( PagedEngine, self ).__init__()
+
+        self.generation = 0
+        self.tile_size = tile_size
+
+        # ( tile x, tile y ) -> tile_size x tile_size cells
+        self.tiles = {}
+
+        # tiles that may change next generation
+        self.active = set()
+
+        # a shared tile standing in for any missing one
+        self.empty = numpy.zeros( (tile_size, tile_size), dtype = numpy.uint8 )
+
+        if board is not None:
+            self.write_region( board, x, y )
+
+    def tile_range( self, start, length ):
+        size = self.tile_size
+        return range( start // size, ( start + length + size - 1 ) // size )
+
+    def write_region( self, board, x, y ):
+        # copy a block of cells onto the board at x, y
+        board = numpy.asarray( board ) != 0
+        height, width = board.shape
+        size = self.tile_size
+
+        for ty in self.tile_range( y, height ):
+            for tx in self.tile_range( x, width ):
+                # the part of the block inside this tile
+                left, bottom = max( tx * size, x ), max( ty * size, y )
+                right = min( ( tx + 1 ) * size, x + width )
+                top = min( ( ty + 1 ) * size, y + height )
+
+                key = (tx, ty)
+                tile = self.tiles.get( key )
+                if tile is None:
+                    tile = numpy.zeros( (size, size), dtype = numpy.uint8 )
+                tile[
+                    bottom - ty * size:top - ty * size,
+                    left - tx * size:right - tx * size
+                    ] = board[ bottom - y:top - y, left - x:right - x ]
+
+                if tile.any():
+                    self.tiles[ key ] = tile
+                else:
+                    self.tiles.pop( key, None )
+                self.activate( key )
+
+    def read_region( self, x, y, width, height ):
+        # copy a block of cells off the board
+        out = numpy.zeros( (height, width), dtype = numpy.uint8 )
+        size = self.tile_size
+        for ty in self.tile_range( y, height ):
+            for tx in self.tile_range( x, width ):
+                tile = self.tiles.get( (tx, ty) )
+                if tile is None:
+                    continue
+
+                left, bottom = max( tx * size, x ), max( ty * size, y )
+                right = min( ( tx + 1 ) * size, x + width )
+                top = min( ( ty + 1 ) * size, y + height )
+                out[ bottom - y:top - y, left - x:right - x ] = tile[
+                    bottom - ty * size:top - ty * size,
+                    left - tx * size:right - tx * size
+                    ]
+        return out
+
+    def activate( self, key, changes = None ):
+        # a change can affect the tile and its neighbours
+        # but only neighbours next to a changed edge cell
+        tx, ty = key
+        if changes is None:
+            for dx, dy in neighbourhood:
+                self.active.add( (tx + dx, ty + dy) )
+            return
+
+        self.active.add( key )
+        rows = ( changes[ 0 ].any(), True, changes[ -1 ].any() )
+        columns = ( changes[ :, 0 ].any(), True, changes[ :, -1 ].any() )
+        corners = {
+            (-1, -1): changes[ 0, 0 ],
+            (1, -1): changes[ 0, -1 ],
+            (-1, 1): changes[ -1, 0 ],
+            (1, 1): changes[ -1, -1 ],
+            }
+        for dx, dy in neighbourhood:
+            if dx and dy:
+                edge = corners[ (dx, dy) ]
+            else:
+                edge = rows[ dy + 1 ] and columns[ dx + 1 ]
+            if edge:
+                self.active.add( (tx + dx, ty + dy) )
+
+    def gather( self, keys ):
+        # batch the tiles with a 1 cell halo
+        # taken from the edges of the neighbouring tiles
+        size = self.tile_size
+        tiles = self.tiles
+        empty = self.empty
+
+        padded = numpy.empty( (len( keys ), size + 2, size + 2), dtype = numpy.uint8 )
+        for index, (tx, ty) in enumerate( keys ):
+            below = tiles.get( (tx, ty - 1), empty )
+            above = tiles.get( (tx, ty + 1), empty )
+            west = tiles.get( (tx - 1, ty), empty )
+            east = tiles.get( (tx + 1, ty), empty )
+
+            out = padded[ index ]
+            out[ 1:-1, 1:-1 ] = tiles.get( (tx, ty), empty )
+            out[ 0, 1:-1 ] = below[ -1 ]
+            out[ -1, 1:-1 ] = above[ 0 ]
+            out[ 1:-1, 0 ] = west[ :, -1 ]
+            out[ 1:-1, -1 ] = east[ :, 0 ]
+            out[ 0, 0 ] = tiles.get( (tx - 1, ty - 1), empty )[ -1, -1 ]
+            out[ 0, -1 ] = tiles.get( (tx + 1, ty - 1), empty )[ -1, 0 ]
+            out[ -1, 0 ] = tiles.get( (tx - 1, ty + 1), empty )[ 0, -1 ]
+            out[ -1, -1 ] = tiles.get( (tx + 1, ty + 1), empty )[ 0, 0 ]
+        return padded
+
+    def step( self, generations = 1 ):
+        for generation in range( generations ):
+            keys = list( self.active )
+            self.active = set()
+            if not keys:
+                # nothing can change any more
+                self.generation += generations - generation
+                break
+
+            # count neighbourhoods for the whole batch at once
+            padded = self.gather( keys )
+            totals = padded[ :, :-2 ] + padded[ :, 1:-1 ]
+            totals += padded[ :, 2: ]
+            columns = totals[ :, :, :-2 ] + totals[ :, :, 1:-1 ]
+            columns += totals[ :, :, 2: ]
+
+            current = padded[ :, 1:-1, 1:-1 ]
+            result = numpy.empty_like( current )
+            numpy_engine.apply_rules( current, columns, result )
+
+            changes = result != current
+            changed = changes.any( axis = ( 1, 2 ) )
+            alive = result.any( axis = ( 1, 2 ) )
+
+            # every tile has been computed from the old board
+            # so we can now update them in place
+            for index in numpy.nonzero( changed )[ 0 ]:
+                key = keys[ index ]
+                if alive[ index ]:
+                    tile = self.tiles.get( key )
+                    if tile is None:
+                        # activity has reached a new tile
+                        self.tiles[ key ] = result[ index ].copy()
+                    else:
+                        tile[ ... ] = result[ index ]
+                else:
+                    # the tile has emptied
+                    self.tiles.pop( key, None )
+                self.activate( key, changes[ index ] )
+
+            self.generation += 1
+
+    @property
+    def bounds( self ):
+        # the cells covered by allocated tiles
+        # as ( left, bottom, right, top )
+        if not self.tiles:
+            return (0, 0, 0, 0)
+        size = self.tile_size
+        xs = [ tx for tx, ty in self.tiles ]
+        ys = [ ty for tx, ty in self.tiles ]
+        return (
+            min( xs ) * size,
+            min( ys ) * size,
+            ( max( xs ) + 1 ) * size,
+            ( max( ys ) + 1 ) * size
+            )
+
+    @property
+    def origin( self ):
+        # the board coordinate of board[ 0, 0 ]
+        left, bottom, right, top = self.bounds
+        return (left, bottom)
+
+    @property
+    def board( self ):
+        # the cells within our bounds
+        left, bottom, right, top = self.bounds
+        return self.read_region( left, bottom, right - left, top - bottom )
+
+    @property
+    def population( self ):
+        return sum( int( tile.sum() ) for tile in self.tiles.values() )
+
+    @property
+    def nbytes( self ):
+        return len( self.tiles ) * self.empty.nbytes
+
+    @property
+    def stats( self ):
+        return {
+            'tiles': len( self.tiles ),
+            'active_tiles': len( self.active ),
+            'nbytes': self.nbytes,
+            }
+
+    @property
+    def dimensions( self ):
+        left, bottom, right, top = self.bounds
+        return (right - left, top - bottom)
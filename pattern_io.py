@@ -0,0 +1,365 @@
+import os
+import re
+
+import numpy
+
+from hashlife_engine import NodeTable, render_node, bounding_box
+
+
+# characters read from a pattern file at a time
+chunk_size = 1 << 16
+
+# maximum line length when writing RLE files
+line_length = 70
+
+default_rule = 'B3/S23'
+
+rle_header = re.compile(
+    r'x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?',
+    re.IGNORECASE
+    )
+rle_token = re.compile( r'(\d*)([^\d])' )
+rle_trailing_count = re.compile( r'\d+$' )
+whitespace = re.compile( r'\s+' )
+
+
+def set_run( board, row, column, count ):
+    # set a horizontal run of live cells, clipped to the board
+    height, width = board.shape
+    if not 0 <= row < height:
+        return
+    left = max( column, 0 )
+    right = min( column + count, width )
+    if left < right:
+        board[ row, left:right ] = 1
+
+
+def row_runs( row ):
+    # return the ( value, length ) runs of a row
+    # without any trailing dead cells
+    live = numpy.flatnonzero( row )
+    if not len( live ):
+        return []
+    row = row[ :live[ -1 ] + 1 ]
+
+    starts = numpy.concatenate( ( [ 0 ], numpy.flatnonzero( numpy.diff( row ) ) + 1 ) )
+    lengths = numpy.diff( numpy.concatenate( ( starts, [ len( row ) ] ) ) )
+    return list( zip( row[ starts ], lengths ) )
+
+
+def token( count, tag ):
+    if count == 1:
+        return tag
+    return '%d%s' % (count, tag)
+
+
+class LineWriter( object ):
+    # joins tokens into lines no longer than line_length
+
+    def __init__( self, stream ):
+        super( LineWriter, self ).__init__()
+
+        self.stream = stream
+        self.line = []
+        self.length = 0
+
+    def write( self, text ):
+        if self.length + len( text ) > line_length:
+            self.flush()
+        self.line.append( text )
+        self.length += len( text )
+
+    def flush( self ):
+        if self.line:
+            self.stream.write( ''.join( self.line ) + '\n' )
+        self.line = []
+        self.length = 0
+
+
+#
+# RLE
+#
+
+def read_rle_header( stream ):
+    # skip any comments and return ( width, height, rule )
+    while True:
+        line = stream.readline()
+        if not line:
+            raise ValueError( "Missing RLE header" )
+
+        line = line.strip()
+        if not line or line.startswith( '#' ):
+            continue
+
+        match = rle_header.match( line )
+        if not match:
+            raise ValueError( "Invalid RLE header: %s" % line )
+        width, height, rule = match.groups()
+        return int( width ), int( height ), rule or default_rule
+
+
+def read_rle( stream, board = None, x = 0, y = 0 ):
+    # decode an RLE pattern a chunk at a time
+    # live cells are set in 'board' with the pattern's top left at x, y
+    width, height, rule = read_rle_header( stream )
+    if board is None:
+        board = numpy.zeros( (height, width), dtype = numpy.uint8 )
+
+    row, column = y, x
+    carry = ''
+    while True:
+        chunk = stream.read( chunk_size )
+        data = carry + whitespace.sub( '', chunk )
+
+        # hold back a trailing run count
+        # its tag will be at the start of the next chunk
+        carry = ''
+        if chunk:
+            match = rle_trailing_count.search( data )
+            if match:
+                carry = match.group( 0 )
+                data = data[ :match.start() ]
+
+        for match in rle_token.finditer( data ):
+            count = int( match.group( 1 ) or 1 )
+            tag = match.group( 2 )
+            if tag == 'b' or tag == '.':
+                column += count
+            elif tag == '$':
+                row += count
+                column = x
+            elif tag == '!':
+                return board
+            else:
+                # 'o' and any multi-state tags are live cells
+                set_run( board, row, column, count )
+                column += count
+
+        if not chunk:
+            return board
+
+
+def write_rle_rows( stream, rows, dimensions, rule = default_rule ):
+    # write rows of cells as they arrive
+    # so the whole board never needs to be in memory
+    stream.write( 'x = %d, y = %d, rule = %s\n' % (dimensions[ 0 ], dimensions[ 1 ], rule) )
+
+    writer = LineWriter( stream )
+    row_ends = 0
+    for index, row in enumerate( rows ):
+        if index:
+            row_ends += 1
+
+        runs = row_runs( row )
+        if not runs:
+            continue
+
+        # merge any empty rows into a single run of row ends
+        if row_ends:
+            writer.write( token( row_ends, '$' ) )
+            row_ends = 0
+
+        for value, length in runs:
+            writer.write( token( length, 'o' if value else 'b' ) )
+
+    writer.write( '!' )
+    writer.flush()
+
+
+def write_rle( stream, board, rule = default_rule ):
+    height, width = board.shape
+    write_rle_rows( stream, board, (width, height), rule )
+
+
+#
+# plaintext
+#
+
+def read_plaintext( stream, board = None, x = 0, y = 0 ):
+    # plaintext has no header, so if we need to size
+    # the board we keep the rows until we reach the end
+    rows = []
+    row = y
+    for line in iter( stream.readline, '' ):
+        line = line.rstrip( '\r\n' )
+        if line.startswith( '!' ):
+            continue
+
+        cells = numpy.frombuffer( line.encode( 'ascii' ), dtype = numpy.uint8 )
+        cells = ( cells == ord( 'O' ) ) | ( cells == ord( '*' ) )
+        if board is None:
+            rows.append( cells )
+        else:
+            live = numpy.flatnonzero( cells )
+            for column in live:
+                set_run( board, row, x + column, 1 )
+        row += 1
+
+    if board is None:
+        width = max( [ len( cells ) for cells in rows ] + [ 0 ] )
+        board = numpy.zeros( (len( rows ), width), dtype = numpy.uint8 )
+        for index, cells in enumerate( rows ):
+            board[ index, :len( cells ) ] = cells
+    return board
+
+
+def write_plaintext_rows( stream, rows, dimensions = None, rule = None ):
+    # plaintext can't store a rule, it is always B3/S23
+    for row in rows:
+        line = numpy.where( row, ord( 'O' ), ord( '.' ) ).astype( numpy.uint8 )
+        stream.write( line.tobytes().decode( 'ascii' ) + '\n' )
+
+
+def write_plaintext( stream, board, rule = None ):
+    write_plaintext_rows( stream, board )
+
+
+#
+# Macrocell
+#
+
+def read_leaf( table, line ):
+    # an 8x8 leaf, rows separated by '$'
+    cells = numpy.zeros( (8, 8), dtype = numpy.uint8 )
+    for row, text in enumerate( line.split( '$' )[ :8 ] ):
+        for column, character in enumerate( text[ :8 ] ):
+            if character == '*':
+                cells[ row, column ] = 1
+    return table.from_cells( cells, 3 )
+
+
+def read_macrocell_node( stream, table ):
+    # decode the quadtree a line at a time
+    # returns the root node
+    header = stream.readline()
+    if not header.startswith( '[M2]' ):
+        raise ValueError( "Invalid Macrocell header" )
+
+    # node 0 is always empty
+    nodes = [ None ]
+    for line in iter( stream.readline, '' ):
+        line = line.strip()
+        if not line or line.startswith( '#' ):
+            continue
+
+        if line[ 0 ] in '.*$':
+            nodes.append( read_leaf( table, line ) )
+            continue
+
+        values = [ int( value ) for value in line.split() ]
+        level, children = values[ 0 ], values[ 1:5 ]
+        empty = table.empty( level - 1 )
+        nodes.append( table.join( *[
+            nodes[ child ] if child else empty
+            for child in children
+            ] ) )
+
+    if len( nodes ) < 2:
+        raise ValueError( "Macrocell file has no nodes" )
+    return nodes[ -1 ]
+
+
+def read_macrocell( stream, board = None, x = 0, y = 0 ):
+    root = read_macrocell_node( stream, NodeTable() )
+
+    # place the pattern's live cells, not the root, at x, y
+    box = bounding_box( root ) or (0, 0, 0, 0)
+    if board is None:
+        board = numpy.zeros( (box[ 3 ] - box[ 1 ], box[ 2 ] - box[ 0 ]), dtype = numpy.uint8 )
+    render_node( root, x - box[ 0 ], y - box[ 1 ], board )
+    return board
+
+
+def leaf_line( node ):
+    cells = numpy.zeros( (8, 8), dtype = numpy.uint8 )
+    render_node( node, 0, 0, cells )
+
+    rows = [
+        ''.join( '*' if cell else '.' for cell in row ).rstrip( '.' )
+        for row in cells
+        ]
+    while rows and not rows[ -1 ]:
+        rows.pop()
+    return ''.join( row + '$' for row in rows )
+
+
+def write_macrocell( stream, board, rule = default_rule ):
+    table = NodeTable()
+    root = table.from_board( board )
+
+    stream.write( '[M2] (PyGLy GOL)\n' )
+    stream.write( '#R %s\n' % rule )
+
+    # write each unique node once, children before parents
+    indices = {}
+
+    def write_node( node ):
+        if node.population == 0:
+            return 0
+        if node in indices:
+            return indices[ node ]
+
+        if node.level == 3:
+            line = leaf_line( node )
+        else:
+            children = [
+                write_node( child )
+                for child in ( node.nw, node.ne, node.sw, node.se )
+                ]
+            line = ' '.join( str( value ) for value in [ node.level ] + children )
+
+        stream.write( line + '\n' )
+        indices[ node ] = len( indices ) + 1
+        return indices[ node ]
+
+    # an empty board still needs a root
+    if write_node( root ) == 0:
+        stream.write( '$\n' )
+
+
+#
+# files
+#
+
+readers = {
+    'rle': read_rle,
+    'cells': read_plaintext,
+    'mc': read_macrocell,
+    }
+
+row_writers = {
+    'rle': write_rle_rows,
+    'cells': write_plaintext_rows,
+    }
+
+writers = {
+    'rle': write_rle,
+    'cells': write_plaintext,
+    'mc': write_macrocell,
+    }
+
+extensions = {
+    '.rle': 'rle',
+    '.cells': 'cells',
+    '.txt': 'cells',
+    '.mc': 'mc',
+    }
+
+
+def format_from_filename( filename ):
+    extension = os.path.splitext( filename )[ 1 ].lower()
+    if extension not in extensions:
+        raise ValueError( "Unknown pattern format: %s" % filename )
+    return extensions[ extension ]
+
+
+def load_pattern( filename, board = None, x = 0, y = 0 ):
+    reader = readers[ format_from_filename( filename ) ]
+    with open( filename, 'r' ) as stream:
+        return reader( stream, board, x, y )
+
+
+def save_pattern( filename, board, rule = default_rule ):
+    writer = writers[ format_from_filename( filename ) ]
+    with open( filename, 'w' ) as stream:
+        writer( stream, board, rule )
@@ -0,0 +1,169 @@
+import ctypes
+
+from pyglet.gl import *
+import pyglet
+import numpy
+
+import rules
+
+
+class PixelBuffer( object ):
+
+    def __init__( self, size ):
+        super( PixelBuffer, self ).__init__()
+
+        self.size = size
+        self.generation = None
+        self.fence = None
+
+        # allocate our buffer on the GPU
+        self.pbo = GLuint()
+        glGenBuffers( 1, ctypes.byref( self.pbo ) )
+        glBindBuffer( GL_PIXEL_PACK_BUFFER, self.pbo )
+        glBufferData( GL_PIXEL_PACK_BUFFER, size, None, GL_STREAM_READ )
+        glBindBuffer( GL_PIXEL_PACK_BUFFER, 0 )
+
+    def __del__( self ):
+        self.delete()
+
+    def delete( self ):
+        if self.pbo is not None:
+            glDeleteBuffers( 1, ctypes.byref( self.pbo ) )
+            self.pbo = None
+
+    def read( self, out ):
+        # copy the buffer into a numpy array
+        glBindBuffer( GL_PIXEL_PACK_BUFFER, self.pbo )
+        pointer = glMapBuffer( GL_PIXEL_PACK_BUFFER, GL_READ_ONLY )
+        if pointer:
+            data = ctypes.cast( pointer, ctypes.POINTER( GLubyte * self.size ) ).contents
+            numpy.copyto( out.reshape( -1 ), numpy.frombuffer( data, dtype = numpy.uint8 ) )
+        glUnmapBuffer( GL_PIXEL_PACK_BUFFER )
+        glBindBuffer( GL_PIXEL_PACK_BUFFER, 0 )
+        return bool( pointer )
+
+
+class PBOReadback( pyglet.event.EventDispatcher ):
+    # the channels we read back
+    pixel_format = GL_RED
+
+    def __init__( self, dimensions, buffers = 3, states = 2 ):
+        super( PBOReadback, self ).__init__()
+
+        self.dimensions = dimensions
+        self.states = states
+        width, height = dimensions
+
+        row_size = self.row_size( width )
+        self.buffers = [ PixelBuffer( row_size * height ) for i in range( buffers ) ]
+        self.data = [
+            numpy.empty( (height, row_size), dtype = numpy.uint8 )
+            for i in range( buffers )
+            ]
+        self.pending = []
+        self.next = 0
+
+        # fences let us check a read has finished without waiting
+        # without them we rely on the ring being a few frames deep
+        self.use_fences = gl_info.have_version( 3, 2 ) or gl_info.have_extension( 'GL_ARB_sync' )
+
+    def row_size( self, width ):
+        # one byte per cell, we only read back the red channel
+        return width
+
+    def decode( self, data ):
+        # texture bytes back to the states the CPU engines use
+        return rules.decode_board( data, self.states )
+
+    def delete( self ):
+        # free the buffers, abandoning any reads in flight
+        for buffer in self.pending:
+            if buffer.fence is not None:
+                glDeleteSync( buffer.fence )
+                buffer.fence = None
+        self.pending = []
+        for buffer in self.buffers:
+            buffer.delete()
+
+    def request( self, fbo, generation ):
+        # start an asynchronous read of an FBO's texture
+        # returns False if every buffer is still in flight
+        if len( self.pending ) == len( self.buffers ):
+            return False
+
+        buffer = self.buffers[ self.next ]
+        self.next = ( self.next + 1 ) % len( self.buffers )
+
+        fbo.bind()
+        glBindBuffer( GL_PIXEL_PACK_BUFFER, buffer.pbo )
+        glPixelStorei( GL_PACK_ALIGNMENT, 1 )
+
+        # with a PBO bound, the last argument is an offset into it
+        # and glReadPixels returns without waiting for the GPU
+        glReadPixels( 0, 0, fbo.width, fbo.height, self.pixel_format, GL_UNSIGNED_BYTE, 0 )
+
+        glBindBuffer( GL_PIXEL_PACK_BUFFER, 0 )
+        fbo.unbind()
+
+        if self.use_fences:
+            buffer.fence = glFenceSync( GL_SYNC_GPU_COMMANDS_COMPLETE, 0 )
+
+        buffer.generation = generation
+        self.pending.append( buffer )
+        return True
+
+    def is_ready( self, buffer ):
+        if buffer.fence is None:
+            # without fences, only read the oldest buffer
+            # once the ring has filled up
+            return len( self.pending ) == len( self.buffers )
+
+        status = glClientWaitSync( buffer.fence, 0, 0 )
+        return status in ( GL_ALREADY_SIGNALED, GL_CONDITION_SATISFIED )
+
+    def poll( self ):
+        # dispatch 'on_readback' for each finished read, oldest first
+        # the board is only valid until the handler returns
+        while self.pending and self.is_ready( self.pending[ 0 ] ):
+            buffer = self.pending.pop( 0 )
+            if buffer.fence is not None:
+                glDeleteSync( buffer.fence )
+                buffer.fence = None
+
+            data = self.data[ self.buffers.index( buffer ) ]
+            if buffer.read( data ):
+                self.dispatch_event( 'on_readback', buffer.generation, self.decode( data ) )
+
+PBOReadback.register_event_type( 'on_readback' )
+
+
+def main():
+    # cross check the GPU readback against the CPU engine
+    # this works without a visible window, and under Mesa's
+    # software rasteriser with LIBGL_ALWAYS_SOFTWARE=1
+    import numpy_engine
+    from gol_renderable import GOL_Renderable
+
+    window = pyglet.window.Window( width = 64, height = 64, visible = False )
+    gol = GOL_Renderable( (256, 256), seed = 0 )
+    initial = gol.read_board()
+
+    boards = {}
+    def on_readback( generation, board ):
+        boards[ generation ] = board.copy()
+
+    readback = gol.enable_readback()
+    readback.push_handlers( on_readback = on_readback )
+    for frame in range( 10 ):
+        gol.render_mesh()
+
+    for generation in sorted( boards ):
+        expected = numpy_engine.step( initial, generation )
+        matches = ( boards[ generation ] == expected ).all()
+        print( "generation %d: %s" % (generation, "ok" if matches else "MISMATCH") )
+
+    window.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import collections
+import ctypes
+import json
+import time
+
+from pyglet.gl import *
+import pyglet
+import numpy
+
+
+# GL_TIME_ELAPSED from GL 3.3 / ARB_timer_query
+# older pyglets don't define it
+TIME_ELAPSED = 0x88BF
+
+# the best clock we have, in seconds
+timer = getattr( time, 'perf_counter', time.time )
+
+# histogram bars, from empty to full
+bar_levels = ' .:-=+*#%@'
+
+
+def gpu_timers_supported():
+    return (
+        gl_info.have_version( 3, 3 ) or
+        gl_info.have_extension( 'GL_ARB_timer_query' ) or
+        gl_info.have_extension( 'GL_EXT_timer_query' )
+        )
+
+
+class Stage( object ):
+    # rolling windows of CPU and GPU times for one named stage
+    # times are in milliseconds
+
+    def __init__( self, name, history = 300 ):
+        super( Stage, self ).__init__()
+
+        self.name = name
+        self.cpu = collections.deque( maxlen = history )
+        self.gpu = collections.deque( maxlen = history )
+
+    def summary( self, samples ):
+        # mean, median, 95th percentile and maximum
+        if not samples:
+            return None
+        values = numpy.array( samples )
+        return (
+            values.mean(),
+            numpy.percentile( values, 50 ),
+            numpy.percentile( values, 95 ),
+            values.max()
+            )
+
+    def histogram( self, samples, bins = 20, limit = None ):
+        # counts of samples in equal width bins from 0 to 'limit' ms
+        # returns ( counts, bin edges )
+        values = numpy.array( samples )
+        if limit is None:
+            limit = values.max() if len( values ) else 1.0
+        return numpy.histogram( values, bins = bins, range = ( 0.0, max( limit, 1e-3 ) ) )
+
+
+def sparkline( counts ):
+    # a histogram as one character per bin
+    peak = max( counts ) or 1
+    top = len( bar_levels ) - 1
+    return ''.join( bar_levels[ int( round( count * top / float( peak ) ) ) ] for count in counts )
+
+
+class Section( object ):
+    # times the code in a 'with' block
+
+    def __init__( self, profiler, name, gpu ):
+        super( Section, self ).__init__()
+
+        self.profiler = profiler
+        self.name = name
+        self.gpu = gpu
+
+    def __enter__( self ):
+        self.profiler.begin( self.name, self.gpu )
+
+    def __exit__( self, type, value, traceback ):
+        self.profiler.end( self.name )
+
+
+class NullSection( object ):
+    # what section() returns while profiling is off
+
+    def __enter__( self ):
+        pass
+
+    def __exit__( self, type, value, traceback ):
+        pass
+
+null_section = NullSection()
+
+
+class Profiler( object ):
+    # CPU timers for nested stages, plus GL_TIME_ELAPSED queries
+    # for the stages that are marked as GPU work
+    # queries are read back frames later once their results are ready
+    # so we never wait on the GPU
+    # only one time elapsed query can run at once, so GPU stages
+    # mustn't nest
+
+    def __init__( self, history = 300, max_events = 200000 ):
+        super( Profiler, self ).__init__()
+
+        self.enabled = False
+        self.history = history
+        self.stages = collections.OrderedDict()
+
+        # the sections we're inside
+        self.open = []
+
+        # GPU queries in flight as ( stage, query, cpu start )
+        # and finished queries we can reuse
+        self.use_gpu = None
+        self.gpu_active = False
+        self.pending = collections.deque()
+        self.free_queries = []
+
+        # completed events for the trace file
+        self.events = collections.deque( maxlen = max_events )
+        self.start_time = timer()
+        self.frames = 0
+
+    def enable( self, enabled = True ):
+        self.enabled = enabled
+        if enabled and self.use_gpu is None:
+            self.use_gpu = gpu_timers_supported()
+
+    def section( self, name, gpu = False ):
+        # with profiler.section( 'simulate', gpu = True ): ...
+        if not self.enabled:
+            return null_section
+        return Section( self, name, gpu )
+
+    def stage( self, name ):
+        if name not in self.stages:
+            self.stages[ name ] = Stage( name, self.history )
+        return self.stages[ name ]
+
+    def begin( self, name, gpu = False ):
+        # stages are listed in the order they first start
+        self.stage( name )
+
+        query = None
+        if gpu and self.use_gpu and not self.gpu_active:
+            query = self.free_queries.pop() if self.free_queries else self.create_query()
+            glBeginQuery( TIME_ELAPSED, query )
+            self.gpu_active = True
+        self.open.append( (name, timer(), query) )
+
+    def end( self, name ):
+        open_name, start, query = self.open.pop()
+        assert open_name == name
+        elapsed = timer() - start
+
+        if query is not None:
+            glEndQuery( TIME_ELAPSED )
+            self.gpu_active = False
+            self.pending.append( (name, query, start) )
+
+        self.stage( name ).cpu.append( elapsed * 1000.0 )
+        self.events.append( {
+            'name': name,
+            'cat': 'cpu',
+            'ph': 'X',
+            'ts': ( start - self.start_time ) * 1e6,
+            'dur': elapsed * 1e6,
+            'pid': 1,
+            'tid': 1,
+            } )
+
+    def create_query( self ):
+        query = GLuint()
+        glGenQueries( 1, ctypes.byref( query ) )
+        return query.value
+
+    def frame( self ):
+        # call once a frame to collect finished GPU timings
+        if not self.enabled:
+            return
+        self.frames += 1
+        self.poll()
+
+    def poll( self ):
+        # queries finish in order, so stop at the first that isn't ready
+        if not self.pending:
+            return
+        available = GLint()
+        nanoseconds = GLuint()
+        while self.pending:
+            name, query, start = self.pending[ 0 ]
+            glGetQueryObjectiv( query, GL_QUERY_RESULT_AVAILABLE, ctypes.byref( available ) )
+            if not available.value:
+                break
+            self.pending.popleft()
+
+            glGetQueryObjectuiv( query, GL_QUERY_RESULT, ctypes.byref( nanoseconds ) )
+            self.free_queries.append( query )
+
+            # GPU events go on their own track, placed at
+            # the time the work was submitted
+            self.stage( name ).gpu.append( nanoseconds.value / 1e6 )
+            self.events.append( {
+                'name': name,
+                'cat': 'gpu',
+                'ph': 'X',
+                'ts': ( start - self.start_time ) * 1e6,
+                'dur': nanoseconds.value / 1e3,
+                'pid': 1,
+                'tid': 2,
+                } )
+
+    def report( self, bins = 16 ):
+        # a line per stage of mean / p95 CPU and GPU milliseconds
+        # and a histogram of the CPU times up to their maximum
+        lines = [ '%-14s %15s %15s  %s' % ('stage', 'cpu mean/p95', 'gpu mean/p95', 'cpu 0..max') ]
+        for stage in self.stages.values():
+            columns = []
+            for samples in ( stage.cpu, stage.gpu ):
+                summary = stage.summary( samples )
+                columns.append( '%6.2f / %6.2f' % (summary[ 0 ], summary[ 2 ]) if summary else '-' )
+            counts, edges = stage.histogram( stage.cpu, bins )
+            lines.append( '%-14s %15s %15s  |%s| %.2f' % (
+                stage.name,
+                columns[ 0 ],
+                columns[ 1 ],
+                sparkline( counts ),
+                edges[ -1 ]
+                ) )
+        return lines
+
+    def write_trace( self, filename ):
+        # the Trace Event format read by chrome://tracing and Perfetto
+        metadata = [
+            { 'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 1, 'args': { 'name': 'CPU' } },
+            { 'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 2, 'args': { 'name': 'GPU' } },
+            ]
+        with open( filename, 'w' ) as stream:
+            json.dump( { 'traceEvents': metadata + list( self.events ) }, stream )
+
+
+# shared by the application and everything it renders
+profiler = Profiler()
+
+
+class ProfilerDisplay( object ):
+    # the profiler's report in the top left of a window
+    # the label is only rebuilt a few times a second
+
+    def __init__( self, profiler, window, interval = 0.5 ):
+        super( ProfilerDisplay, self ).__init__()
+
+        self.profiler = profiler
+        self.window = window
+        self.interval = interval
+        self.updated = None
+        self.label = pyglet.text.Label(
+            '',
+            font_name = 'Courier New',
+            font_size = 10,
+            multiline = True,
+            width = 600,
+            x = 10,
+            y = window.height - 10,
+            anchor_x = 'left',
+            anchor_y = 'top',
+            color = (255, 255, 0, 255),
+            )
+
+    def draw( self ):
+        now = timer()
+        if self.updated is None or now - self.updated > self.interval:
+            self.label.text = '\n'.join( self.profiler.report() )
+            self.updated = now
+
+        # follow the top of the window as it's resized
+        self.label.y = self.window.height - 10
+        self.label.draw()
@@ -0,0 +1,99 @@
+import ctypes
+
+from pyglet.gl import *
+import numpy
+
+
+# column major 4x4 matrices, as glUniformMatrix4fv expects
+identity = tuple( numpy.identity( 4, dtype = numpy.float32 ).flatten() )
+
+
+def current_transform():
+    # the scene's projection * modelview
+    # read once per frame so our quads don't need the fixed function stacks
+    projection = (GLfloat * 16)()
+    modelview = (GLfloat * 16)()
+    glGetFloatv( GL_PROJECTION_MATRIX, projection )
+    glGetFloatv( GL_MODELVIEW_MATRIX, modelview )
+
+    # GL's matrices are column major, so transpose to multiply
+    projection = numpy.array( projection, dtype = numpy.float32 ).reshape( 4, 4 ).T
+    modelview = numpy.array( modelview, dtype = numpy.float32 ).reshape( 4, 4 ).T
+    return tuple( numpy.dot( projection, modelview ).T.flatten() )
+
+
+class QuadBuffer( object ):
+    # a textured quad uploaded once into a VBO
+    # and drawn as a triangle strip
+    # vertices feed gl_Vertex and gl_MultiTexCoord0
+    # texcoords default to the whole texture, and can be
+    # moved with set_texcoords for quads showing part of one
+
+    # x, y, s, t as floats
+    stride = 4 * 4
+
+    def __init__( self, left = -1.0, bottom = -1.0, right = 1.0, top = 1.0, usage = GL_STATIC_DRAW ):
+        super( QuadBuffer, self ).__init__()
+
+        self.corners = (left, bottom, right, top)
+        self.texcoords = (0.0, 0.0, 1.0, 1.0)
+
+        self.vbo = GLuint()
+        glGenBuffers( 1, ctypes.byref( self.vbo ) )
+        glBindBuffer( GL_ARRAY_BUFFER, self.vbo )
+        vertices = self.vertices()
+        glBufferData( GL_ARRAY_BUFFER, ctypes.sizeof( vertices ), vertices, usage )
+        glBindBuffer( GL_ARRAY_BUFFER, 0 )
+
+    def vertices( self ):
+        left, bottom, right, top = self.corners
+        s0, t0, s1, t1 = self.texcoords
+        return (GLfloat * 16)(
+            left, bottom, s0, t0,
+            right, bottom, s1, t0,
+            left, top, s0, t1,
+            right, top, s1, t1,
+            )
+
+    def set_texcoords( self, left, bottom, right, top ):
+        # the part of the texture the quad shows
+        # the buffer is only rewritten when they change
+        texcoords = (left, bottom, right, top)
+        if texcoords == self.texcoords:
+            return
+        self.texcoords = texcoords
+        vertices = self.vertices()
+        glBindBuffer( GL_ARRAY_BUFFER, self.vbo )
+        glBufferSubData( GL_ARRAY_BUFFER, 0, ctypes.sizeof( vertices ), vertices )
+        glBindBuffer( GL_ARRAY_BUFFER, 0 )
+
+    def __del__( self ):
+        self.delete()
+
+    def delete( self ):
+        if self.vbo is not None:
+            glDeleteBuffers( 1, ctypes.byref( self.vbo ) )
+            self.vbo = None
+
+    def bind( self ):
+        # point the vertex arrays at our buffer
+        # this stays valid for as many draws as we like
+        glBindBuffer( GL_ARRAY_BUFFER, self.vbo )
+        glEnableClientState( GL_VERTEX_ARRAY )
+        glEnableClientState( GL_TEXTURE_COORD_ARRAY )
+        glVertexPointer( 2, GL_FLOAT, self.stride, 0 )
+        glTexCoordPointer( 2, GL_FLOAT, self.stride, 2 * 4 )
+
+    def draw( self ):
+        glDrawArrays( GL_TRIANGLE_STRIP, 0, 4 )
+
+    def unbind( self ):
+        glDisableClientState( GL_TEXTURE_COORD_ARRAY )
+        glDisableClientState( GL_VERTEX_ARRAY )
+        glBindBuffer( GL_ARRAY_BUFFER, 0 )
+
+    def render( self ):
+        # bind, draw and unbind for a one off quad
+        self.bind()
+        self.draw()
+        self.unbind()
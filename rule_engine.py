@@ -0,0 +1,35 @@
+import numpy
+
+import boundaries
+import rules
+
+
+class RuleEngine( object ):
+
+    def __init__( self, board, rule = 'B3/S23', boundary = boundaries.torus ):
+        super( RuleEngine, self ).__init__()
+
+        self.generation = 0
+        self.rule = rules.parse_rule( rule )
+        self.boundary = boundaries.check( boundary )
+        self.front = numpy.array( board, dtype = numpy.uint8 )
+
+    def set_rule( self, rule ):
+        # rules can change between generations
+        # cells in states the new rule doesn't have are dropped
+        self.rule = rules.parse_rule( rule )
+        self.front[ self.front >= self.rule.states ] = 0
+
+    def step( self, generations = 1 ):
+        for generation in range( generations ):
+            self.front = self.rule.step( self.front, self.boundary )
+            self.generation += 1
+        return self.front
+
+    @property
+    def board( self ):
+        return self.front
+
+    @property
+    def dimensions( self ):
+        return (self.front.shape[ 1 ], self.front.shape[ 0 ])
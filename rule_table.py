@@ -0,0 +1,52 @@
+import ctypes
+
+from pyglet.gl import *
+import numpy
+
+
+class RuleTable( object ):
+    # a lookup texture of next states
+    # indexed by neighbour count (x) and current byte (y)
+
+    def __init__( self, rule ):
+        super( RuleTable, self ).__init__()
+
+        table = numpy.ascontiguousarray( rule.texture_table() )
+        self.dimensions = (table.shape[ 1 ], table.shape[ 0 ])
+
+        self.texture = GLuint()
+        glGenTextures( 1, ctypes.byref( self.texture ) )
+        glBindTexture( GL_TEXTURE_2D, self.texture )
+
+        # we want exact entries, never blended ones
+        glTexParameteri( GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST )
+        glTexParameteri( GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST )
+        glTexParameteri( GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE )
+        glTexParameteri( GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE )
+
+        glPixelStorei( GL_UNPACK_ALIGNMENT, 1 )
+        glTexImage2D(
+            GL_TEXTURE_2D,
+            0,
+            GL_LUMINANCE8,
+            self.dimensions[ 0 ],
+            self.dimensions[ 1 ],
+            0,
+            GL_LUMINANCE,
+            GL_UNSIGNED_BYTE,
+            table.ctypes.data
+            )
+        glBindTexture( GL_TEXTURE_2D, 0 )
+
+    def __del__( self ):
+        glDeleteTextures( 1, ctypes.byref( self.texture ) )
+
+    def bind( self, unit ):
+        glActiveTexture( GL_TEXTURE0 + unit )
+        glBindTexture( GL_TEXTURE_2D, self.texture )
+        glActiveTexture( GL_TEXTURE0 )
+
+    def unbind( self, unit ):
+        glActiveTexture( GL_TEXTURE0 + unit )
+        glBindTexture( GL_TEXTURE_2D, 0 )
+        glActiveTexture( GL_TEXTURE0 )
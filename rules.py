@@ -0,0 +1,259 @@
+import re
+
+import numpy
+
+import boundaries
+import numpy_engine
+
+
+life_like = re.compile( r'^B(\d*)/S(\d*)$', re.IGNORECASE )
+life_like_reversed = re.compile( r'^S(\d*)/B(\d*)$', re.IGNORECASE )
+survival_birth = re.compile( r'^(\d*)/(\d*)$' )
+generations = re.compile( r'^(\d*)/(\d*)/(\d+)$' )
+generations_named = re.compile( r'^B(\d*)/S(\d*)/C?(\d+)$', re.IGNORECASE )
+larger_than_life = re.compile(
+    r'^R(\d+),C(\d+),M([01]),S(\d+)\.\.(\d+),B(\d+)\.\.(\d+),NM$',
+    re.IGNORECASE
+    )
+
+
+def digits( text ):
+    return set( int( digit ) for digit in text )
+
+
+class Rule( object ):
+
+    def __init__(
+        self,
+        name,
+        birth,
+        survival,
+        states = 2,
+        radius = 1,
+        include_centre = False
+        ):
+        super( Rule, self ).__init__()
+
+        self.name = name
+        self.birth = set( birth )
+        self.survival = set( survival )
+        self.states = states
+        self.radius = radius
+        self.include_centre = include_centre
+
+        if not 2 <= states <= 255:
+            raise ValueError( "Rules must have between 2 and 255 states" )
+
+        # the largest neighbour count we can see
+        area = ( 2 * radius + 1 ) ** 2
+        self.max_count = area if include_centre else area - 1
+
+        self.table = self.create_table()
+
+    def create_table( self ):
+        # next state indexed by [ state, live neighbours ]
+        table = numpy.zeros( (self.states, self.max_count + 1), dtype = numpy.uint8 )
+        for count in range( self.max_count + 1 ):
+            # dead cells are born
+            if count in self.birth:
+                table[ 0, count ] = 1
+
+            # live cells survive or start dying
+            if count in self.survival:
+                table[ 1, count ] = 1
+            else:
+                table[ 1, count ] = 2 % self.states
+
+        # dying cells age until they are dead, whatever their neighbours
+        for state in range( 2, self.states ):
+            table[ state, : ] = ( state + 1 ) % self.states
+        return table
+
+    def count_neighbours( self, board, boundary = boundaries.torus ):
+        # count the live neighbours of every cell
+        # only state 1 is alive, dying states don't count
+        alive = ( board == 1 ).astype( numpy.uint16 )
+        rows = numpy.empty_like( alive )
+        totals = numpy.empty_like( alive )
+
+        if self.radius == 1:
+            numpy_engine.sum_rows( alive, rows, boundary )
+            numpy_engine.sum_columns( rows, totals, boundary )
+        else:
+            # box sums for larger than life
+            rows[ ... ] = alive
+            for offset in range( 1, self.radius + 1 ):
+                boundaries.add_rows( alive, rows, offset, boundary )
+                boundaries.add_rows( alive, rows, -offset, boundary )
+            totals[ ... ] = rows
+            for offset in range( 1, self.radius + 1 ):
+                boundaries.add_columns( rows, totals, offset, boundary )
+                boundaries.add_columns( rows, totals, -offset, boundary )
+
+        if not self.include_centre:
+            totals -= alive
+        return totals
+
+    def step( self, board, boundary = boundaries.torus ):
+        # look up every cell's next state at once
+        return self.table[ board, self.count_neighbours( board, boundary ) ]
+
+    def texture_table( self ):
+        # the GPU stores live cells as 255 so they display and read
+        # back like B3/S23 boards, and dying state k as the byte k
+        # the table maps [ byte, count ] to the next byte
+        table = numpy.zeros( (256, self.max_count + 1), dtype = numpy.uint8 )
+        encoded = state_bytes( self.states )
+        table[ encoded ] = encoded[ self.table ]
+        return table
+
+    def __eq__( self, other ):
+        return isinstance( other, Rule ) and self.name == other.name
+
+    def __ne__( self, other ):
+        return not self == other
+
+    def __hash__( self ):
+        return hash( self.name )
+
+    def __repr__( self ):
+        return "Rule( %s )" % self.name
+
+
+def state_bytes( states ):
+    # the texture byte for each state
+    encoded = numpy.arange( states, dtype = numpy.uint8 )
+    encoded[ 1 ] = 255
+    return encoded
+
+
+def encode_board( board, states = 2 ):
+    # convert a board of states to texture bytes
+    return state_bytes( states )[ numpy.asarray( board, dtype = numpy.uint8 ) ]
+
+
+def decode_board( data, states = 2 ):
+    # convert texture bytes back to states
+    decoded = numpy.zeros( 256, dtype = numpy.uint8 )
+    decoded[ state_bytes( states ) ] = numpy.arange( states, dtype = numpy.uint8 )
+    return decoded[ data ]
+
+
+def life_like_name( birth, survival ):
+    return 'B%s/S%s' % (
+        ''.join( str( count ) for count in sorted( birth ) ),
+        ''.join( str( count ) for count in sorted( survival ) )
+        )
+
+
+rule_cache = {}
+
+
+def parse_rule( rulestring ):
+    # accept B/S and S/B life-like rules, Generations rules
+    # and Golly style Larger than Life rules
+    if isinstance( rulestring, Rule ):
+        return rulestring
+
+    text = rulestring.strip().replace( ' ', '' )
+    if text in rule_cache:
+        return rule_cache[ text ]
+
+    rule = None
+    match = life_like.match( text )
+    if match:
+        birth, survival = match.groups()
+        rule = Rule( life_like_name( digits( birth ), digits( survival ) ), digits( birth ), digits( survival ) )
+
+    match = life_like_reversed.match( text ) or survival_birth.match( text )
+    if rule is None and match:
+        survival, birth = match.groups()
+        rule = Rule( life_like_name( digits( birth ), digits( survival ) ), digits( birth ), digits( survival ) )
+
+    match = generations.match( text )
+    if rule is None and match:
+        survival, birth, states = match.groups()
+        rule = Rule(
+            '%s/C%s' % (life_like_name( digits( birth ), digits( survival ) ), states),
+            digits( birth ),
+            digits( survival ),
+            states = int( states )
+            )
+
+    match = generations_named.match( text )
+    if rule is None and match:
+        birth, survival, states = match.groups()
+        rule = Rule(
+            '%s/C%s' % (life_like_name( digits( birth ), digits( survival ) ), states),
+            digits( birth ),
+            digits( survival ),
+            states = int( states )
+            )
+
+    match = larger_than_life.match( text )
+    if rule is None and match:
+        radius, states, centre, s_min, s_max, b_min, b_max = [ int( value ) for value in match.groups() ]
+        rule = Rule(
+            'R%d,C%d,M%d,S%d..%d,B%d..%d,NM' % (radius, states, centre, s_min, s_max, b_min, b_max),
+            range( b_min, b_max + 1 ),
+            range( s_min, s_max + 1 ),
+            states = max( states, 2 ),
+            radius = radius,
+            include_centre = bool( centre )
+            )
+
+    if rule is None:
+        raise ValueError( "Unrecognised rule: %s" % rulestring )
+
+    rule_cache[ text ] = rule
+    return rule
+
+
+def fragment_shader( rule, boundary = boundaries.torus ):
+    # generate a branch free GLSL kernel for a rule
+    # the rule itself lives in a lookup texture, so the
+    # only things that change per rule are the neighbourhood
+    # and how coordinates past the edge are wrapped
+    lines = []
+    for dy in range( -rule.radius, rule.radius + 1 ):
+        for dx in range( -rule.radius, rule.radius + 1 ):
+            if dx == 0 and dy == 0 and not rule.include_centre:
+                continue
+            lines.append(
+                '    neighbours += alive( texel + vec2( %d.0, %d.0 ) * cell );' % (dx, dy)
+                )
+
+    return """
+#version 120
+
+// inputs
+uniform sampler2D tex0;
+uniform sampler2D rule_table;
+uniform vec2 dimensions;
+uniform vec2 table_size;
+
+%s
+
+// live cells are stored as 1.0
+// anything lower is dead or dying
+float alive( vec2 coord )
+{
+    return step( 0.999, texture2D( tex0, wrap( coord ) ).r );
+}
+
+void main()
+{
+    // sample from the centre of our texel
+    vec2 cell = 1.0 / dimensions;
+    vec2 texel = ( floor( gl_TexCoord[0].xy * dimensions ) + 0.5 ) * cell;
+
+    float current = texture2D( tex0, texel ).r;
+
+    float neighbours = 0.0;
+%s
+
+    // look up our next state from the current byte and count
+    vec2 lookup = ( vec2( neighbours, floor( current * 255.0 + 0.5 ) ) + 0.5 ) / table_size;
+    gl_FragColor = vec4( texture2D( rule_table, lookup ).r, 0.0, 0.0, 1.0 );
+}
+""" % (boundaries.glsl_wrap[ boundaries.check( boundary ) ].strip(), '\n'.join( lines ))
@@ -1,28 +1,52 @@
 from pyglet.gl import *
 
 from fbo_texture import FBO_Texture
+from quad_buffer import QuadBuffer
+import quad_buffer
+import shader_program
 
 
 class ShaderGeneratedTexture( object ):
     
-    def __init__( self, shader, dimensions, texture1 = None, texture2 = None ):
+    def __init__(
+        self,
+        shader,
+        dimensions,
+        texture1 = None,
+        texture2 = None,
+        internal_format = GL_RGBA
+        ):
         super( ShaderGeneratedTexture, self ).__init__()
         
         self.dimensions = dimensions
         self.shader = shader
+        self.internal_format = internal_format
+
+        # how the shader's reads past the edge are wrapped
+        self.wrap_mode = GL_REPEAT
         
-        self.fbo1 = FBO_Texture( dimensions, texture1 )
-        self.fbo2 = FBO_Texture( dimensions, texture2 )
+        self.fbo1 = FBO_Texture( dimensions, texture1, internal_format )
+        self.fbo2 = FBO_Texture( dimensions, texture2, internal_format )
+
+        # a fullscreen quad, uploaded once
+        self.quad = QuadBuffer()
         
         #self.fbo1, self.fbo2 = self.fbo2, self.fbo1
     
-    def bind( self ):    
-        # switch FBOs around
-        self.fbo1, self.fbo2 = self.fbo2, self.fbo1
-        
-        # render fbo1 to fbo2
-        self.fbo1.bind()
-        
+    def delete( self ):
+        # free both FBOs, their textures and the quad
+        self.fbo1.delete()
+        self.fbo2.delete()
+        self.quad.delete()
+
+    def bind( self ):
+        self.begin()
+        self.swap()
+
+    def begin( self ):
+        # set up the state shared by every generation
+        # this only needs to happen once per batch
+
         # set the viewport to be the size of the texture
         glPushAttrib( GL_VIEWPORT_BIT | GL_SCISSOR_BIT )
         glViewport( 0, 0, self.dimensions[ 0 ], self.dimensions[ 1 ] )
@@ -30,62 +54,60 @@ class ShaderGeneratedTexture( object ):
         # disable glScissor or we will get flashing
         glDisable( GL_SCISSOR_TEST )
         
-        # clear our buffer
-        glClear( GL_COLOR_BUFFER_BIT )
-        
-        # set our viewport to an orthogonal viewmatrix
-        glMatrixMode( GL_PROJECTION )
-        glPushMatrix()
-        glLoadIdentity()
-        
-        # set our modelview to identity
-        glMatrixMode( GL_MODELVIEW )
-        glPushMatrix()
-        glLoadIdentity()
-        
         # bind our shader
+        # the quad is already in clip space, so no transform
         self.shader.bind()
+        self.shader.uniform_matrixf( 'transform', quad_buffer.identity )
         
-        # bind fbo2's texture to our shader
-        # this is the input for fbo1's shader
         glActiveTexture( GL_TEXTURE0 )
-        glBindTexture( self.fbo2.texture.target, self.fbo2.texture.id )
-        
-        # disable texture filtering
-        glTexParameteri( GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST )
-        glTexParameteri( GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST )
 
-    def render( self ):
-        # render a quad at 0,0,0
-        left, bottom, right, top = -1.0, -1.0, 1.0, 1.0
-        
-        glBegin( GL_QUADS )
-        
-        glTexCoord2f( 0.0, 0.0 )
-        glVertex2f( left, bottom )
-        
-        glTexCoord2f( 1.0, 0.0 )
-        glVertex2f( right, bottom )
+        # both textures are read in turn, so set their
+        # sampling once here rather than every generation
+        for fbo in ( self.fbo1, self.fbo2 ):
+            glBindTexture( fbo.texture.target, fbo.texture.id )
+
+            # disable texture filtering and set the edges explicitly
+            # these are only sent when they change
+            shader_program.nearest( fbo.texture, self.wrap_mode )
+
+        self.quad.bind()
+
+    def swap( self ):
+        # switch FBOs around
+        self.fbo1, self.fbo2 = self.fbo2, self.fbo1
         
-        glTexCoord2f( 1.0, 1.0 )
-        glVertex2f( right, top )
+        # render fbo1 to fbo2
+        # the quad covers every texel so there is no need to clear
+        self.fbo1.bind()
         
-        glTexCoord2f( 0.0, 1.0 )
+        # bind fbo2's texture to our shader
+        # this is the input for fbo1's shader
+        glBindTexture( self.fbo2.texture.target, self.fbo2.texture.id )
+        shader_program.counter.add( 2 )
 
-        glVertex2f( left, top )
-        
-        glEnd()            
+    def iterate( self, generations ):
+        # run the shader back to back between begin and end
+        for generation in range( generations ):
+            self.swap()
+            self.render()
+
+    def render( self ):
+        # draw the fullscreen quad from its VBO
+        # begin has already bound it
+        self.quad.draw()
+        shader_program.counter.add()
         
     def unbind( self ):
+        self.end()
+
+    def end( self ):
+        self.quad.unbind()
+
         glBindTexture( self.fbo2.texture.target, 0 )
         
         self.shader.unbind()
 
         # reset state
-        glPopMatrix()
-        glMatrixMode( GL_PROJECTION )
-        glPopMatrix()
-        glMatrixMode( GL_MODELVIEW )
         glPopAttrib()
         
         self.fbo1.unbind()
@@ -100,5 +122,5 @@ class ShaderGeneratedTexture( object ):
     
     @property
     def height( self ):
-        return sef.dimensions[ 1 ]
+        return self.dimensions[ 1 ]
     
\ No newline at end of file
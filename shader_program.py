@@ -0,0 +1,127 @@
+import ctypes
+import weakref
+
+from pyglet.gl import *
+
+
+class CallCounter( object ):
+    # counts the GL calls our wrappers make and skip
+    # frame() starts a new frame, keeping the last one's counts
+
+    def __init__( self ):
+        super( CallCounter, self ).__init__()
+
+        self.calls = 0
+        self.skipped = 0
+        self.last_calls = 0
+        self.last_skipped = 0
+
+    def add( self, calls = 1 ):
+        self.calls += calls
+
+    def skip( self, calls = 1 ):
+        self.skipped += calls
+
+    def frame( self ):
+        self.last_calls, self.last_skipped = self.calls, self.skipped
+        self.calls = 0
+        self.skipped = 0
+
+
+# shared by everything that draws the board
+counter = CallCounter()
+
+
+# the parameters we last set on each texture
+# weak so a deleted texture's id can be reused safely
+texture_parameters = weakref.WeakKeyDictionary()
+
+
+def texture_parameter( texture, parameter, value ):
+    # glTexParameteri on the bound texture
+    # unless it already has this value
+    parameters = texture_parameters.setdefault( texture, {} )
+    if parameters.get( parameter ) == value:
+        counter.skip()
+        return
+    glTexParameteri( texture.target, parameter, value )
+    parameters[ parameter ] = value
+    counter.add()
+
+
+def nearest( texture, wrap_mode = None ):
+    # unfiltered sampling, and optionally the edge mode
+    texture_parameter( texture, GL_TEXTURE_MIN_FILTER, GL_NEAREST )
+    texture_parameter( texture, GL_TEXTURE_MAG_FILTER, GL_NEAREST )
+    if wrap_mode is not None:
+        texture_parameter( texture, GL_TEXTURE_WRAP_S, wrap_mode )
+        texture_parameter( texture, GL_TEXTURE_WRAP_T, wrap_mode )
+
+
+uniformf_functions = {
+    1: glUniform1f,
+    2: glUniform2f,
+    3: glUniform3f,
+    4: glUniform4f,
+    }
+
+uniformi_functions = {
+    1: glUniform1i,
+    2: glUniform2i,
+    3: glUniform3i,
+    4: glUniform4i,
+    }
+
+
+class ShaderProgram( object ):
+    # wraps a PyGLy Shader with the same bind / uniform methods
+    # uniform locations are looked up once, and uniforms are
+    # only sent when their value changes
+    # a program keeps its uniforms between binds, so this holds
+    # as long as every uniform goes through the wrapper
+
+    def __init__( self, shader ):
+        super( ShaderProgram, self ).__init__()
+
+        self.shader = shader
+        self.locations = {}
+        self.values = {}
+
+    def bind( self ):
+        self.shader.bind()
+        counter.add()
+
+    def unbind( self ):
+        self.shader.unbind()
+        counter.add()
+
+    def location( self, name ):
+        if name not in self.locations:
+            self.locations[ name ] = glGetUniformLocation(
+                self.shader.handle,
+                ctypes.create_string_buffer( name.encode( 'ascii' ) )
+                )
+        return self.locations[ name ]
+
+    def changed( self, name, values ):
+        # remember the new value, returning False if it was already set
+        if self.values.get( name ) == values:
+            counter.skip()
+            return False
+        self.values[ name ] = values
+        counter.add()
+        return True
+
+    def uniformf( self, name, *values ):
+        if self.changed( name, values ):
+            uniformf_functions[ len( values ) ]( self.location( name ), *values )
+
+    def uniformi( self, name, *values ):
+        if self.changed( name, values ):
+            uniformi_functions[ len( values ) ]( self.location( name ), *values )
+
+    def uniform_matrixf( self, name, matrix ):
+        # a column major 4x4 matrix
+        matrix = tuple( matrix )
+        if self.changed( name, matrix ):
+            glUniformMatrix4fv( self.location( name ), 1, False, (GLfloat * 16)( *matrix ) )
@@ -0,0 +1,145 @@
+import collections
+
+import numpy
+
+import boundaries
+import numpy_engine
+
+
+def dilate( tiles, boundary = boundaries.torus ):
+    # mark each tile and its 8 neighbours across the boundary
+    # tiles mirror on a Klein bottle just as cells do
+    rows = numpy.empty_like( tiles )
+    numpy_engine.sum_rows( tiles, rows, boundary )
+    result = numpy.empty_like( tiles )
+    numpy_engine.sum_columns( rows, result, boundary )
+    return result != 0
+
+
+class SparseEngine( object ):
+
+    def __init__( self, board, tile_size = 64, boundary = boundaries.torus, max_history = 1024 ):
+        super( SparseEngine, self ).__init__()
+
+        self.boundary = boundaries.check( boundary )
+
+        height, width = board.shape
+        if height % tile_size or width % tile_size:
+            raise ValueError(
+                "Board dimensions must be a multiple of %d" % tile_size
+                )
+
+        self.generation = 0
+        self.tile_size = tile_size
+        self.tiles = (height // tile_size, width // tile_size)
+
+        # we ping-pong between two boards
+        # tiles that aren't stepped are identical in both
+        self.front = numpy.array( board != 0, dtype = numpy.uint8 )
+        self.back = self.front.copy()
+
+        # everything is active for the first generation
+        self.active = numpy.ones( self.tiles, dtype = numpy.uint8 )
+        self.active_fraction = 1.0
+
+        # the active fraction of recent generations
+        # the oldest are dropped so long runs use constant memory
+        self.history = collections.deque( maxlen = max_history )
+
+    def halo_rows( self, ys, columns, outside ):
+        # the cells of rows 'ys' at 'columns' for a batch of tiles
+        # a row may be -1 or the board's height, which is seen
+        # across the boundary like boundaries.halo_row
+        # 'outside' marks the columns that were past the edge
+        height, width = self.front.shape
+        wrapped = ( ys < 0 ) | ( ys >= height )
+        if self.boundary == boundaries.klein:
+            columns = numpy.where( wrapped[ :, None ], width - 1 - columns, columns )
+        values = self.front[ ( ys % height )[ :, None ], columns ]
+        if self.boundary == boundaries.dead:
+            values[ outside ] = 0
+            values[ wrapped ] = 0
+        return values
+
+    def step_tiles( self, ty, tx ):
+        size = self.tile_size
+        tiles_y, tiles_x = self.tiles
+        width = self.front.shape[ 1 ]
+
+        # view the boards as a grid of tiles
+        # indexed by [ tile y, y, tile x, x ]
+        front = self.front.reshape( tiles_y, size, tiles_x, size )
+        back = self.back.reshape( tiles_y, size, tiles_x, size )
+
+        # gather the active tiles into one batch with a 1 cell halo
+        # taken from the edges of the neighbouring tiles
+        padded = numpy.empty( (len( ty ), size + 2, size + 2), dtype = numpy.uint8 )
+        padded[ :, 1:-1, 1:-1 ] = front[ ty, :, tx, : ]
+
+        # the halo's columns, corners included
+        columns = tx[ :, None ] * size + numpy.arange( -1, size + 1 )
+        outside = ( columns < 0 ) | ( columns >= width )
+        columns %= width
+
+        # the rows above and below each tile
+        padded[ :, 0 ] = self.halo_rows( ty * size - 1, columns, outside )
+        padded[ :, -1 ] = self.halo_rows( ty * size + size, columns, outside )
+
+        # the columns either side, which the Klein bottle wraps like the torus
+        rows = ty[ :, None ] * size + numpy.arange( size )
+        padded[ :, 1:-1, 0 ] = self.front[ rows, columns[ :, :1 ] ]
+        padded[ :, 1:-1, -1 ] = self.front[ rows, columns[ :, -1: ] ]
+        if self.boundary == boundaries.dead:
+            padded[ outside[ :, 0 ], 1:-1, 0 ] = 0
+            padded[ outside[ :, -1 ], 1:-1, -1 ] = 0
+
+        # count neighbourhoods for the whole batch at once
+        totals = padded[ :, :-2 ] + padded[ :, 1:-1 ]
+        totals += padded[ :, 2: ]
+        columns = totals[ :, :, :-2 ] + totals[ :, :, 1:-1 ]
+        columns += totals[ :, :, 2: ]
+
+        current = padded[ :, 1:-1, 1:-1 ]
+        result = numpy.empty_like( current )
+        numpy_engine.apply_rules( current, columns, result )
+
+        # scatter the results back into the board
+        back[ ty, :, tx, : ] = result
+
+        # flag the tiles that changed
+        return ( result != current ).any( axis = ( 1, 2 ) )
+
+    def step( self, generations = 1 ):
+        for generation in range( generations ):
+            ty, tx = numpy.nonzero( self.active )
+            self.active_fraction = len( ty ) / float( self.active.size )
+            self.history.append( self.active_fraction )
+
+            changed = numpy.zeros( self.tiles, dtype = numpy.uint8 )
+            if len( ty ):
+                changed[ ty, tx ] = self.step_tiles( ty, tx )
+
+            # only tiles next to a change can change next generation
+            self.active = dilate( changed, self.boundary ).astype( numpy.uint8 )
+
+            # switch boards around
+            self.front, self.back = self.back, self.front
+            self.generation += 1
+
+        return self.front
+
+    @property
+    def board( self ):
+        return self.front
+
+    @property
+    def stats( self ):
+        return {
+            'tiles': self.active.size,
+            'active_tiles': int( self.active.sum() ),
+            'active_fraction': self.active_fraction,
+            }
+
+    @property
+    def dimensions( self ):
+        return (self.front.shape[ 1 ], self.front.shape[ 0 ])
@@ -0,0 +1,50 @@
+import numpy
+import pytest
+
+import bitpacked_engine
+import boundaries
+import numpy_engine
+
+
+def soup( shape = (64, 128), density = 0.3, seed = 0 ):
+    random = numpy.random.RandomState( seed )
+    return ( random.rand( *shape ) < density ).astype( numpy.uint8 )
+
+
+def test_pack_round_trip():
+    board = soup()
+    words = bitpacked_engine.pack_board( board )
+    assert words.shape == (64, 128 // bitpacked_engine.word_size)
+    assert ( bitpacked_engine.unpack_board( words ) == board ).all()
+
+
+def test_lowest_x_is_the_lowest_bit():
+    board = numpy.zeros( (1, 64), dtype = numpy.uint8 )
+    board[ 0, 0 ] = board[ 0, 63 ] = 1
+    assert int( bitpacked_engine.pack_board( board )[ 0, 0 ] ) == 1 | ( 1 << 63 )
+
+
+def test_width_must_be_whole_words():
+    with pytest.raises( ValueError ):
+        bitpacked_engine.pack_board( numpy.zeros( (4, 100), dtype = numpy.uint8 ) )
+
+
+@pytest.mark.parametrize( 'boundary', boundaries.modes )
+def test_matches_numpy( boundary ):
+    board = soup()
+    reference = numpy_engine.NumpyEngine( board, boundary )
+    engine = bitpacked_engine.BitPackedEngine( board, boundary )
+    for generation in range( 60 ):
+        reference.step()
+        engine.step()
+        assert ( engine.board == reference.board ).all(), generation
+
+
+def test_rgba_round_trip():
+    board = soup()
+    engine = bitpacked_engine.BitPackedEngine.from_rgba(
+        numpy_engine.board_to_rgba( board ),
+        board.shape[ ::-1 ]
+        )
+    assert ( engine.board == board ).all()
+    assert ( engine.to_rgba() == numpy_engine.board_to_rgba( board ) ).all()
@@ -0,0 +1,135 @@
+import numpy
+import pytest
+
+import board_editor
+import boundaries
+
+
+def covered( rectangles, shape ):
+    mask = numpy.zeros( shape, dtype = int )
+    for left, bottom, right, top in rectangles:
+        mask[ bottom:top, left:right ] += 1
+    return mask
+
+
+def test_rectangles_cover_the_mask_once():
+    random = numpy.random.RandomState( 0 )
+    for trial in range( 200 ):
+        shape = tuple( random.randint( 1, 24, size = 2 ) )
+        mask = random.rand( *shape ) < random.rand()
+        counts = covered( board_editor.rectangles( mask ), shape )
+        assert ( counts == mask ).all()
+
+
+def test_rectangles_of_a_block():
+    mask = numpy.zeros( (10, 10), dtype = bool )
+    mask[ 2:6, 3:8 ] = True
+    assert board_editor.rectangles( mask ) == [ (3, 2, 8, 6) ]
+
+
+def test_rectangles_join_matching_bands():
+    # an L shape is two rectangles, the full width band isn't split
+    mask = numpy.zeros( (4, 4), dtype = bool )
+    mask[ 0:2, 0:4 ] = True
+    mask[ 2:4, 0:1 ] = True
+    assert sorted( board_editor.rectangles( mask ) ) == [ (0, 0, 4, 2), (0, 2, 1, 4) ]
+
+
+def test_rectangles_empty():
+    assert board_editor.rectangles( numpy.zeros( (0, 5), dtype = bool ) ) == []
+    assert board_editor.rectangles( numpy.zeros( (3, 5), dtype = bool ) ) == []
+
+
+def test_wrapped_spans():
+    spans = list( board_editor.wrapped_spans( -2, 5, 4 ) )
+    assert spans == [ (0, -1, 2, 2), (2, 0, 0, 3) ]
+
+
+class Board( object ):
+    # stands in for a GOL_Renderable
+
+    def __init__( self, dimensions, boundary ):
+        self.dimensions = dimensions
+        self.boundary = boundary
+        self.cells = numpy.zeros( dimensions[ ::-1 ], dtype = numpy.uint8 )
+        self.writes = 0
+
+    def write_rectangles( self, board, rectangles, x, y ):
+        self.writes += 1
+        for left, bottom, right, top in rectangles:
+            self.cells[ y + bottom:y + top, x + left:x + right ] = board[ bottom:top, left:right ]
+
+
+def expected_cells( dimensions, boundary, edits ):
+    # place every cell by hand
+    width, height = dimensions
+    cells = numpy.zeros( (height, width), dtype = numpy.uint8 )
+    for block, x, y in edits:
+        for (row, column), value in numpy.ndenumerate( block ):
+            cx, cy = x + column, y + row
+            if boundary == boundaries.dead:
+                if 0 <= cx < width and 0 <= cy < height:
+                    cells[ cy, cx ] = value
+                continue
+            wraps, cy = divmod( cy, height )
+            cx %= width
+            if boundary == boundaries.klein and wraps % 2:
+                cx = width - 1 - cx
+            cells[ cy, cx ] = value
+    return cells
+
+
+@pytest.mark.parametrize( 'boundary', boundaries.modes )
+def test_set_cells_follows_the_boundary( boundary ):
+    random = numpy.random.RandomState( 1 )
+    for trial in range( 100 ):
+        dimensions = tuple( random.randint( 3, 20, size = 2 ) )
+        board = Board( dimensions, boundary )
+        editor = board_editor.BoardEditor( board )
+        edits = []
+        for edit in range( 3 ):
+            block = random.randint( 0, 2, size = (random.randint( 1, dimensions[ 1 ] + 1 ), random.randint( 1, dimensions[ 0 ] + 1 )) )
+            x, y = random.randint( -25, 25, size = 2 )
+            editor.set_cells( block.astype( numpy.uint8 ), x, y )
+            edits.append( (block, x, y) )
+        editor.flush()
+        assert ( board.cells == expected_cells( dimensions, boundary, edits ) ).all()
+
+
+def test_paint_wraps_on_a_torus():
+    board = Board( (8, 8), boundaries.torus )
+    editor = board_editor.BoardEditor( board )
+    editor.brush_size = 3
+    editor.paint( 0, 0 )
+    editor.flush()
+    assert board.cells.sum() == 9
+    assert board.cells[ 7, 7 ] == 1
+
+
+def test_flush_batches_touching_edits():
+    board = Board( (64, 64), boundaries.torus )
+    editor = board_editor.BoardEditor( board )
+    editor.line( (10, 10), (30, 10) )
+    assert editor.flush() == 1
+    assert board.writes == 1
+    assert board.cells[ 10, 10:31 ].all()
+    assert editor.flush() == 0
+
+
+def test_later_edits_win():
+    board = Board( (16, 16), boundaries.torus )
+    editor = board_editor.BoardEditor( board )
+    editor.set_cells( numpy.ones( (4, 4), dtype = numpy.uint8 ), 2, 2 )
+    editor.set_cells( numpy.zeros( (2, 2), dtype = numpy.uint8 ), 3, 3 )
+    editor.flush()
+    assert board.cells.sum() == 12
+    assert not board.cells[ 3:5, 3:5 ].any()
+
+
+def test_flush_separates_distant_edits():
+    board = Board( (64, 64), boundaries.torus )
+    editor = board_editor.BoardEditor( board )
+    editor.paint( 5, 5 )
+    editor.paint( 50, 50 )
+    assert editor.flush() == 2
+    assert board.writes == 2
@@ -0,0 +1,43 @@
+import numpy
+import pytest
+
+import board_seeder
+
+
+def test_same_seed_same_board():
+    first = board_seeder.seed_board( (100, 60), 0.3, 7 )
+    second = board_seeder.seed_board( (100, 60), 0.3, 7 )
+    assert first.shape == (60, 100)
+    assert ( first == second ).all()
+    assert not ( first == board_seeder.seed_board( (100, 60), 0.3, 8 ) ).all()
+
+
+def test_density():
+    board = board_seeder.seed_board( (512, 512), 0.25, 0 )
+    assert set( numpy.unique( board ) ) <= { 0, 1 }
+    assert abs( board.mean() - 0.25 ) < 0.01
+    assert not board_seeder.seed_board( (64, 64), 0.0, 0 ).any()
+    assert board_seeder.seed_board( (64, 64), 1.0, 0 ).all()
+
+
+def test_invalid_density():
+    with pytest.raises( ValueError ):
+        board_seeder.seed_board( (8, 8), 1.5 )
+
+
+def test_fills_in_place():
+    out = numpy.full( (40, 50), 9, dtype = numpy.uint8 )
+    result = board_seeder.seed_board( (50, 40), 0.5, 3, out )
+    assert result is out
+    assert ( out == board_seeder.seed_board( (50, 40), 0.5, 3 ) ).all()
+
+
+def test_rgba_matches_board():
+    # textures and CPU boards agree for a given seed
+    for format_size in ( 3, 4 ):
+        data = bytearray( 30 * 20 * format_size )
+        board_seeder.seed_rgba( (30, 20), data, 0.4, 5, format_size )
+        rgba = numpy.frombuffer( data, dtype = numpy.uint8 ).reshape( 20, 30, format_size )
+        assert ( ( rgba[ :, :, 0 ] == 255 ) == board_seeder.seed_board( (30, 20), 0.4, 5 ) ).all()
+        if format_size == 4:
+            assert ( rgba[ :, :, 3 ] == 255 ).all()
@@ -0,0 +1,40 @@
+import board_seeder
+import census
+import rule_engine
+
+
+def create_task( rule, **kwargs ):
+    task = next( census.create_tasks( [ (64, 64) ], [ 0.4 ], [ rule ], [ 3 ], 'torus', 'cpu', 200, 1, 1024 ) )
+    task.update( kwargs )
+    return task
+
+
+def test_population_counts_live_cells():
+    # Brian's Brain never settles, and most of its
+    # non-dead cells are dying rather than live
+    task = create_task( 'B2/S/C3', max_generations = 50 )
+    result = census.run_task( task )
+    assert result[ 'error' ] is None
+    assert result[ 'generations' ] == 50
+
+    engine = rule_engine.RuleEngine( board_seeder.seed_board( (64, 64), 0.4, 3 ), 'B2/S/C3' )
+    engine.step( 50 )
+    assert result[ 'population' ] == ( engine.board == 1 ).sum()
+    assert result[ 'population' ] < ( engine.board != 0 ).sum()
+
+
+def test_life_stabilises():
+    result = census.run_task( create_task( 'B3/S23', max_generations = 5000 ) )
+    assert result[ 'error' ] is None
+    assert result[ 'period' ] in ( 1, 2, 3, 15, 30 )
+    assert result[ 'stabilised' ] + result[ 'period' ] == result[ 'generations' ]
+
+
+def test_errors_are_reported():
+    result = census.run_task( create_task( 'life' ) )
+    assert result[ 'error' ].startswith( 'ValueError' )
+
+
+def test_parse_size():
+    assert census.parse_size( '256' ) == (256, 256)
+    assert census.parse_size( '512x128' ) == (512, 128)
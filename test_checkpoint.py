@@ -0,0 +1,94 @@
+import os
+
+import numpy
+
+import bitpacked_engine
+import board_seeder
+import checkpoint
+import numpy_engine
+import rule_engine
+
+
+def test_save_and_load( tmp_path ):
+    # widths that aren't a whole number of words are padded
+    filename = str( tmp_path / 'board.ckpt' )
+    board = board_seeder.seed_board( (100, 37), 0.4, 0 )
+    engine = numpy_engine.NumpyEngine( board )
+    engine.step( 5 )
+    checkpoint.save_checkpoint( filename, engine, 'B36/S23' )
+
+    saved = checkpoint.load_checkpoint( filename )
+    assert saved.dimensions == (100, 37)
+    assert saved.generation == 5
+    assert saved.rule == 'B36/S23'
+    assert ( saved.board == engine.board ).all()
+    assert not os.path.exists( filename + '.tmp' )
+
+
+def test_bands( tmp_path ):
+    filename = str( tmp_path / 'board.ckpt' )
+    board = board_seeder.seed_board( (64, 3 * checkpoint.band_size + 5), 0.5, 1 )
+    checkpoint.save_checkpoint( filename, numpy_engine.NumpyEngine( board ) )
+
+    rows = [ band for top, band in checkpoint.load_checkpoint( filename ).iter_bands() ]
+    assert ( numpy.concatenate( rows ) == board ).all()
+
+
+def test_streamed_rows( tmp_path ):
+    # engines with read_rows are written a row at a time
+
+    class Streamed( object ):
+        def __init__( self, board ):
+            self.board = board
+            self.dimensions = (board.shape[ 1 ], board.shape[ 0 ])
+            self.generation = 9
+
+        def read_rows( self ):
+            return iter( self.board )
+
+    filename = str( tmp_path / 'board.ckpt' )
+    board = board_seeder.seed_board( (70, 20), 0.5, 2 )
+    checkpoint.save_checkpoint( filename, Streamed( board ) )
+    assert ( checkpoint.load_checkpoint( filename ).board == board ).all()
+
+
+def test_resume( tmp_path ):
+    filename = str( tmp_path / 'board.ckpt' )
+    board = board_seeder.seed_board( (128, 64), 0.3, 3 )
+    engine = bitpacked_engine.BitPackedEngine( board )
+    engine.step( 10 )
+    checkpoint.save_checkpoint( filename, engine )
+
+    resumed = checkpoint.resume( filename )
+    assert resumed.generation == 10
+    resumed.step( 10 )
+    engine.step( 10 )
+    assert ( resumed.board == engine.board ).all()
+
+
+def test_generations_keep_dying_cells( tmp_path ):
+    filename = str( tmp_path / 'board.ckpt' )
+    engine = rule_engine.RuleEngine( board_seeder.seed_board( (100, 37), 0.4, 4 ), 'B2/S/C4' )
+    engine.step( 5 )
+    assert engine.board.max() == 3
+    checkpoint.save_checkpoint( filename, engine, 'B2/S/C4' )
+
+    saved = checkpoint.load_checkpoint( filename )
+    assert saved.states == 4
+    assert ( saved.board == engine.board ).all()
+    rows = [ band for top, band in saved.iter_bands() ]
+    assert ( numpy.concatenate( rows ) == engine.board ).all()
+
+
+def test_resume_with_the_saved_rule( tmp_path ):
+    filename = str( tmp_path / 'board.ckpt' )
+    for rule, width in ( ('B2/S/C4', 64), ('B36/S23', 64), ('B3/S23', 40) ):
+        engine = rule_engine.RuleEngine( board_seeder.seed_board( (width, 32), 0.4, 5 ), rule )
+        engine.step( 3 )
+        checkpoint.save_checkpoint( filename, engine, rule )
+
+        resumed = checkpoint.resume( filename )
+        assert resumed.generation == 3
+        resumed.step( 7 )
+        engine.step( 7 )
+        assert ( resumed.board == engine.board ).all(), rule
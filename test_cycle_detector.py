@@ -0,0 +1,52 @@
+import numpy
+
+import board_seeder
+import numpy_engine
+import rule_engine
+from cycle_detector import CycleDetector, TileHasher
+
+
+def fresh_hash( board, tile_size = 16 ):
+    return TileHasher( board.shape[ ::-1 ], tile_size ).update( board )
+
+
+def test_incremental_hash_matches_a_fresh_one():
+    board = board_seeder.seed_board( (64, 32), 0.3, 0 )
+    hasher = TileHasher( (64, 32), 16 )
+    for generation in range( 20 ):
+        assert hasher.update( board ) == fresh_hash( board )
+        board = numpy_engine.step( board, 1 )
+
+
+def test_states_hash_differently():
+    # a dying cell isn't the same board as a live one
+    live = numpy.zeros( (16, 16), dtype = numpy.uint8 )
+    live[ 4, 4 ] = 1
+    dying = live * 2
+    hashes = set( fresh_hash( board ) for board in ( live, dying, live * 3, numpy.zeros_like( live ) ) )
+    assert len( hashes ) == 4
+
+
+def test_blinker_period():
+    board = numpy.zeros( (32, 32), dtype = numpy.uint8 )
+    board[ 10, 9:12 ] = 1
+    detector = CycleDetector( (32, 32), 16 )
+    assert detector.run( numpy_engine.NumpyEngine( board ), 10 ) == 2
+    assert detector.cycle_start == 0
+
+
+def test_generations_period():
+    # under B2/S/C3 a lone cell is live, then dying, then dead
+    # if dying cells hashed as live it would look like a still life
+    board = numpy.zeros( (32, 32), dtype = numpy.uint8 )
+    board[ 8, 8 ] = 1
+    found = []
+
+    class Detector( CycleDetector ):
+        def cycle_found( self, generation, period ):
+            found.append( (generation, period) )
+
+    detector = Detector( (32, 32), 16 )
+    detector.run( rule_engine.RuleEngine( board, 'B2/S/C3' ), 10 )
+    assert detector.cycle_start == 2
+    assert found == [ (3, 1) ]
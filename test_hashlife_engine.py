@@ -0,0 +1,71 @@
+import numpy
+
+import hashlife_engine
+import numpy_engine
+
+
+r_pentomino = numpy.array( [
+    [ 0, 1, 1 ],
+    [ 1, 1, 0 ],
+    [ 0, 1, 0 ],
+    ], dtype = numpy.uint8 )
+
+
+def centred( cells, size ):
+    # a pattern in the middle of an empty board, far enough from
+    # the edges that the wrapping numpy engine sees an infinite plane
+    board = numpy.zeros( (size, size), dtype = numpy.uint8 )
+    top, left = ( size - cells.shape[ 0 ] ) // 2, ( size - cells.shape[ 1 ] ) // 2
+    board[ top:top + cells.shape[ 0 ], left:left + cells.shape[ 1 ] ] = cells
+    return board
+
+
+def soup( size = 16, density = 0.4, seed = 0 ):
+    random = numpy.random.RandomState( seed )
+    return ( random.rand( size, size ) < density ).astype( numpy.uint8 )
+
+
+def test_step_matches_numpy():
+    board = centred( soup(), 128 )
+    reference = numpy_engine.NumpyEngine( board )
+    engine = hashlife_engine.HashlifeEngine( board )
+    for generation in range( 40 ):
+        reference.step()
+        engine.step()
+        assert ( engine.board == reference.board ).all(), generation
+
+
+def test_jump_matches_numpy():
+    board = centred( r_pentomino, 256 )
+    engine = hashlife_engine.HashlifeEngine( board )
+    for generations in ( 1, 7, 64, 100 ):
+        engine.jump( generations )
+        expected = numpy_engine.step( board, engine.generation )
+        assert ( engine.board == expected ).all(), engine.generation
+        assert engine.population == expected.sum()
+
+
+def test_jump_with_garbage_collection():
+    # a small node table is thrown away several times during the jump
+    board = centred( r_pentomino, 256 )
+    engine = hashlife_engine.HashlifeEngine( board, max_cache = 4096, max_nodes = 1024 )
+
+    rebuilds = []
+    rebuild = engine.table.rebuild
+    def counted( roots ):
+        rebuilds.append( len( engine.table ) )
+        rebuild( roots )
+    engine.table.rebuild = counted
+
+    for generations in ( 100, 100 ):
+        engine.jump( generations )
+        expected = numpy_engine.step( board, engine.generation )
+        assert ( engine.board == expected ).all(), engine.generation
+    assert len( rebuilds ) >= 2
+
+
+def test_empty_board():
+    engine = hashlife_engine.HashlifeEngine( numpy.zeros( (32, 32), dtype = numpy.uint8 ) )
+    engine.jump( 1000 )
+    assert engine.generation == 1000
+    assert engine.population == 0
@@ -0,0 +1,94 @@
+import numpy
+import pytest
+
+import boundaries
+import numpy_engine
+
+
+glider = numpy.array( [
+    [ 0, 1, 0 ],
+    [ 0, 0, 1 ],
+    [ 1, 1, 1 ],
+    ], dtype = numpy.uint8 )
+
+
+def soup( shape = (32, 48), density = 0.3, seed = 0 ):
+    random = numpy.random.RandomState( seed )
+    return ( random.rand( *shape ) < density ).astype( numpy.uint8 )
+
+
+def reference_step( board ):
+    # one generation a cell at a time, wrapping around the board
+    height, width = board.shape
+    result = numpy.zeros_like( board )
+    for y in range( height ):
+        for x in range( width ):
+            total = 0
+            for dy in ( -1, 0, 1 ):
+                for dx in ( -1, 0, 1 ):
+                    if dx or dy:
+                        total += board[ ( y + dy ) % height, ( x + dx ) % width ]
+            result[ y, x ] = total == 3 or ( total == 2 and board[ y, x ] )
+    return result
+
+
+def test_matches_reference():
+    board = soup()
+    engine = numpy_engine.NumpyEngine( board )
+    for generation in range( 10 ):
+        board = reference_step( board )
+        engine.step()
+        assert ( engine.board == board ).all(), generation
+
+
+def test_step_leaves_the_board_alone():
+    board = soup()
+    original = board.copy()
+    numpy_engine.step( board, 5 )
+    assert ( board == original ).all()
+
+
+def test_blinker():
+    board = numpy.zeros( (8, 8), dtype = numpy.uint8 )
+    board[ 4, 3:6 ] = 1
+    once = numpy_engine.step( board, 1 )
+    assert once[ 3:6, 4 ].all() and once.sum() == 3
+    assert ( numpy_engine.step( board, 2 ) == board ).all()
+
+
+def test_glider_wraps_on_torus():
+    # a glider moves one cell diagonally every 4 generations
+    board = numpy.zeros( (16, 16), dtype = numpy.uint8 )
+    board[ 0:3, 0:3 ] = glider
+    result = numpy_engine.step( board, 4 * 16 )
+    assert ( result == board ).all()
+
+
+def test_rgba_round_trip():
+    board = soup()
+    rgba = numpy_engine.board_to_rgba( board )
+    assert rgba.size == board.size * 4
+    assert ( numpy_engine.board_from_rgba( rgba, board.shape[ ::-1 ] ) == board ).all()
+
+
+def test_glider_dies_on_dead_edges():
+    # it hits the edge and settles into a block
+    board = numpy.zeros( (16, 16), dtype = numpy.uint8 )
+    board[ 0:3, 0:3 ] = glider
+    result = numpy_engine.step( board, 4 * 16, boundaries.dead )
+    assert result.sum() == 4
+
+
+def test_klein_mirrors_across_the_top():
+    # a cell just under the top edge is the neighbour of the
+    # mirrored cell in the bottom row
+    board = numpy.zeros( (8, 8), dtype = numpy.uint8 )
+    board[ 7, 1:4 ] = 1
+    result = numpy_engine.step( board, 1, boundaries.klein )
+    assert result[ 0, 8 - 1 - 2 ] == 1
+    assert result[ 0, 2 ] == 0
+
+
+def test_unknown_boundary():
+    with pytest.raises( ValueError ):
+        numpy_engine.NumpyEngine( soup(), 'sphere' )
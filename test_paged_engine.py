@@ -0,0 +1,62 @@
+import numpy
+
+import board_seeder
+import numpy_engine
+import paged_engine
+
+
+glider = numpy.array( [
+    [ 0, 1, 0 ],
+    [ 0, 0, 1 ],
+    [ 1, 1, 1 ],
+    ], dtype = numpy.uint8 )
+
+
+def test_matches_numpy():
+    # the soup is centred on a board big enough that
+    # nothing reaches the edge and wraps
+    soup = board_seeder.seed_board( (24, 24), 0.4, 0 )
+    board = numpy.zeros( (256, 256), dtype = numpy.uint8 )
+    board[ 116:140, 116:140 ] = soup
+
+    # place it across tile corners, including negative tiles
+    engine = paged_engine.PagedEngine( soup, 16, -12, -12 )
+    for generation in range( 50 ):
+        board = numpy_engine.step( board, 1 )
+        engine.step()
+        assert ( engine.read_region( -128, -128, 256, 256 ) == board ).all(), generation
+    assert engine.generation == 50
+    assert engine.population == int( board.sum() )
+
+
+def test_glider_travels_in_constant_memory():
+    engine = paged_engine.PagedEngine( glider, 8 )
+    tiles = 0
+    for generation in range( 100 ):
+        engine.step( 4 )
+        tiles = max( tiles, engine.stats[ 'tiles' ] )
+    assert tiles <= 4
+    assert engine.population == 5
+    # it moves one cell diagonally every 4 generations
+    assert ( engine.read_region( 100, 100, 3, 3 ) == glider ).all()
+
+
+def test_write_and_read_region():
+    engine = paged_engine.PagedEngine( tile_size = 8 )
+    block = board_seeder.seed_board( (20, 13), 0.5, 1 )
+    engine.write_region( block, -5, 3 )
+    assert ( engine.read_region( -5, 3, 20, 13 ) == block ).all()
+
+    # clearing it frees the tiles
+    engine.write_region( numpy.zeros_like( block ), -5, 3 )
+    assert engine.stats[ 'tiles' ] == 0
+    assert engine.dimensions == (0, 0)
+
+
+def test_still_life_goes_idle():
+    engine = paged_engine.PagedEngine( numpy.ones( (2, 2), dtype = numpy.uint8 ), 8 )
+    engine.step( 2 )
+    assert engine.stats[ 'active_tiles' ] == 0
+    engine.step( 1000 )
+    assert engine.generation == 1002
+    assert engine.population == 4
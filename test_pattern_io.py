@@ -0,0 +1,67 @@
+import io
+
+import numpy
+import pytest
+
+import pattern_io
+
+
+def random_board( shape = (13, 40), density = 0.4, seed = 0 ):
+    random = numpy.random.RandomState( seed )
+    board = ( random.rand( *shape ) < density ).astype( numpy.uint8 )
+    # live cells on every edge so nothing is trimmed
+    board[ 0, 0 ] = board[ -1, -1 ] = 1
+    return board
+
+
+def round_trip( write, read, board ):
+    stream = io.StringIO()
+    write( stream, board )
+    stream.seek( 0 )
+    return read( stream )
+
+
+@pytest.mark.parametrize( 'write, read', [
+    (pattern_io.write_rle, pattern_io.read_rle),
+    (pattern_io.write_plaintext, pattern_io.read_plaintext),
+    (pattern_io.write_macrocell, pattern_io.read_macrocell),
+    ] )
+def test_round_trip( write, read ):
+    for seed in range( 5 ):
+        board = random_board( seed = seed )
+        result = round_trip( write, read, board )
+        assert result.shape == board.shape
+        assert ( result == board ).all()
+
+
+def test_macrocell_trims_to_live_cells():
+    board = numpy.zeros( (20, 30), dtype = numpy.uint8 )
+    board[ 5:8, 10:14 ] = random_board( (3, 4) )
+    result = round_trip( pattern_io.write_macrocell, pattern_io.read_macrocell, board )
+    assert ( result == board[ 5:8, 10:14 ] ).all()
+
+
+def test_read_rle_glider():
+    # rows are in file order, top row first
+    board = pattern_io.read_rle( io.StringIO( u'x = 3, y = 3\nbo$2bo$3o!' ) )
+    assert board.tolist() == [ [ 0, 1, 0 ], [ 0, 0, 1 ], [ 1, 1, 1 ] ]
+
+
+def test_read_rle_into_board():
+    board = numpy.zeros( (8, 8), dtype = numpy.uint8 )
+    pattern_io.read_rle( io.StringIO( u'x = 3, y = 1\n3o!' ), board, 2, 4 )
+    assert board[ 4 ].tolist() == [ 0, 0, 1, 1, 1, 0, 0, 0 ]
+    assert board.sum() == 3
+
+
+def test_save_and_load_by_extension( tmp_path ):
+    board = random_board()
+    for extension in ( '.rle', '.cells', '.mc' ):
+        filename = str( tmp_path / ( 'pattern' + extension ) )
+        pattern_io.save_pattern( filename, board )
+        assert ( pattern_io.load_pattern( filename ) == board ).all()
+
+
+def test_unknown_extension():
+    with pytest.raises( ValueError ):
+        pattern_io.format_from_filename( 'pattern.png' )
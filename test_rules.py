@@ -0,0 +1,94 @@
+import numpy
+import pytest
+
+import boundaries
+import numpy_engine
+import rule_engine
+import rules
+
+
+@pytest.mark.parametrize( 'text', [ 'B3/S23', 'b3/s23', 'S23/B3', '23/3', ' B3 / S23 ' ] )
+def test_life_spellings( text ):
+    rule = rules.parse_rule( text )
+    assert rule.name == 'B3/S23'
+    assert rule.birth == { 3 }
+    assert rule.survival == { 2, 3 }
+    assert rule.states == 2
+
+
+def test_generations():
+    for text in ( '345/2/4', 'B2/S345/C4', 'B2/S345/4' ):
+        rule = rules.parse_rule( text )
+        assert rule.name == 'B2/S345/C4'
+        assert rule.states == 4
+
+
+def test_larger_than_life():
+    rule = rules.parse_rule( 'R5,C0,M1,S34..58,B34..45,NM' )
+    assert rule.radius == 5
+    assert rule.include_centre
+    assert rule.birth == set( range( 34, 46 ) )
+    assert rule.survival == set( range( 34, 59 ) )
+    assert rule.max_count == 121
+
+
+@pytest.mark.parametrize( 'text', [ 'B3', 'life', 'B3/S23/C1', 'R1,C0,M2,S1..2,B1..2,NM' ] )
+def test_unrecognised( text ):
+    with pytest.raises( ValueError ):
+        rules.parse_rule( text )
+
+
+def test_parse_is_cached():
+    assert rules.parse_rule( 'B36/S23' ) is rules.parse_rule( 'B36/S23' )
+    rule = rules.parse_rule( 'B36/S23' )
+    assert rules.parse_rule( rule ) is rule
+
+
+@pytest.mark.parametrize( 'boundary', boundaries.modes )
+def test_life_matches_numpy_engine( boundary ):
+    random = numpy.random.RandomState( 0 )
+    board = ( random.rand( 32, 48 ) < 0.3 ).astype( numpy.uint8 )
+    rule = rules.parse_rule( 'B3/S23' )
+    expected = board
+    for generation in range( 20 ):
+        board = rule.step( board, boundary )
+        expected = numpy_engine.step( expected, 1, boundary )
+        assert ( board == expected ).all()
+
+
+@pytest.mark.parametrize( 'boundary', boundaries.modes )
+def test_rule_engine_matches_numpy_engine( boundary ):
+    random = numpy.random.RandomState( 1 )
+    board = ( random.rand( 32, 48 ) < 0.3 ).astype( numpy.uint8 )
+    engine = rule_engine.RuleEngine( board, 'B3/S23', boundary )
+    engine.step( 20 )
+    assert ( engine.board == numpy_engine.step( board, 20, boundary ) ).all()
+
+
+def test_rule_engine_set_rule():
+    # cells in states the new rule doesn't have are dropped
+    board = numpy.array( [ [ 0, 1, 2, 3 ] ], dtype = numpy.uint8 )
+    engine = rule_engine.RuleEngine( board, 'B2/S/C4' )
+    engine.set_rule( 'B2/S/C3' )
+    assert engine.board.tolist() == [ [ 0, 1, 2, 0 ] ]
+
+
+def test_generations_dying_states():
+    # a lone live cell starts dying, then ages back to dead
+    rule = rules.parse_rule( 'B2/S/C4' )
+    board = numpy.zeros( (8, 8), dtype = numpy.uint8 )
+    board[ 4, 4 ] = 1
+    states = []
+    for generation in range( 3 ):
+        board = rule.step( board )
+        states.append( int( board[ 4, 4 ] ) )
+    assert states == [ 2, 3, 0 ]
+
+
+def test_encode_decode():
+    for states in ( 2, 3, 8 ):
+        board = numpy.arange( states, dtype = numpy.uint8 ).reshape( 1, -1 )
+        encoded = rules.encode_board( board, states )
+        # live cells are 255 on the GPU
+        assert encoded[ 0, 1 ] == 255
+        assert ( rules.decode_board( encoded, states ) == board ).all()
@@ -0,0 +1,65 @@
+import numpy
+import pytest
+
+import boundaries
+import numpy_engine
+import sparse_engine
+
+
+glider = numpy.array( [
+    [ 0, 1, 0 ],
+    [ 0, 0, 1 ],
+    [ 1, 1, 1 ],
+    ], dtype = numpy.uint8 )
+
+
+def soup( shape = (64, 128), density = 0.3, seed = 0 ):
+    random = numpy.random.RandomState( seed )
+    return ( random.rand( *shape ) < density ).astype( numpy.uint8 )
+
+
+@pytest.mark.parametrize( 'boundary', boundaries.modes )
+def test_matches_numpy( boundary ):
+    board = soup()
+    reference = numpy_engine.NumpyEngine( board, boundary )
+    engine = sparse_engine.SparseEngine( board, 16, boundary = boundary )
+    for generation in range( 60 ):
+        reference.step()
+        engine.step()
+        assert ( engine.board == reference.board ).all(), generation
+
+
+@pytest.mark.parametrize( 'boundary', boundaries.modes )
+def test_glider_across_tiles( boundary ):
+    # a glider crossing the corner of the board passes
+    # through the halos of otherwise idle tiles
+    board = numpy.zeros( (64, 64), dtype = numpy.uint8 )
+    board[ 60:63, 60:63 ] = glider
+    reference = numpy_engine.NumpyEngine( board, boundary )
+    engine = sparse_engine.SparseEngine( board, 8, boundary = boundary )
+    for generation in range( 40 ):
+        reference.step()
+        engine.step()
+        assert ( engine.board == reference.board ).all(), generation
+    assert engine.stats[ 'active_fraction' ] < 0.5
+
+
+def test_still_life_goes_idle():
+    board = numpy.zeros( (64, 64), dtype = numpy.uint8 )
+    board[ 10:12, 10:12 ] = 1
+    engine = sparse_engine.SparseEngine( board, 16 )
+    engine.step( 2 )
+    assert engine.stats[ 'active_tiles' ] == 0
+    assert ( engine.board == board ).all()
+
+
+def test_dimensions_must_be_whole_tiles():
+    with pytest.raises( ValueError ):
+        sparse_engine.SparseEngine( numpy.zeros( (60, 64), dtype = numpy.uint8 ), 16 )
+
+
+def test_history_is_bounded():
+    engine = sparse_engine.SparseEngine( soup(), 16, max_history = 10 )
+    engine.step( 25 )
+    assert len( engine.history ) == 10
+    assert engine.history[ -1 ] == engine.active_fraction
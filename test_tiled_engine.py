@@ -0,0 +1,31 @@
+import numpy
+import pytest
+
+import boundaries
+import numpy_engine
+import tiled_engine
+
+
+def soup( shape = (64, 96), density = 0.3, seed = 0 ):
+    random = numpy.random.RandomState( seed )
+    return ( random.rand( *shape ) < density ).astype( numpy.uint8 )
+
+
+def test_split_rows():
+    strips = tiled_engine.split_rows( 10, 3 )
+    assert strips[ 0 ][ 0 ] == 0 and strips[ -1 ][ 1 ] == 10
+    for (top, bottom), (next_top, next_bottom) in zip( strips, strips[ 1: ] ):
+        assert bottom == next_top
+
+
+@pytest.mark.parametrize( 'boundary', boundaries.modes )
+@pytest.mark.parametrize( 'workers', [ 1, 2, 3 ] )
+def test_matches_numpy( workers, boundary ):
+    board = soup()
+    expected = numpy_engine.step( board, 20, boundary )
+    with tiled_engine.TiledEngine( board, workers, boundary ) as engine:
+        assert engine.workers == workers
+        engine.step( 5 )
+        engine.step( 15 )
+        assert engine.generation == 20
+        assert ( engine.board == expected ).all()
@@ -0,0 +1,197 @@
+import multiprocessing
+import multiprocessing.sharedctypes
+import time
+
+import numpy
+
+import boundaries
+import numpy_engine
+
+
+def shared_board( shape ):
+    # allocate a board that worker processes can see
+    # without pickling it
+    buffer = multiprocessing.sharedctypes.RawArray( 'B', shape[ 0 ] * shape[ 1 ] )
+    return buffer, numpy.frombuffer( buffer, dtype = numpy.uint8 ).reshape( shape )
+
+
+def split_rows( height, count ):
+    # divide the rows into 'count' contiguous strips
+    bounds = numpy.linspace( 0, height, count + 1 ).astype( int )
+    return list( zip( bounds[ :-1 ], bounds[ 1: ] ) )
+
+
+def step_strip( front, back, strip, padded, rows, totals, boundary = boundaries.torus ):
+    top, bottom = strip
+
+    # exchange halos
+    # copy the neighbouring strips' edge rows either side of ours
+    # the board's own edges are handled by the boundary
+    padded[ 0 ] = boundaries.halo_row( front, top - 1, boundary )
+    padded[ 1:-1 ] = front[ top:bottom ]
+    padded[ -1 ] = boundaries.halo_row( front, bottom, boundary )
+
+    # vertical sums don't wrap as the halos are in place
+    numpy.add( padded[ :-2 ], padded[ 1:-1 ], out = rows )
+    rows += padded[ 2: ]
+    numpy_engine.sum_columns( rows, totals, boundary )
+
+    numpy_engine.apply_rules( padded[ 1:-1 ], totals, back[ top:bottom ] )
+
+
+def worker( buffers, shape, strip, barrier, connection, boundary ):
+    boards = [
+        numpy.frombuffer( buffer, dtype = numpy.uint8 ).reshape( shape )
+        for buffer in buffers
+        ]
+
+    # local scratch buffers for our strip
+    height = strip[ 1 ] - strip[ 0 ]
+    padded = numpy.empty( (height + 2, shape[ 1 ]), dtype = numpy.uint8 )
+    rows = numpy.empty( (height, shape[ 1 ]), dtype = numpy.uint8 )
+    totals = numpy.empty_like( rows )
+
+    while True:
+        command = connection.recv()
+        if command is None:
+            break
+
+        current, generations = command
+        for generation in range( generations ):
+            step_strip(
+                boards[ current ],
+                boards[ 1 - current ],
+                strip,
+                padded, rows, totals,
+                boundary
+                )
+            current = 1 - current
+
+            # wait for every strip before the halos are read again
+            barrier.wait()
+
+        connection.send( current )
+
+
+class TiledEngine( object ):
+
+    def __init__( self, board, workers = None, boundary = boundaries.torus ):
+        super( TiledEngine, self ).__init__()
+
+        self.boundary = boundaries.check( boundary )
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+
+        shape = board.shape
+        workers = max( 1, min( workers, shape[ 0 ] ) )
+
+        self.generation = 0
+        self.current = 0
+
+        # two shared boards to ping-pong between
+        front_buffer, front = shared_board( shape )
+        back_buffer, back = shared_board( shape )
+        front[ ... ] = board != 0
+        self.buffers = (front_buffer, back_buffer)
+        self.boards = (front, back)
+
+        # one process per strip of rows
+        barrier = multiprocessing.Barrier( workers )
+        self.strips = split_rows( shape[ 0 ], workers )
+        self.connections = []
+        self.processes = []
+        for strip in self.strips:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target = worker,
+                args = (self.buffers, shape, strip, barrier, child, self.boundary)
+                )
+            process.daemon = True
+            process.start()
+            self.connections.append( parent )
+            self.processes.append( process )
+
+    def __del__( self ):
+        self.close()
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, type, value, traceback ):
+        self.close()
+
+    def close( self ):
+        for connection in self.connections:
+            connection.send( None )
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+    def step( self, generations = 1 ):
+        # only the generation count is sent to the workers
+        for connection in self.connections:
+            connection.send( (self.current, generations) )
+        for connection in self.connections:
+            self.current = connection.recv()
+
+        self.generation += generations
+        return self.board
+
+    @property
+    def board( self ):
+        return self.boards[ self.current ]
+
+    @property
+    def workers( self ):
+        return len( self.strips )
+
+    @property
+    def dimensions( self ):
+        return (self.board.shape[ 1 ], self.board.shape[ 0 ])
+
+
+def measure_speedup( board, generations, worker_counts ):
+    # time a single threaded run to compare against
+    engine = numpy_engine.NumpyEngine( board )
+    start = time.time()
+    engine.step( generations )
+    baseline = time.time() - start
+
+    results = []
+    for workers in worker_counts:
+        with TiledEngine( board, workers ) as engine:
+            start = time.time()
+            engine.step( generations )
+            elapsed = time.time() - start
+
+        results.append( {
+            'workers': workers,
+            'seconds': elapsed,
+            'generations_per_second': generations / elapsed,
+            'speedup': baseline / elapsed,
+            } )
+    return results
+
+
+def main():
+    size = 4096
+    generations = 100
+    board = ( numpy.random.random( (size, size) ) < 0.5 ).astype( numpy.uint8 )
+
+    counts = []
+    workers = 1
+    while workers <= multiprocessing.cpu_count():
+        counts.append( workers )
+        workers *= 2
+
+    for result in measure_speedup( board, generations, counts ):
+        print(
+            "%(workers)d workers: %(generations_per_second).1f gens/s, "
+            "speedup %(speedup).2fx" % result
+            )
+
+
+if __name__ == "__main__":
+    main()